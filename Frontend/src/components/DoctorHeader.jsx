@@ -5,6 +5,7 @@ import Logo from './Logo'
 export default function DoctorHeader() {
   const handleLogout = () => {
     localStorage.removeItem('token')
+    localStorage.removeItem('refreshToken')
     localStorage.removeItem('user')
     localStorage.removeItem('userType')
     window.location.href = '/'
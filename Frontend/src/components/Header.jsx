@@ -7,6 +7,7 @@ export default function Header() {
 
   const handleLogout = () => {
     localStorage.removeItem('token')
+    localStorage.removeItem('refreshToken')
     localStorage.removeItem('user')
     localStorage.removeItem('userType')
     window.location.href = '/'
@@ -7,6 +7,7 @@ export default function DoctorDashboard() {
   const [loading, setLoading] = useState(true)
   const [availabilitySlots, setAvailabilitySlots] = useState([])
   const [patients, setPatients] = useState([])
+  const [summary, setSummary] = useState(null)
   const [activeTab, setActiveTab] = useState('overview')
   const [newSlot, setNewSlot] = useState({ date: '', time: '' })
   const navigate = useNavigate()
@@ -24,8 +25,24 @@ export default function DoctorDashboard() {
     fetchAppointments()
     fetchAvailability()
     fetchPatients()
+    fetchSummary()
   }, [navigate])
 
+  // Counts and utilisation aggregated by the server
+  const fetchSummary = async () => {
+    try {
+      const token = localStorage.getItem('token')
+      const response = await fetch('http://127.0.0.1:5000/api/doctors/summary', {
+        headers: { 'Authorization': `Bearer ${token}` }
+      })
+      if (response.ok) {
+        setSummary(await response.json())
+      }
+    } catch (error) {
+      console.error('Error fetching summary:', error)
+    }
+  }
+
   const fetchAppointments = async () => {
     try {
       const token = localStorage.getItem('token')
@@ -308,12 +325,28 @@ export default function DoctorDashboard() {
             <div className="stats-grid">
               <div className="stat-card">
                 <h4>Today's Appointments</h4>
-                <p>{getTodayAppointments().length}</p>
+                <p>{summary ? summary.today : getTodayAppointments().length}</p>
               </div>
               <div className="stat-card">
                 <h4>Pending Requests</h4>
-                <p>{getPendingAppointments().length}</p>
+                <p>{summary ? summary.pending_requests : getPendingAppointments().length}</p>
               </div>
+              {summary && (
+                <>
+                  <div className="stat-card">
+                    <h4>Upcoming</h4>
+                    <p>{summary.upcoming}</p>
+                  </div>
+                  <div className="stat-card">
+                    <h4>Patients</h4>
+                    <p>{summary.distinct_patients}</p>
+                  </div>
+                  <div className="stat-card">
+                    <h4>Slot Utilisation (30 days)</h4>
+                    <p>{summary.utilisation.rate === null ? '-' : `${Math.round(summary.utilisation.rate * 100)}%`}</p>
+                  </div>
+                </>
+              )}
             </div>
           </div>
         )}
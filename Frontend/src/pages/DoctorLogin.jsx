@@ -53,6 +53,7 @@ export default function DoctorLogin() {
       })
       
       localStorage.setItem('token', response.data.access_token)
+      localStorage.setItem('refreshToken', response.data.refresh_token)
       localStorage.setItem('user', JSON.stringify(response.data.doctor))
       
       navigate('/doctor-dashboard')
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 
 export default function DoctorProfile() {
@@ -7,6 +7,9 @@ export default function DoctorProfile() {
   const [availability, setAvailability] = useState([])
   const [selectedSlot, setSelectedSlot] = useState(null)
   const [loading, setLoading] = useState(true)
+  // Kept only while a booking attempt got no response, so retrying it after a
+  // network failure is answered from the server's stored response
+  const bookingKey = useRef(null)
   const navigate = useNavigate()
 
   useEffect(() => {
@@ -55,11 +58,21 @@ export default function DoctorProfile() {
       console.log('Booking appointment with data:', appointmentData)
       console.log('Token exists:', token ? 'yes' : 'no')
       
+      if (bookingKey.current?.slotId !== selectedSlot.id) {
+        bookingKey.current = { slotId: selectedSlot.id, key: crypto.randomUUID() }
+      }
+      
       const response = await fetch('http://127.0.0.1:5000/api/appointments/', {
         method: 'POST',
-        headers: { 'Authorization': `Bearer ${token}`, 'Content-Type': 'application/json' },
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json',
+          'Idempotency-Key': bookingKey.current.key
+        },
         body: JSON.stringify(appointmentData)
       })
+      // The attempt completed; booking the slot again is a new request
+      bookingKey.current = null
       
       console.log('Response status:', response.status)
       
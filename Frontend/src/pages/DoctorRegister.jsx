@@ -104,6 +104,7 @@ export default function DoctorRegister() {
       })
       
       localStorage.setItem('token', response.data.access_token)
+      localStorage.setItem('refreshToken', response.data.refresh_token)
       localStorage.setItem('user', JSON.stringify(response.data.doctor))
       
       navigate('/doctor-dashboard')
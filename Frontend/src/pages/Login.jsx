@@ -30,6 +30,7 @@ export default function Login() {
       if (response.ok) {
         // Store JWT token and user data
         localStorage.setItem('token', data.access_token)
+        localStorage.setItem('refreshToken', data.refresh_token)
         localStorage.setItem('user', JSON.stringify(data.patient))
         localStorage.setItem('userType', 'patient')
         navigate('/patient-dashboard')
@@ -27,20 +27,109 @@ export default function PatientDashboard() {
 
     setUser(JSON.parse(userData))
     fetchAppointments()
-    fetchDoctors()
   }, [navigate])
 
   /* =========================
-     AUTO REFRESH APPOINTMENTS
+     DOCTOR SEARCH (server side, debounced)
   ========================== */
   useEffect(() => {
-    const interval = setInterval(() => {
-      if (localStorage.getItem('token')) {
-        fetchAppointments()
+    const timer = setTimeout(() => fetchDoctors(searchQuery, selectedSpecialization), 300)
+    return () => clearTimeout(timer)
+  }, [searchQuery, selectedSpecialization])
+
+  /* =========================
+     LIVE APPOINTMENT UPDATES
+  ========================== */
+  useEffect(() => {
+    const userData = JSON.parse(localStorage.getItem('user') || 'null')
+    if (!userData?.id) return
+
+    const base = 'http://127.0.0.1:5000/api'
+    let since = new Date().toISOString().slice(0, -1)
+
+    // Merge changed appointments into the list; unknown ids need a full reload
+    const applyChanges = (changes) => {
+      setAppointments(prev => {
+        if (changes.some(c => !prev.some(a => a.id === c.id))) {
+          fetchAppointments()
+          return prev
+        }
+        return prev.map(a => {
+          const change = changes.find(c => c.id === a.id)
+          return change ? { ...a, ...change } : a
+        })
+      })
+    }
+
+    const authHeaders = () => ({ Authorization: `Bearer ${localStorage.getItem('token')}` })
+
+    const catchUp = async () => {
+      try {
+        const res = await fetch(`${base}/appointments/changes?since=${since}`, { headers: authHeaders() })
+        if (res.ok) {
+          const data = await res.json()
+          since = data.since
+          if (data.appointments.length) applyChanges(data.appointments)
+        }
+      } catch (err) {
+        console.error(err)
       }
-    }, 30000)
+    }
+
+    // EventSource cannot send headers: connect with a short-lived stream token.
+    // Stream event ids are change-feed cursors, shared with catchUp's `since`
+    let source = null
+    let closed = false
+    let retryTimer = null
 
-    return () => clearInterval(interval)
+    // While no stream is available (server at its stream limit, network
+    // down) poll the change feed, and try the stream again now and then
+    const fallBack = () => {
+      source = null
+      if (closed) return
+      catchUp()
+      retryTimer = setTimeout(connect, 15000)
+    }
+
+    const connect = async () => {
+      try {
+        const res = await fetch(`${base}/events/token`, { method: 'POST', headers: authHeaders() })
+        if (!res.ok) throw new Error(`Stream token request failed: ${res.status}`)
+        const { token } = await res.json()
+        if (closed) return
+
+        // The server catches up from last_event_id before streaming live events
+        source = new EventSource(
+          `${base}/events/stream?jwt=${encodeURIComponent(token)}&last_event_id=${encodeURIComponent(since)}`
+        )
+        const onCursor = (e) => { if (e.lastEventId) since = e.lastEventId }
+        const onAppointment = (e) => {
+          onCursor(e)
+          applyChanges([JSON.parse(e.data).data])
+        }
+        source.addEventListener('cursor', onCursor)
+        source.addEventListener('appointment.created', onAppointment)
+        source.addEventListener('appointment.updated', onAppointment)
+        source.addEventListener('resync', () => fetchAppointments())
+        source.onerror = () => {
+          // Streams end after a few minutes and the browser reconnects with
+          // Last-Event-ID; once the token has expired (or the server is busy)
+          // the source closes instead, so poll and connect again with a new token
+          if (source.readyState === EventSource.CLOSED) fallBack()
+        }
+      } catch (err) {
+        console.error(err)
+        fallBack()
+      }
+    }
+
+    connect()
+
+    return () => {
+      closed = true
+      clearTimeout(retryTimer)
+      if (source) source.close()
+    }
   }, [])
 
   /* =========================
@@ -70,10 +159,13 @@ export default function PatientDashboard() {
     }
   }
 
-  const fetchDoctors = async () => {
+  const fetchDoctors = async (query = '', specialization = '') => {
     try {
       const token = localStorage.getItem('token')
-      const res = await fetch('http://127.0.0.1:5000/api/doctors', {
+      const params = new URLSearchParams({ limit: '100' })
+      if (query.trim()) params.set('q', query.trim())
+      if (specialization) params.set('specialization', specialization)
+      const res = await fetch(`http://127.0.0.1:5000/api/doctors/search?${params}`, {
         headers: {
           Authorization: `Bearer ${token}`,
           'Content-Type': 'application/json'
@@ -81,7 +173,7 @@ export default function PatientDashboard() {
       })
 
       if (res.ok) {
-        setDoctors(await res.json())
+        setDoctors((await res.json()).doctors)
       }
     } catch (err) {
       console.error(err)
@@ -106,17 +198,6 @@ export default function PatientDashboard() {
         new Date(`${b.appointment_date}T${b.appointment_time}`)
     )[0]
 
-  /* =========================
-     DOCTOR FILTER
-  ========================== */
-  const filteredDoctors = doctors.filter(d => {
-    const matchSearch =
-      d.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      d.specialization.toLowerCase().includes(searchQuery.toLowerCase())
-    const matchSpec = !selectedSpecialization || d.specialization === selectedSpecialization
-    return matchSearch && matchSpec
-  })
-
   if (loading) return <div className="page container">Loading...</div>
 
   /* =========================
@@ -183,7 +264,7 @@ export default function PatientDashboard() {
             </select>
 
             <div className="doctors-grid">
-              {filteredDoctors.map(d => (
+              {doctors.map(d => (
                 <div key={d.id} className="doctor-card">
                   <h4>{d.name}</h4>
                   <p>{d.specialization}</p>
@@ -86,6 +86,7 @@ export default function PatientRegister() {
       
       // Store token and user data
       localStorage.setItem('token', response.data.access_token)
+      localStorage.setItem('refreshToken', response.data.refresh_token)
       localStorage.setItem('user', JSON.stringify(response.data.patient))
       
       navigate('/patient-dashboard')
@@ -27,7 +27,25 @@ api.interceptors.request.use(
 // Add response interceptor to handle errors
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem('refreshToken');
+
+    // Expired access token: trade the refresh token for a new one and retry once
+    if (error.response?.status === 401 && refreshToken && original && !original._retried) {
+      original._retried = true;
+      try {
+        const { data } = await axios.post(`${API_BASE_URL}/auth/refresh`, null, {
+          headers: { Authorization: `Bearer ${refreshToken}` },
+        });
+        localStorage.setItem('token', data.access_token);
+        original.headers.Authorization = `Bearer ${data.access_token}`;
+        return api(original);
+      } catch (refreshError) {
+        localStorage.removeItem('refreshToken');
+      }
+    }
+
     if (error.response?.status === 401) {
       // Token expired or invalid - only redirect if not on login/register pages
       const currentPath = window.location.pathname;
@@ -35,6 +53,7 @@ api.interceptors.response.use(
       
       if (!isAuthPage) {
         localStorage.removeItem('token');
+        localStorage.removeItem('refreshToken');
         localStorage.removeItem('user');
         window.location.href = '/login';
       }
@@ -56,14 +75,22 @@ export const authAPI = {
 export const doctorAPI = {
   getAllDoctors: () => api.get('/doctors'),
   getDoctorById: (id) => api.get(`/doctors/${id}`),
+  // params: { q, specialization, min_fee, max_fee, min_experience, max_experience, sort, limit, cursor }
+  searchDoctors: (params) => api.get('/doctors/search', { params }),
   updateDoctorProfile: (id, data) => api.put(`/doctors/profile`, data),
-  getDoctorAppointments: () => api.get('/doctors/appointments'),
+  getDoctorAppointments: (params) => api.get('/doctors/appointments', { params }),
+  // params: { start_date, end_date }
+  getDoctorSummary: (params) => api.get('/doctors/summary', { params }),
+  // Publish many slots at once: { slots: [{ date, time }] } or
+  // { recurrence: { start_date, end_date, weekdays, hours, slot_minutes, exclude_dates } }
+  bulkAddAvailability: (doctorId, data) =>
+    api.post('/doctor/availability/bulk', data, { headers: { 'X-Doctor-ID': doctorId } }),
 };
 
 // Patient endpoints
 export const patientAPI = {
   updatePatientProfile: (id, data) => api.put(`/patients/profile`, data),
-  getPatientAppointments: () => api.get('/patients/appointments'),
+  getPatientAppointments: (params) => api.get('/patients/appointments', { params }),
 };
 
 // Appointment endpoints
@@ -81,6 +108,13 @@ export const appointmentAPI = {
   getAppointmentById: (id) => api.get(`/appointments/${id}`),
   updateAppointment: (id, data) => api.put(`/appointments/${id}`, data),
   cancelAppointment: (id) => api.delete(`/appointments/${id}`),
+  // Change many statuses at once: { ids, status } or { transitions: [{ id, status }] }
+  updateAppointmentStatuses: (data) => api.put('/appointments/status', data),
+  // Free slots for many doctors and days in one request
+  // params: { start_date, end_date, specialization, max_fee, doctor_ids, duration }
+  searchAvailableSlots: (params) => api.get('/appointments/available-slots', { params }),
+  // Days of a month (YYYY-MM) with at least one free slot; params: { month, duration }
+  getDoctorFreeDays: (doctorId, params) => api.get(`/appointments/doctor/${doctorId}/free-days`, { params }),
 };
 
 export default api;
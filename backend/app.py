@@ -6,21 +6,57 @@ import os
 
 from config import Config
 from models import db, Patient, Doctor, Appointment
+from models.engine import configure_engines, engine_options, replica_binds
+from models.migrations import upgrade_schema
+from models.search import ensure_doctor_search_index
+from services.archive import init_archiver, register_archive_commands
+from services.availability_cleanup import init_availability_cleanup, register_availability_commands
+from services.email_service import email_service
+from services.identity import verify_token_scope
+from services.metrics import init_metrics
+from services.occupancy import ensure_occupancy, register_occupancy_commands
+from services.replica_routing import init_replica_routing
+from services.reminder_scheduler import init_reminders
 
 from routes.auth_routes import auth_bp
 from routes.doctor_routes import doctor_bp
 from routes.patient_routes import patient_bp
 from routes.appointment_routes import appointment_bp
 from routes.availability_routes import availability_bp
+from routes.event_routes import event_bp
 
-def create_app():
+def create_database_app():
+    """App with configuration and database only, for schema setup and maintenance"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(app.config)
+    db.init_app(app)
+    configure_engines(app)
+    return app
+
+
+def setup_database(app=None):
+    """Create tables and upgrade databases created by older versions; safe to repeat"""
+    app = app or create_database_app()
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        ensure_doctor_search_index()
+        ensure_occupancy()
+    return app
+
+
+def create_app():
+    app = create_database_app()
     
     # Initialize extensions
-    db.init_app(app)
     jwt = JWTManager(app)
-    CORS(app, origins=['http://localhost:5173', 'http://127.0.0.1:5173', 'http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:8080', 'http://127.0.0.1:8080'], supports_credentials=True)
+    jwt.token_verification_loader(verify_token_scope)
+    email_service.init_app(app)
+    init_metrics(app)
+    init_replica_routing(app)
+    CORS(app, origins=['http://localhost:5173', 'http://127.0.0.1:5173', 'http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:8080', 'http://127.0.0.1:8080'], supports_credentials=True, expose_headers=['X-Next-Cursor', 'ETag', 'Idempotent-Replayed', 'Retry-After'])
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -28,14 +64,26 @@ def create_app():
     app.register_blueprint(patient_bp, url_prefix='/api/patients')
     app.register_blueprint(appointment_bp, url_prefix='/api/appointments')
     app.register_blueprint(availability_bp, url_prefix='/api/doctor/availability')
+    app.register_blueprint(event_bp, url_prefix='/api/events')
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    if app.config['DB_SETUP_ON_START']:
+        setup_database(app)
+    
+    # flask occupancy-check [--repair], flask archive-appointments, flask purge-availability
+    register_occupancy_commands(app)
+    register_archive_commands(app)
+    register_availability_commands(app)
+    
+    # Background jobs
+    init_reminders(app)
+    init_archiver(app)
+    init_availability_cleanup(app)
     
     return app
 
 
+# Development server; production runs wsgi.py under gunicorn or asgi.py
+# under uvicorn (see gunicorn.conf.py and the README)
 if __name__ == '__main__':
     app = create_app()
     app.run(debug=True, host='0.0.0.0', port=5000)
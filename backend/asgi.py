@@ -0,0 +1,15 @@
+"""ASGI entry point: uvicorn asgi:app --workers 4
+
+The Flask views stay synchronous. a2wsgi runs each request on a thread pool
+while the event loop owns the sockets, so slow clients and idle keep-alive
+connections do not hold a thread. Event streams are still blocking WSGI
+generators that keep their thread while open, so the pool has
+EVENT_MAX_STREAMS threads on top of SERVER_THREADS, matching the cap the
+stream route enforces.
+"""
+from a2wsgi import WSGIMiddleware
+
+from app import create_app
+
+flask_app = create_app()
+app = WSGIMiddleware(flask_app, workers=flask_app.config['SERVER_THREADS'] + flask_app.config['EVENT_MAX_STREAMS'])
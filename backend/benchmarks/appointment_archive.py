@@ -0,0 +1,133 @@
+"""Appointment listings before and after archiving cold history.
+
+Seeds upcoming bookings plus --years of past appointments, times the doctor
+and patient list endpoints, archives everything older than --after-days in
+batches, then times the same listings again together with a date-range
+query that has to reach into the archive. Run from the backend directory:
+    python -m benchmarks.appointment_archive --doctors 50 --years 3 --per-day 20
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+
+from benchmarks.common import create_benchmark_app
+from benchmarks.seed import seed_dataset
+
+PAST_STATUSES = ('completed', 'completed', 'completed', 'cancelled', 'rejected')
+BATCH_ROWS = 20000
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def seed_history(app, info, years, per_day, seed=7):
+    """Bulk insert per_day past appointments per doctor per day, as far back as years"""
+    from models import db, Appointment
+
+    rng = random.Random(seed)
+    today = date.today()
+    rows = []
+    inserted = 0
+    with app.app_context():
+        for day_offset in range(1, int(years * 365) + 1):
+            day = today - timedelta(days=day_offset)
+            for doctor_id in info['doctor_ids']:
+                for slot in range(per_day):
+                    rows.append({
+                        'patient_id': rng.choice(info['patient_ids']), 'doctor_id': doctor_id,
+                        'appointment_date': day, 'appointment_time': dtime(8 + slot // 4 % 10, slot % 4 * 15),
+                        'duration_minutes': 15, 'status': rng.choice(PAST_STATUSES), 'notes': 'history'
+                    })
+            if len(rows) >= BATCH_ROWS:
+                db.session.execute(db.insert(Appointment), rows)
+                inserted += len(rows)
+                rows = []
+        if rows:
+            db.session.execute(db.insert(Appointment), rows)
+            inserted += len(rows)
+        db.session.commit()
+        # Time the "before" listings against a checkpointed database, like the archiver leaves it
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+            db.session.commit()
+    return inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--per-day', type=int, default=20, help='past appointments per doctor per day')
+    parser.add_argument('--after-days', type=int, default=365, help='archive horizon')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app(args.database_url)
+    info = seed_dataset(app, doctors=args.doctors, patients=args.patients, days=14, slots_per_day=16, appointments=4000)
+    history = seed_history(app, info, args.years, args.per_day)
+
+    from models import db, Appointment, ArchivedAppointment
+    from services.archive import AppointmentArchiver
+
+    client = app.test_client()
+    doctor_id = info['doctor_ids'][len(info['doctor_ids']) // 2]
+    patient_id = info['patient_ids'][len(info['patient_ids']) // 2]
+    month_ago = (date.today() - timedelta(days=30)).isoformat()
+    two_years_ago = date.today() - timedelta(days=730)
+
+    listings = {
+        'doctor, first page': f'/api/appointments/doctor?doctor_id={doctor_id}&limit=50',
+        'doctor, scheduled': f'/api/appointments/doctor?doctor_id={doctor_id}&status=scheduled&view=compact',
+        'doctor, last 30 days': f'/api/appointments/doctor?doctor_id={doctor_id}&start_date={month_ago}&view=compact',
+        'patient, all': f'/api/patients/appointments?view=compact',
+        'doctor, one archived month': (
+            f'/api/appointments/doctor?doctor_id={doctor_id}&view=compact'
+            f'&start_date={two_years_ago.isoformat()}&end_date={(two_years_ago + timedelta(days=30)).isoformat()}'
+        ),
+    }
+
+    def measure():
+        results = {}
+        for name, url in listings.items():
+            headers = {'X-Patient-ID': str(patient_id)}
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200, response.data
+            count = len(response.json['appointments'])
+            results[name] = (count, timed(lambda: client.get(url, headers=headers), args.repeat))
+        return results
+
+    before = measure()
+
+    archiver = AppointmentArchiver(after_days=args.after_days, batch_size=args.batch_size, pause_seconds=0)
+    with app.app_context():
+        started = time.perf_counter()
+        stats = archiver.run_once()
+        archive_seconds = time.perf_counter() - started
+        live, archived = Appointment.query.count(), ArchivedAppointment.query.count()
+        db.session.remove()
+
+    after = measure()
+
+    print(f'{history} past appointments; archived {stats["archived"]} in {stats["batches"]} batches, '
+          f'{archive_seconds:.1f}s ({stats["archived"] / archive_seconds:.0f} rows/s); '
+          f'{live} live, {archived} archived')
+    print(f'\n{"listing":<28}{"rows":>8}{"before ms":>11}{"rows":>8}{"after ms":>10}')
+    for name in listings:
+        print(f'{name:<28}{before[name][0]:>8}{before[name][1]:>11.2f}{after[name][0]:>8}{after[name][1]:>10.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Availability table size and listing time before and after expiring past slots.
+
+Seeds two weeks of upcoming availability plus --days of past calendars (a
+share of them still held by confirmed appointments), then measures the table
+and index size and the availability listing, both unbounded (the old
+behaviour, every slot since --days ago) and with the today-onward default.
+It then runs the cleaner and measures again. Run from the backend directory:
+    python -m benchmarks.availability_gc --doctors 50 --days 365 --slots-per-day 16
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import create_benchmark_app
+from benchmarks.seed import seed_dataset
+
+BATCH_ROWS = 20000
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def seed_past(app, info, days, slots_per_day, booked_share, seed=11):
+    """Past published slots per doctor and day; booked_share of them held by a confirmed appointment
+
+    Completed appointments free their slot like cancelled ones, so only
+    active statuses keep is_booked set through check_occupancy(repair=True).
+    """
+    from models import db, Appointment, Availability
+    from services.occupancy import check_occupancy
+
+    rng = random.Random(seed)
+    slot_times = [(datetime(2000, 1, 1, 9) + timedelta(minutes=30 * i)).time() for i in range(slots_per_day)]
+    slots, appointments = [], []
+
+    with app.app_context():
+        for offset in range(1, days + 1):
+            day = date.today() - timedelta(days=offset)
+            for doctor_id in info['doctor_ids']:
+                for slot_time in slot_times:
+                    booked = rng.random() < booked_share
+                    slots.append({'doctor_id': doctor_id, 'date': day, 'time': slot_time, 'is_booked': booked})
+                    if booked:
+                        appointments.append({
+                            'patient_id': rng.choice(info['patient_ids']), 'doctor_id': doctor_id,
+                            'appointment_date': day, 'appointment_time': slot_time, 'duration_minutes': 30,
+                            'status': 'confirmed', 'notes': 'history'
+                        })
+            if len(slots) >= BATCH_ROWS:
+                db.session.execute(db.insert(Availability), slots)
+                slots = []
+        for rows, model in ((slots, Availability), (appointments, Appointment)):
+            for index in range(0, len(rows), BATCH_ROWS):
+                db.session.execute(db.insert(model), rows[index:index + BATCH_ROWS])
+        db.session.commit()
+        check_occupancy(repair=True)
+        checkpoint_and_vacuum()
+
+
+def checkpoint_and_vacuum():
+    from models import db
+
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+        db.session.commit()
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('VACUUM')
+
+
+def table_size():
+    """(rows, bytes of availability and its indexes); bytes need SQLite's dbstat"""
+    from models import db, Availability
+
+    rows = db.session.query(Availability.id).count()
+    if db.engine.dialect.name != 'sqlite':
+        return rows, None
+    size = db.session.execute(db.text(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name = 'availability' "
+        "OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'availability')"
+    )).scalar()
+    return rows, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365, help='days of past availability')
+    parser.add_argument('--slots-per-day', type=int, default=16)
+    parser.add_argument('--booked-share', type=float, default=0.3)
+    parser.add_argument('--retention-days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app(args.database_url)
+    info = seed_dataset(app, doctors=args.doctors, patients=500, days=14, slots_per_day=args.slots_per_day, appointments=2000)
+    seed_past(app, info, args.days, args.slots_per_day, args.booked_share)
+
+    from models import db
+    from services.availability_cleanup import AvailabilityCleaner
+    from services.occupancy import check_occupancy
+
+    client = app.test_client()
+    doctor_id = info['doctor_ids'][len(info['doctor_ids']) // 2]
+    oldest = (date.today() - timedelta(days=args.days)).isoformat()
+    listings = {
+        'unbounded (old default)': f'/api/doctor/availability?doctor_id={doctor_id}&start_date={oldest}',
+        'today onward (default)': f'/api/doctor/availability?doctor_id={doctor_id}',
+    }
+
+    def measure():
+        results = {}
+        for name, url in listings.items():
+            response = client.get(url)
+            assert response.status_code == 200, response.data
+            results[name] = (len(response.json), timed(lambda: client.get(url), args.repeat))
+        with app.app_context():
+            results['size'] = table_size()
+            db.session.remove()
+        return results
+
+    before = measure()
+
+    cleaner = AvailabilityCleaner(retention_days=args.retention_days, pause_seconds=0)
+    with app.app_context():
+        started = time.perf_counter()
+        stats = cleaner.run_once()
+        cleanup_seconds = time.perf_counter() - started
+        checkpoint_and_vacuum()
+        check = check_occupancy()
+        db.session.remove()
+
+    after = measure()
+
+    print(f"deleted {stats['deleted']} slots of {stats['doctors']} doctors in {stats['batches']} batches, "
+          f"{cleanup_seconds:.1f}s ({stats['deleted'] / cleanup_seconds:.0f} slots/s); occupancy mismatches: "
+          f"{check['missing'] + check['stale'] + check['orphaned']}")
+    (rows_before, bytes_before), (rows_after, bytes_after) = before.pop('size'), after.pop('size')
+    print(f'availability rows {rows_before} -> {rows_after}', end='')
+    print(f', table + indexes {bytes_before / 2**20:.1f} MB -> {bytes_after / 2**20:.1f} MB' if bytes_before else '')
+    print(f'\n{"listing":<26}{"slots":>8}{"before ms":>11}{"slots":>8}{"after ms":>10}')
+    for name in listings:
+        print(f'{name:<26}{before[name][0]:>8}{before[name][1]:>11.2f}{after[name][0]:>8}{after[name][1]:>10.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Concurrent booking stress test: many clients race for the same doctor slots.
+
+Run from the backend directory:
+    python -m benchmarks.booking_stress --clients 32 --requests 2000 --slots 50
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import BenchmarkServer, create_benchmark_app, http_json
+
+
+def seed(app, slot_count, slot_minutes, patient_count):
+    from models import db, Doctor, Patient, Availability
+    from services.occupancy import refresh_days
+
+    with app.app_context():
+        doctor = Doctor(
+            name='Dr. Stress', email='stress@example.com', password='x',
+            specialization='General', phone='000', experience_years=10,
+            education='MD', consultation_fee=100.0
+        )
+        db.session.add(doctor)
+        db.session.add_all([
+            Patient(
+                name=f'Patient {i}', email=f'patient{i}@example.com', password='x',
+                phone='000', date_of_birth=date(1990, 1, 1), gender='other'
+            )
+            for i in range(patient_count)
+        ])
+        db.session.flush()
+
+        slot_date = date.today() + timedelta(days=1)
+        start = datetime.combine(slot_date, datetime.min.time())
+        slots = [(start + timedelta(minutes=slot_minutes * i)).time() for i in range(slot_count)]
+        db.session.add_all([
+            Availability(doctor_id=doctor.id, date=slot_date, time=slot_time)
+            for slot_time in slots
+        ])
+        refresh_days([(doctor.id, slot_date)])
+        db.session.commit()
+
+        return doctor.id, slot_date, slots
+
+
+def count_double_bookings(app, doctor_id):
+    from models import db, Appointment, Availability
+
+    with app.app_context():
+        duplicates = db.session.query(
+            Appointment.appointment_date, Appointment.appointment_time
+        ).filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.status.in_(Appointment.ACTIVE_STATUSES)
+        ).group_by(
+            Appointment.appointment_date, Appointment.appointment_time
+        ).having(db.func.count(Appointment.id) > 1).count()
+
+        booked_rows = Availability.query.filter_by(doctor_id=doctor_id, is_booked=True).count()
+        appointments = Appointment.query.filter_by(doctor_id=doctor_id).count()
+        return duplicates, booked_rows, appointments
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='concurrent client threads')
+    parser.add_argument('--requests', type=int, default=2000, help='total booking attempts')
+    parser.add_argument('--slots', type=int, default=50, help='number of contested slots')
+    parser.add_argument('--slot-minutes', type=int, default=15, help='slot length and appointment duration')
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+    if args.slots * args.slot_minutes > 24 * 60:
+        parser.error('all slots must fit into a single day')
+
+    app = create_benchmark_app(args.database_url)
+    doctor_id, slot_date, slots = seed(app, args.slots, args.slot_minutes, args.patients)
+
+    payloads = [
+        {
+            'patient_id': (i % args.patients) + 1,
+            'doctor_id': doctor_id,
+            'appointment_date': slot_date.isoformat(),
+            'appointment_time': slots[i % len(slots)].strftime('%H:%M'),
+            'duration_minutes': args.slot_minutes,
+        }
+        for i in range(args.requests)
+    ]
+
+    with BenchmarkServer(app) as server:
+        url = f'{server.base_url}/api/appointments/'
+
+        def book(payload):
+            status, _ = http_json('POST', url, payload)
+            return status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            statuses = Counter(pool.map(book, payloads))
+        elapsed = time.perf_counter() - started
+
+    duplicates, booked_rows, appointments = count_double_bookings(app, doctor_id)
+
+    print(f'requests:          {args.requests} from {args.clients} clients in {elapsed:.2f}s')
+    print(f'throughput:        {args.requests / elapsed:.1f} req/s')
+    print(f'status codes:      {dict(sorted(statuses.items()))}')
+    print(f'appointments:      {appointments} for {len(slots)} slots')
+    print(f'booked slot rows:  {booked_rows}')
+    print(f'double bookings:   {duplicates}')
+
+    ok = duplicates == 0 and statuses.get(201, 0) == appointments == booked_rows <= len(slots)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
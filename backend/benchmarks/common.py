@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from urllib import request as urlrequest, error as urlerror
+
+from werkzeug.serving import make_server
+
+
+def create_benchmark_app(database_url=None):
+    """Create the real Flask app against a throwaway database"""
+    if not database_url:
+        fd, db_path = tempfile.mkstemp(prefix='med_appt_bench_', suffix='.sqlite')
+        os.close(fd)
+        database_url = f'sqlite:///{db_path}'
+
+    # Config reads the environment at import time
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+
+    return create_app()
+
+
+class BenchmarkServer:
+    """Serve an app on an ephemeral port from a background thread"""
+
+    def __init__(self, app):
+        # Per-request access logs would dominate the benchmark output
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+
+
+def http_json(method, url, payload=None, headers=None, timeout=30):
+    """Send a JSON request and return (status, parsed body)"""
+    body = json.dumps(payload).encode() if payload is not None else None
+    req = urlrequest.Request(url, data=body, method=method)
+    req.add_header('Content-Type', 'application/json')
+    for key, value in (headers or {}).items():
+        req.add_header(key, value)
+
+    try:
+        with urlrequest.urlopen(req, timeout=timeout) as response:
+            raw = response.read()
+            status = response.status
+    except urlerror.HTTPError as e:
+        raw = e.read()
+        status = e.code
+
+    try:
+        return status, json.loads(raw) if raw else None
+    except ValueError:
+        return status, raw
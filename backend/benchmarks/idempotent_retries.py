@@ -0,0 +1,140 @@
+"""Booking retries after client timeouts, with and without Idempotency-Key.
+
+Patients book distinct free slots over HTTP with a short client timeout and
+retry a timed-out booking up to --retries times, doubling the timeout each
+time, as a user does when the booking page hangs. Without a key a retry of a
+booking the server already made is answered "slot not available"; with a key
+it is answered from the stored response. Reports what the clients saw, how many appointments exist
+afterwards and the booking latency with and without a key. Run from the
+backend directory:
+    python -m benchmarks.idempotent_retries --threads 8 --bookings 40 --timeout 0.05
+"""
+import argparse
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from urllib import error as urlerror
+
+from benchmarks.common import BenchmarkServer, create_benchmark_app, http_json
+from benchmarks.seed import BENCHMARK_PASSWORD, seed_dataset
+
+
+def free_slots(app):
+    from models import Availability
+
+    with app.app_context():
+        slots = Availability.query.filter_by(is_booked=False).order_by(Availability.id).all()
+        return [(slot.doctor_id, slot.date.isoformat(), slot.time.strftime('%H:%M')) for slot in slots]
+
+
+def login(base_url, email):
+    status, body = http_json('POST', f'{base_url}/api/auth/patient/login', {'email': email, 'password': BENCHMARK_PASSWORD})
+    assert status == 200, body
+    return body['access_token'], body['patient']['id']
+
+
+def book(base_url, token, patient_id, slot, timeout, retries, use_key):
+    """Returns (outcome, seconds) for one booking including its retries"""
+    doctor_id, day, slot_time = slot
+    payload = {'patient_id': patient_id, 'doctor_id': doctor_id, 'appointment_date': day, 'appointment_time': slot_time}
+    headers = {'Authorization': f'Bearer {token}'}
+    if use_key:
+        headers['Idempotency-Key'] = str(uuid.uuid4())
+
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            status, _ = http_json('POST', f'{base_url}/api/appointments/', payload, headers, timeout=timeout * 2 ** attempt)
+        except (socket.timeout, TimeoutError, urlerror.URLError):
+            continue
+        if status == 201:
+            return ('booked' if attempt == 0 else 'booked after retry'), time.perf_counter() - started
+        if status == 409:
+            # Own booking from a timed-out attempt, or a claim still running
+            if use_key:
+                time.sleep(timeout)
+                continue
+            return ('told slot taken' if attempt else 'conflict'), time.perf_counter() - started
+        return f'http {status}', time.perf_counter() - started
+    return 'gave up', time.perf_counter() - started
+
+
+def run(base_url, accounts, slots, args, use_key):
+    outcomes, latencies = {}, []
+    lock = threading.Lock()
+    work = iter(slots)
+
+    def worker(token, patient_id):
+        while True:
+            with lock:
+                slot = next(work, None)
+            if slot is None:
+                return
+            outcome, seconds = book(base_url, token, patient_id, slot, args.timeout, args.retries, use_key)
+            with lock:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                latencies.append(seconds * 1000)
+
+    threads = [threading.Thread(target=worker, args=account) for account in accounts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes, latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--bookings', type=int, default=40, help='bookings per run')
+    parser.add_argument('--timeout', type=float, default=0.05, help='client timeout in seconds')
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app(args.database_url)
+    info = seed_dataset(app, doctors=10, patients=args.threads, days=14, slots_per_day=16, appointments=0)
+    slots = free_slots(app)
+    assert len(slots) >= 3 * args.bookings, 'not enough free slots'
+
+    from models import db, Appointment
+
+    with BenchmarkServer(app) as server:
+        accounts = [login(server.base_url, email) for email in info['patient_emails']]
+        runs = {}
+        for name, use_key, batch in (
+            ('no key', False, slots[:args.bookings]),
+            ('Idempotency-Key', True, slots[args.bookings:2 * args.bookings]),
+        ):
+            with app.app_context():
+                before = Appointment.query.count()
+                db.session.remove()
+            outcomes, _ = run(server.base_url, accounts, batch, args, use_key)
+            with app.app_context():
+                created = Appointment.query.count() - before
+                db.session.remove()
+            runs[name] = (outcomes, created)
+
+        # Latency without timeouts, to show what the key costs
+        relaxed = argparse.Namespace(**{**vars(args), 'timeout': 30, 'retries': 0})
+        remaining = slots[2 * args.bookings:]
+        half = len(remaining) // 2
+        _, plain = run(server.base_url, accounts, remaining[:min(half, args.bookings)], relaxed, False)
+        _, keyed = run(server.base_url, accounts, remaining[half:half + args.bookings], relaxed, True)
+
+    print(f'{args.bookings} bookings per run, {args.threads} clients, {args.timeout * 1000:.0f} ms timeout, '
+          f'doubled on each of up to {args.retries} retries')
+    for name, (outcomes, created) in runs.items():
+        summary = ', '.join(f'{outcome}: {count}' for outcome, count in sorted(outcomes.items()))
+        print(f'{name:<16} {summary}; appointments created: {created}')
+    print(f'\nbooking latency without timeouts, median / p95 ms: '
+          f'no key {statistics.median(plain):.1f} / {statistics.quantiles(plain, n=20)[-1]:.1f}, '
+          f'with key {statistics.median(keyed):.1f} / {statistics.quantiles(keyed, n=20)[-1]:.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""End-to-end load test of the patient booking flow with a regression check.
+
+Each virtual user logs in once, then repeatedly lists doctors, fetches a
+doctor's free slots for a day, books one and cancels it again. Latency
+percentiles and throughput are reported per endpoint.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --users 16 --iterations 25
+    python -m benchmarks.load_test --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load_test --compare benchmarks/baseline.json --tolerance 0.25
+
+--compare exits non-zero when an endpoint's p95 latency grows, or its
+throughput drops, by more than the tolerance, or when its error rate rises.
+Latency and throughput are compared relative to a calibration workload
+timed in the same session, so a baseline recorded on another machine still
+applies; baselines without a calibration are refused.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import BenchmarkServer, create_benchmark_app, http_json
+from benchmarks.seed import BENCHMARK_PASSWORD, seed_dataset
+
+ENDPOINTS = ('login', 'list_doctors', 'available_slots', 'book', 'cancel')
+# A lost race for a slot is expected under load, not an error
+EXPECTED_STATUS = {
+    'login': (200,),
+    'list_doctors': (200, 304),
+    'available_slots': (200,),
+    'book': (201, 409),
+    'cancel': (200,),
+}
+
+
+# Calibration runs before and after the load, this many times each
+CALIBRATION_ROUNDS = 3
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and outcome collection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def call(self, endpoint, method, url, payload=None, headers=None):
+        started = time.perf_counter()
+        status, body = http_json(method, url, payload, headers)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][status] += 1
+            if status not in EXPECTED_STATUS[endpoint]:
+                self.errors[endpoint] += 1
+        return status, body
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed):
+    results = {}
+    for endpoint in ENDPOINTS:
+        values = sorted(recorder.latencies.get(endpoint, []))
+        if not values:
+            continue
+        results[endpoint] = {
+            'requests': len(values),
+            'errors': recorder.errors.get(endpoint, 0),
+            'error_rate': recorder.errors.get(endpoint, 0) / len(values),
+            'throughput_rps': len(values) / elapsed,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'statuses': {str(status): count for status, count in sorted(recorder.statuses[endpoint].items())},
+        }
+    return results
+
+
+def calibration_workload(hash_method):
+    """Fixed single-threaded work shaped like a request: a password hash, SQLite writes and reads, JSON"""
+    generate_password_hash('calibration', method=hash_method)
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE slots (id INTEGER PRIMARY KEY, day TEXT, minute INTEGER)')
+    connection.executemany(
+        'INSERT INTO slots (day, minute) VALUES (?, ?)',
+        ((f'2024-01-{i % 28 + 1:02d}', i % 1440) for i in range(20000))
+    )
+    rows = connection.execute('SELECT day, count(*), max(minute) FROM slots GROUP BY day').fetchall()
+    connection.close()
+    json.dumps([{'id': i, 'rows': rows} for i in range(200)])
+
+
+def calibrate(hash_method, rounds=CALIBRATION_ROUNDS):
+    """Milliseconds of each calibration_workload() run"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        calibration_workload(hash_method)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def machine_info():
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def virtual_user(base_url, recorder, email, dataset, iterations, rng):
+    status, body = recorder.call(
+        'login', 'POST', f'{base_url}/api/auth/patient/login',
+        {'email': email, 'password': BENCHMARK_PASSWORD}
+    )
+    if status != 200:
+        return
+    headers = {'Authorization': f"Bearer {body['access_token']}"}
+    patient_id = body['patient']['id']
+    days = (dataset['end_date'] - dataset['start_date']).days + 1
+
+    for _ in range(iterations):
+        status, doctors = recorder.call('list_doctors', 'GET', f'{base_url}/api/doctors')
+        if status != 200 or not doctors:
+            continue
+        doctor_id = rng.choice(doctors)['id']
+        slot_date = (dataset['start_date'] + timedelta(days=rng.randrange(days))).isoformat()
+
+        status, body = recorder.call(
+            'available_slots', 'GET',
+            f'{base_url}/api/appointments/doctor/{doctor_id}/available-slots?date={slot_date}'
+        )
+        if status != 200 or not body['available_slots']:
+            continue
+
+        status, body = recorder.call('book', 'POST', f'{base_url}/api/appointments/', {
+            'patient_id': patient_id,
+            'doctor_id': doctor_id,
+            'appointment_date': slot_date,
+            'appointment_time': rng.choice(body['available_slots']),
+            'notes': 'load test',
+        })
+        if status != 201:
+            continue
+
+        recorder.call(
+            'cancel', 'DELETE', f"{base_url}/api/appointments/{body['appointment']['id']}",
+            headers=headers
+        )
+
+
+def run(args):
+    app = create_benchmark_app(args.database_url)
+    # Every virtual user logs in from 127.0.0.1; per-IP throttling would reject most of them
+    app.config['LOGIN_RATE_LIMIT_ENABLED'] = False
+    dataset = seed_dataset(
+        app, doctors=args.doctors, patients=max(args.patients, args.users), days=args.days,
+        slots_per_day=args.slots_per_day, appointments=args.appointments, seed=args.seed
+    )
+    print(f"Seeded {len(dataset['doctor_ids'])} doctors, {len(dataset['patient_ids'])} patients, "
+          f"{dataset['availability_rows']} availability rows, {dataset['appointments']} appointments")
+
+    # Slow-request warnings are expected under load and would bury the report
+    logging.getLogger('services.metrics').setLevel(logging.ERROR)
+    hash_method = app.config['PASSWORD_HASH_METHOD']
+    calibration = calibrate(hash_method)
+    recorder = Recorder()
+    with BenchmarkServer(app) as server:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            futures = [
+                pool.submit(
+                    virtual_user, server.base_url, recorder, dataset['patient_emails'][i],
+                    dataset, args.iterations, random.Random(args.seed + i)
+                )
+                for i in range(args.users)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+    calibration += calibrate(hash_method)
+
+    return {
+        'config': {
+            key: getattr(args, key)
+            for key in ('users', 'iterations', 'doctors', 'patients', 'days', 'slots_per_day', 'appointments', 'seed')
+        },
+        'calibration': {
+            'ms': statistics.median(calibration),
+            'hash_method': hash_method,
+            'machine': machine_info(),
+        },
+        'elapsed_seconds': elapsed,
+        'endpoints': summarize(recorder, elapsed),
+    }
+
+
+def print_report(report):
+    print(f"\n{'endpoint':<16}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:<16}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>9.1f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+    print(f"\nwall time: {report['elapsed_seconds']:.2f}s, calibration: {report['calibration']['ms']:.1f}ms")
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regression messages against a saved baseline report
+
+    p95 latency is compared in multiples of each run's calibration time and
+    throughput in requests per calibration time, so a faster or slower
+    machine moves both sides alike.
+    """
+    base_calibration = baseline.get('calibration')
+    if not base_calibration:
+        return ['baseline has no calibration; re-record it with --save-baseline']
+    if base_calibration['hash_method'] != report['calibration']['hash_method']:
+        return [
+            f"baseline was recorded with PASSWORD_HASH_METHOD {base_calibration['hash_method']}, "
+            f"this run uses {report['calibration']['hash_method']}"
+        ]
+    if baseline.get('config') != report['config']:
+        print('warning: baseline was recorded with a different configuration')
+    if base_calibration['machine'] != report['calibration']['machine']:
+        print('note: baseline was recorded on another machine; comparing relative to calibration')
+
+    scale = report['calibration']['ms'] / base_calibration['ms']
+    print(f"calibration {report['calibration']['ms']:.1f}ms vs baseline {base_calibration['ms']:.1f}ms ({scale:.2f}x)")
+
+    regressions = []
+    for endpoint, base in baseline['endpoints'].items():
+        current = report['endpoints'].get(endpoint)
+        if current is None:
+            regressions.append(f'{endpoint}: no requests in this run')
+            continue
+        if current['p95_ms'] > base['p95_ms'] * scale * (1 + tolerance):
+            regressions.append(
+                f"{endpoint}: p95 {current['p95_ms']:.1f}ms vs {base['p95_ms'] * scale:.1f}ms expected "
+                f"from baseline {base['p95_ms']:.1f}ms"
+            )
+        if current['throughput_rps'] < base['throughput_rps'] / scale * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: {current['throughput_rps']:.1f} req/s vs {base['throughput_rps'] / scale:.1f} req/s "
+                f"expected from baseline {base['throughput_rps']:.1f} req/s"
+            )
+        if current['error_rate'] > base['error_rate']:
+            regressions.append(
+                f"{endpoint}: error rate {current['error_rate']:.2%} vs baseline {base['error_rate']:.2%}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--iterations', type=int, default=25, help='booking flows per user')
+    parser.add_argument('--doctors', type=int, default=20)
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--days', type=int, default=14, help='days of published availability')
+    parser.add_argument('--slots-per-day', type=int, default=16)
+    parser.add_argument('--appointments', type=int, default=500, help='pre-booked appointments')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='defaults to a throwaway SQLite file')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write the report as a baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline written to {args.save_baseline}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print('\nREGRESSIONS:')
+            for message in regressions:
+                print(f'  {message}')
+            sys.exit(1)
+        print(f'\nno regressions beyond {args.tolerance:.0%} of baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Booking latency while a login flood hits the auth endpoints.
+
+Booking clients repeatedly fetch a doctor's free slots, book one and cancel
+it. The run has three phases: no flood, a flood with login throttling
+disabled, and the same flood with throttling enabled. Flood threads send
+wrong passwords for known and unknown emails.
+
+Run from the backend directory:
+    python -m benchmarks.login_flood --booking-clients 4 --flood-clients 16 --seconds 10
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from benchmarks.common import BenchmarkServer, create_benchmark_app, http_json
+from benchmarks.load_test import percentile
+from benchmarks.seed import seed_dataset
+
+
+def booking_client(base_url, dataset, stop, latencies, rng):
+    days = (dataset['end_date'] - dataset['start_date']).days + 1
+    while not stop.is_set():
+        doctor_id = rng.choice(dataset['doctor_ids'])
+        slot_date = (dataset['start_date'] + timedelta(days=rng.randrange(days))).isoformat()
+
+        started = time.perf_counter()
+        status, body = http_json(
+            'GET', f'{base_url}/api/appointments/doctor/{doctor_id}/available-slots?date={slot_date}'
+        )
+        if status != 200 or not body['available_slots']:
+            continue
+        status, body = http_json('POST', f'{base_url}/api/appointments/', {
+            'patient_id': rng.choice(dataset['patient_ids']),
+            'doctor_id': doctor_id,
+            'appointment_date': slot_date,
+            'appointment_time': rng.choice(body['available_slots']),
+        })
+        if status == 201:
+            http_json('PUT', f"{base_url}/api/appointments/{body['appointment']['id']}/status", {'status': 'cancelled'})
+        latencies.append(time.perf_counter() - started)
+
+
+def flood_client(base_url, dataset, stop, statuses, rng):
+    while not stop.is_set():
+        email = rng.choice(dataset['patient_emails']) if rng.random() < 0.5 else f'nobody{rng.randrange(10 ** 6)}@bench.test'
+        status, _ = http_json('POST', f'{base_url}/api/auth/patient/login', {'email': email, 'password': 'wrong'})
+        statuses[status] += 1
+
+
+def run_phase(base_url, dataset, args, flood):
+    stop = threading.Event()
+    latencies = []
+    statuses = Counter()
+    threads = [
+        threading.Thread(target=booking_client, args=(base_url, dataset, stop, latencies, random.Random(i)))
+        for i in range(args.booking_clients)
+    ]
+    if flood:
+        threads += [
+            threading.Thread(target=flood_client, args=(base_url, dataset, stop, statuses, random.Random(1000 + i)))
+            for i in range(args.flood_clients)
+        ]
+
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        'flows': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'logins': sum(statuses.values()),
+        'login_statuses': dict(sorted(statuses.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--booking-clients', type=int, default=4)
+    parser.add_argument('--flood-clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10, help='duration of each phase')
+    parser.add_argument('--database-url', help='defaults to a throwaway SQLite file')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(args.database_url)
+    dataset = seed_dataset(app, doctors=10, patients=100, days=14, slots_per_day=16, appointments=200)
+    logging.getLogger('services.metrics').setLevel(logging.ERROR)
+
+    phases = (
+        ('no flood', False, True),
+        ('flood, unthrottled', True, False),
+        ('flood, throttled', True, True),
+    )
+    results = []
+    with BenchmarkServer(app) as server:
+        for name, flood, throttled in phases:
+            app.config['LOGIN_RATE_LIMIT_ENABLED'] = throttled
+            results.append((name, run_phase(server.base_url, dataset, args, flood)))
+
+    print(f"\n{'phase':<20}{'flows':>7}{'p50 ms':>9}{'p95 ms':>9}{'logins':>8}  login statuses")
+    for name, result in results:
+        print(f"{name:<20}{result['flows']:>7}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['logins']:>8}  {result['login_statuses']}")
+
+
+if __name__ == '__main__':
+    main()
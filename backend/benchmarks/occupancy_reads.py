@@ -0,0 +1,94 @@
+"""Calendar reads from the occupancy table versus recomputing from source rows.
+
+Seeds a month of densely booked availability, then times "which days have a
+free slot this month" and "is this slot free" both ways, plus a full
+consistency check. Run from the backend directory:
+    python -m benchmarks.occupancy_reads --doctors 50 --days 31 --slots-per-day 32
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.common import create_benchmark_app
+from benchmarks.seed import seed_dataset
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--days', type=int, default=31)
+    parser.add_argument('--slots-per-day', type=int, default=32)
+    parser.add_argument('--fill', type=float, default=0.8, help='share of slots that are booked')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app(args.database_url)
+    slots = args.doctors * args.days * args.slots_per_day
+    info = seed_dataset(
+        app, doctors=args.doctors, patients=500, days=args.days, slots_per_day=args.slots_per_day,
+        appointments=int(slots * args.fill), slot_minutes=15, first_hour=8
+    )
+
+    from models import db
+    from services.availability_engine import default_windows, free_days, free_mask, is_bookable
+    from services.occupancy import check_occupancy, interval_mask, intervals_mask, load_day, mask_intervals, source_days
+
+    doctor_id = info['doctor_ids'][len(info['doctor_ids']) // 2]
+    start_date, end_date = info['start_date'], info['start_date'] + timedelta(days=30)
+    probe_day = start_date + timedelta(days=args.days // 2)
+    probe = (10 * 60, 10 * 60 + 15)
+
+    def month_from_source():
+        days = source_days([doctor_id], start_date, end_date)
+        defaults = intervals_mask(default_windows())
+        free = []
+        day = start_date
+        while day <= end_date:
+            published, busy = days.get((doctor_id, day), (None, 0))
+            if any(end - start >= 30 for start, end in mask_intervals(free_mask(published, busy, day, defaults=defaults))):
+                free.append(day)
+            day += timedelta(days=1)
+        return free
+
+    def slot_from_source():
+        published, busy = source_days([doctor_id], probe_day, probe_day).get((doctor_id, probe_day), (None, 0))
+        wanted = interval_mask(*probe)
+        return free_mask(published, busy, probe_day) & wanted == wanted
+
+    with app.app_context():
+        assert free_days(doctor_id, start_date, end_date, 30) == month_from_source()
+        assert is_bookable(load_day(doctor_id, probe_day), probe_day, *probe) == slot_from_source()
+
+        results = {
+            'free days, occupancy': timed(lambda: free_days(doctor_id, start_date, end_date, 30), args.repeat),
+            'free days, source rows': timed(month_from_source, args.repeat),
+            'slot check, occupancy': timed(lambda: is_bookable(load_day(doctor_id, probe_day), probe_day, *probe), args.repeat),
+            'slot check, source rows': timed(slot_from_source, args.repeat),
+        }
+        started = time.perf_counter()
+        stats = check_occupancy()
+        check_seconds = time.perf_counter() - started
+        db.session.remove()
+
+    print(f"{info['availability_rows']} availability rows, {info['appointments']} appointments")
+    for name, milliseconds in results.items():
+        print(f'{name:<26}{milliseconds:8.2f} ms')
+    print(f"consistency check: {stats['days']} days in {check_seconds:.2f}s, "
+          f"{stats['missing'] + stats['stale'] + stats['orphaned']} mismatches")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Reminder dispatch throughput over a day's worth of appointments.
+
+Run from the backend directory:
+    python -m benchmarks.reminder_throughput --appointments 100000 --send-latency-ms 2
+"""
+import argparse
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import create_benchmark_app
+
+
+def seed(app, appointment_count, doctor_count, start):
+    from models import db, Appointment, Doctor, Patient
+
+    with app.app_context():
+        db.session.execute(db.insert(Doctor), [
+            {
+                'name': f'Dr. {i}', 'email': f'doctor{i}@example.com', 'password': 'x',
+                'specialization': 'General', 'phone': '000', 'experience_years': 5,
+                'education': 'MD', 'consultation_fee': 100.0
+            }
+            for i in range(doctor_count)
+        ])
+        db.session.execute(db.insert(Patient), [
+            {
+                'name': f'Patient {i}', 'email': f'patient{i}@example.com', 'password': 'x',
+                'phone': '000', 'date_of_birth': date(1990, 1, 1), 'gender': 'other'
+            }
+            for i in range(1000)
+        ])
+
+        # Spread appointments evenly over the next 24 hours, one per doctor slot
+        spacing = (24 * 60 * 60) / (appointment_count / doctor_count)
+        rows = []
+        for i in range(appointment_count):
+            at = start + timedelta(seconds=spacing * (i // doctor_count))
+            rows.append({
+                'patient_id': (i % 1000) + 1, 'doctor_id': (i % doctor_count) + 1,
+                'appointment_date': at.date(), 'appointment_time': at.time().replace(microsecond=0),
+                'duration_minutes': 30, 'status': 'scheduled'
+            })
+        db.session.execute(db.insert(Appointment), rows)
+        db.session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--appointments', type=int, default=100000)
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--send-latency-ms', type=float, default=2.0, help='simulated cost per send')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    from services.reminder_scheduler import ReminderScheduler
+
+    app = create_benchmark_app(args.database_url)
+    now = datetime.now().replace(microsecond=0)
+    started = time.perf_counter()
+    seed(app, args.appointments, args.doctors, now + timedelta(minutes=1))
+    print(f'seeded {args.appointments} appointments in {time.perf_counter() - started:.1f}s')
+
+    sent = []
+    lock = threading.Lock()
+
+    def send(*reminder):
+        time.sleep(args.send_latency_ms / 1000)
+        with lock:
+            sent.append(reminder[0])
+        return True
+
+    scheduler = ReminderScheduler(
+        lead_time=timedelta(hours=24, minutes=2), batch_size=args.batch_size,
+        workers=args.workers, send=send
+    )
+
+    with app.app_context():
+        started = time.perf_counter()
+        stats = scheduler.run_once(now)
+        elapsed = time.perf_counter() - started
+
+        # A second pass must find nothing left to send
+        started = time.perf_counter()
+        repeat = scheduler.run_once(now)
+        rescan = time.perf_counter() - started
+
+    print(f'first pass:   {stats} in {elapsed:.2f}s ({stats["sent"] / elapsed:.0f} reminders/s)')
+    print(f'second pass:  {repeat} in {rescan * 1000:.1f}ms')
+    print(f'sends:        {len(sent)}')
+
+    return 0 if stats['sent'] == args.appointments and repeat['claimed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
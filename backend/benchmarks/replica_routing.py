@@ -0,0 +1,202 @@
+"""Booking latency next to dashboard reads, with and without a read replica.
+
+Seeds one SQLite database, then serves the app twice: once with every query
+on the primary and once with DATABASE_REPLICA_URLS pointing at a copy that
+a background thread refreshes from the primary every --lag seconds (the
+sqlite3 backup API stands in for replication). In both runs reader threads
+page through doctor appointment lists, availability and slot searches while
+writer threads book and cancel, and each writer reads its own appointment
+list right after booking to check read-your-writes.
+
+Run from the backend directory:
+    python -m benchmarks.replica_routing --readers 16 --writers 4 --duration 15
+"""
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from benchmarks.common import create_benchmark_app, http_json
+from benchmarks.load_test import percentile
+from benchmarks.seed import BENCHMARK_PASSWORD, seed_dataset
+from benchmarks.serving_modes import BACKEND_DIR, free_port, server_command, wait_until_ready
+
+ENDPOINTS = ('doctor_appointments', 'availability', 'available_slots', 'book', 'cancel', 'own_appointments')
+
+
+def copy_database(source_path, target_path):
+    source, target = sqlite3.connect(source_path), sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def replicate(source_path, target_path, lag, stop):
+    while not stop.wait(lag):
+        copy_database(source_path, target_path)
+
+
+def drive(base_url, info, args):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    stale = {'reads': 0, 'misses': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    days = (info['end_date'] - info['start_date']).days + 1
+    window = (info['start_date'].isoformat(), (info['start_date'] + timedelta(days=6)).isoformat())
+
+    def call(endpoint, method, path, payload=None, headers=None, expected=(200,)):
+        started = time.perf_counter()
+        try:
+            status, body = http_json(method, base_url + path, payload, headers)
+        except OSError:
+            status, body = None, None
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            if status in expected:
+                latencies[endpoint].append(elapsed)
+            else:
+                errors[endpoint] += 1
+        return status, body
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            doctor_id = rng.choice(info['doctor_ids'])
+            choice = rng.random()
+            if choice < 0.4:
+                call('doctor_appointments', 'GET', f'/api/appointments/doctor?doctor_id={doctor_id}&limit=50')
+            elif choice < 0.7:
+                call('availability', 'GET', f'/api/doctor/availability?doctor_id={doctor_id}&limit=100')
+            else:
+                doctor_ids = ','.join(str(value) for value in rng.sample(info['doctor_ids'], 5))
+                call('available_slots', 'GET',
+                     f'/api/appointments/available-slots?start_date={window[0]}&end_date={window[1]}&doctor_ids={doctor_ids}')
+
+    def writer(index):
+        rng = random.Random(1000 + index)
+        status, body = http_json('POST', f'{base_url}/api/auth/patient/login', {
+            'email': info['patient_emails'][index], 'password': BENCHMARK_PASSWORD
+        })
+        if status != 200:
+            with lock:
+                errors['book'] += 1
+            return
+        patient_id = body['patient']['id']
+        headers = {'Authorization': f"Bearer {body['access_token']}", 'X-Patient-ID': str(patient_id)}
+
+        while time.monotonic() < deadline:
+            doctor_id = rng.choice(info['doctor_ids'])
+            slot_date = info['start_date'] + timedelta(days=rng.randrange(days))
+            status, body = http_json(
+                'GET', f'{base_url}/api/appointments/doctor/{doctor_id}/available-slots?date={slot_date}', headers=headers
+            )
+            if status != 200 or not body['available_slots']:
+                continue
+
+            status, body = call('book', 'POST', '/api/appointments/', {
+                'patient_id': patient_id, 'doctor_id': doctor_id, 'appointment_date': slot_date.isoformat(),
+                'appointment_time': rng.choice(body['available_slots']), 'notes': 'replica benchmark',
+            }, headers, expected=(201, 409))
+            if status != 201:
+                continue
+            appointment_id = body['appointment']['id']
+
+            status, body = call('own_appointments', 'GET', '/api/patients/appointments?limit=100', headers=headers)
+            if status == 200:
+                with lock:
+                    stale['reads'] += 1
+                    if all(item['id'] != appointment_id for item in body['appointments']):
+                        stale['misses'] += 1
+
+            call('cancel', 'DELETE', f'/api/appointments/{appointment_id}', headers=headers)
+
+    threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(index,)) for index in range(args.writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, stale, time.perf_counter() - started
+
+
+def run_mode(primary_path, replica_path, info, args):
+    port = free_port()
+    env = dict(
+        os.environ, DATABASE_URL=f'sqlite:///{primary_path}', DATABASE_REPLICA_URLS='',
+        SLOW_REQUEST_SECONDS='3600', LOGIN_RATE_LIMIT_ENABLED='false'
+    )
+    stop = threading.Event()
+    replicator = None
+    if replica_path:
+        copy_database(primary_path, replica_path)
+        env['DATABASE_REPLICA_URLS'] = f'sqlite:///{replica_path}'
+        env['REPLICA_MAX_LAG_SECONDS'] = str(args.lag * 2)
+        replicator = threading.Thread(target=replicate, args=(primary_path, replica_path, args.lag, stop), daemon=True)
+        replicator.start()
+
+    process = subprocess.Popen(
+        server_command('werkzeug', port, 1), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        wait_until_ready(base_url, process)
+        return drive(base_url, info, args)
+    finally:
+        stop.set()
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if replicator is not None:
+            replicator.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=16, help='dashboard reader threads')
+    parser.add_argument('--writers', type=int, default=4, help='booking threads, one patient each')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds of load per run')
+    parser.add_argument('--lag', type=float, default=1.0, help='seconds between replica refreshes')
+    parser.add_argument('--doctors', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app()
+    primary_path = app.config['SQLALCHEMY_DATABASE_URI'].split('sqlite:///', 1)[1]
+    info = seed_dataset(
+        app, doctors=args.doctors, patients=max(200, args.writers), days=14, slots_per_day=16, appointments=4000
+    )
+    replica_path = primary_path.replace('.sqlite', '_replica.sqlite')
+
+    print(f'{"mode":<9}{"endpoint":<21}{"requests":>9}{"errors":>7}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+    try:
+        for name, path in (('primary', None), ('replica', replica_path)):
+            latencies, errors, stale, elapsed = run_mode(primary_path, path, info, args)
+            for endpoint in ENDPOINTS:
+                values = sorted(latencies[endpoint])
+                print(
+                    f'{name:<9}{endpoint:<21}{len(values):>9}{errors[endpoint]:>7}{len(values) / elapsed:>8.1f}'
+                    f'{percentile(values, 0.50):>9.1f}{percentile(values, 0.95):>9.1f}{percentile(values, 0.99):>9.1f}'
+                )
+            print(f"{name:<9}read-your-writes misses: {stale['misses']} of {stale['reads']}")
+    finally:
+        for path in (primary_path, replica_path):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
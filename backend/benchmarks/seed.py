@@ -0,0 +1,84 @@
+"""Synthetic dataset generator built on the application models."""
+import random
+from datetime import date, datetime, time, timedelta
+
+from werkzeug.security import generate_password_hash
+
+SPECIALIZATIONS = ('Cardiology', 'Dermatology', 'General', 'Neurology', 'Pediatrics', 'Orthopedics')
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def seed_dataset(app, doctors=20, patients=200, days=14, slots_per_day=16, appointments=500,
+                 slot_minutes=30, first_hour=9, seed=42):
+    """Insert doctors, patients, published availability and booked appointments
+
+    Returns a summary dict with the ids and date range that load generators need.
+    """
+    from models import db, Appointment, Availability, Doctor, Patient
+    from services.occupancy import check_occupancy
+
+    rng = random.Random(seed)
+    # Hashing once keeps seeding fast; every user shares the benchmark password
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+    start_date = date.today() + timedelta(days=1)
+    slot_times = [
+        (datetime.combine(start_date, time(first_hour)) + timedelta(minutes=slot_minutes * i)).time()
+        for i in range(slots_per_day)
+    ]
+
+    with app.app_context():
+        db.session.execute(db.insert(Doctor), [
+            {
+                'name': f'Dr. Bench {i}', 'email': f'doctor{i}@bench.test', 'password': password_hash,
+                'specialization': SPECIALIZATIONS[i % len(SPECIALIZATIONS)], 'phone': '555-0100',
+                'experience_years': rng.randint(1, 30), 'education': 'MD',
+                'consultation_fee': float(rng.randrange(50, 300, 10))
+            }
+            for i in range(doctors)
+        ])
+        db.session.execute(db.insert(Patient), [
+            {
+                'name': f'Patient Bench {i}', 'email': f'patient{i}@bench.test', 'password': password_hash,
+                'phone': '555-0200', 'date_of_birth': date(1960 + i % 40, 1 + i % 12, 1 + i % 28),
+                'gender': ('male', 'female', 'other')[i % 3]
+            }
+            for i in range(patients)
+        ])
+        doctor_ids = [row[0] for row in db.session.query(Doctor.id).order_by(Doctor.id)]
+        patient_ids = [row[0] for row in db.session.query(Patient.id).order_by(Patient.id)]
+
+        slots = [
+            (doctor_id, start_date + timedelta(days=day), slot_time)
+            for doctor_id in doctor_ids
+            for day in range(days)
+            for slot_time in slot_times
+        ]
+        booked = set(rng.sample(range(len(slots)), min(appointments, len(slots))))
+
+        db.session.execute(db.insert(Availability), [
+            {'doctor_id': doctor_id, 'date': slot_date, 'time': slot_time, 'is_booked': index in booked}
+            for index, (doctor_id, slot_date, slot_time) in enumerate(slots)
+        ])
+        if booked:
+            db.session.execute(db.insert(Appointment), [
+                {
+                    'patient_id': rng.choice(patient_ids), 'doctor_id': slots[index][0],
+                    'appointment_date': slots[index][1], 'appointment_time': slots[index][2],
+                    'duration_minutes': slot_minutes, 'status': 'scheduled', 'notes': 'seeded'
+                }
+                for index in sorted(booked)
+            ])
+        db.session.commit()
+
+        # Bulk inserts bypass the write paths that maintain occupancy
+        check_occupancy(repair=True)
+
+    return {
+        'doctor_ids': doctor_ids,
+        'patient_ids': patient_ids,
+        'patient_emails': [f'patient{i}@bench.test' for i in range(patients)],
+        'start_date': start_date,
+        'end_date': start_date + timedelta(days=days - 1),
+        'availability_rows': len(slots),
+        'appointments': len(booked),
+    }
@@ -0,0 +1,156 @@
+"""Throughput and tail latency of the read endpoints under each serving mode.
+
+Seeds one database, then starts the app under each server in turn and drives
+concurrent clients against /api/doctors and /api/appointments/available-slots:
+  werkzeug  threaded development server (app.run without the debugger)
+  gunicorn  gunicorn.conf.py profile, gthread workers
+  uvicorn   asgi.py under uvicorn workers
+Run from the backend directory:
+    python -m benchmarks.serving_modes --clients 32 --duration 15 --workers 3
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from benchmarks.common import create_benchmark_app, http_json
+from benchmarks.load_test import percentile
+from benchmarks.seed import seed_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ('list_doctors', 'available_slots')
+
+
+def server_command(mode, port, workers):
+    if mode == 'werkzeug':
+        return [sys.executable, '-c', (
+            'import logging; logging.getLogger("werkzeug").setLevel(logging.WARNING); '
+            f'from app import create_app; create_app().run(host="127.0.0.1", port={port}, threaded=True)'
+        )]
+    if mode == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'wsgi:app']
+    if mode == 'uvicorn':
+        return [
+            sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--no-access-log', '--log-level', 'warning'
+        ]
+    raise ValueError(f'Unknown mode {mode}')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with status {process.returncode}')
+        try:
+            if http_json('GET', f'{base_url}/api/doctors', timeout=2)[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('server did not become ready')
+
+
+def drive(base_url, info, clients, duration):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    window = (info['start_date'].isoformat(), (info['start_date'] + timedelta(days=6)).isoformat())
+
+    def client(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            if rng.random() < 0.5:
+                endpoint, path = 'list_doctors', '/api/doctors'
+            else:
+                doctor_ids = ','.join(str(doctor_id) for doctor_id in rng.sample(info['doctor_ids'], 5))
+                endpoint = 'available_slots'
+                path = f'/api/appointments/available-slots?start_date={window[0]}&end_date={window[1]}&doctor_ids={doctor_ids}'
+
+            started = time.perf_counter()
+            try:
+                status, _ = http_json('GET', base_url + path)
+            except OSError:
+                status = None
+            elapsed = (time.perf_counter() - started) * 1000
+
+            with lock:
+                if status == 200:
+                    latencies[endpoint].append(elapsed)
+                else:
+                    errors[endpoint] += 1
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_mode(mode, database_url, info, args):
+    port = free_port()
+    env = dict(
+        os.environ, DATABASE_URL=database_url, SERVER_WORKERS=str(args.workers),
+        SERVER_THREADS=str(args.threads), SLOW_REQUEST_SECONDS='3600'
+    )
+    process = subprocess.Popen(
+        server_command(mode, port, args.workers), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        wait_until_ready(base_url, process)
+        drive(base_url, info, args.clients, min(args.duration, 3))  # warm caches and pools
+        return drive(base_url, info, args.clients, args.duration)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='werkzeug,gunicorn,uvicorn', help='comma-separated serving modes')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent client threads')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds of load per mode')
+    parser.add_argument('--workers', type=int, default=3, help='processes for gunicorn and uvicorn')
+    parser.add_argument('--threads', type=int, default=8, help='request threads per process')
+    parser.add_argument('--doctors', type=int, default=100)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    args = parser.parse_args(argv)
+
+    app = create_benchmark_app(args.database_url)
+    database_url = str(app.config['SQLALCHEMY_DATABASE_URI'])
+    info = seed_dataset(app, doctors=args.doctors, patients=200, days=14, slots_per_day=16, appointments=2000)
+
+    print(f'{"mode":<10}{"endpoint":<17}{"requests":>9}{"errors":>7}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+    for mode in args.modes.split(','):
+        latencies, errors, elapsed = run_mode(mode.strip(), database_url, info, args)
+        for endpoint in ENDPOINTS:
+            values = sorted(latencies[endpoint])
+            print(
+                f'{mode:<10}{endpoint:<17}{len(values):>9}{errors[endpoint]:>7}{len(values) / elapsed:>8.1f}'
+                f'{percentile(values, 0.50):>9.1f}{percentile(values, 0.95):>9.1f}{percentile(values, 0.99):>9.1f}'
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
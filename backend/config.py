@@ -6,11 +6,83 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///database.sqlite'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool (file-backed SQLite and server databases); entries in
+    # SQLALCHEMY_ENGINE_OPTIONS override the derived engine options
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    
+    # SQLite pragmas applied to every connection; an empty value keeps the
+    # SQLite default
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 10000)
+    
+    # Read replicas (comma-separated URLs): plain reads of GET requests go to
+    # one of them; writes and the writer's own reads for REPLICA_MAX_LAG_SECONDS
+    # afterwards stay on the primary, and cache entries filled from a replica
+    # live at most that long
+    DATABASE_REPLICA_URLS = [url.strip() for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS') or 5)
+    
+    # Create and upgrade the schema in create_app(); multi-process servers
+    # turn this off and run setup_database() once before starting workers
+    DB_SETUP_ON_START = os.environ.get('DB_SETUP_ON_START', 'true').lower() in ['true', 'on', '1']
+    
+    # Production serving (gunicorn.conf.py, asgi.py): worker processes and
+    # request threads per process (event streams get EVENT_MAX_STREAMS more);
+    # keep DB_POOL_SIZE + DB_MAX_OVERFLOW at or above SERVER_THREADS
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS') or (os.cpu_count() or 1) * 2 + 1)
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS') or 8)
+    
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Password hashing (werkzeug method string, e.g. pbkdf2:sha256:600000 or
+    # scrypt:32768:8:1); stored hashes are upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    
+    # Login throttling: token buckets per client IP and per account email
+    LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', 'true').lower() in ['true', 'on', '1']
+    LOGIN_IP_PER_MINUTE = float(os.environ.get('LOGIN_IP_PER_MINUTE') or 10)
+    LOGIN_IP_BURST = int(os.environ.get('LOGIN_IP_BURST') or 10)
+    LOGIN_ACCOUNT_PER_MINUTE = float(os.environ.get('LOGIN_ACCOUNT_PER_MINUTE') or 5)
+    LOGIN_ACCOUNT_BURST = int(os.environ.get('LOGIN_ACCOUNT_BURST') or 5)
+    
+    # Seconds a resolved user profile is reused by authenticated requests;
+    # profile updates in this process invalidate it immediately
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL') or 60)
+    
+    # Scheduling: slot length in minutes and working hours used when a doctor
+    # has not published availability for a day
+    SLOT_MINUTES = int(os.environ.get('SLOT_MINUTES') or 30)
+    DEFAULT_WORKING_HOURS = (9, 17)
+    
+    # Event streams poll the appointment change feed this often for changes
+    # made by other worker processes; 0 relies on in-process events only
+    EVENT_POLL_SECONDS = float(os.environ.get('EVENT_POLL_SECONDS') or 5)
+    # Lifetime of the query-string token an event stream connects with
+    EVENT_TOKEN_SECONDS = int(os.environ.get('EVENT_TOKEN_SECONDS') or 60)
+    # Open event streams per process, and how long one stream lives before
+    # the client reconnects with Last-Event-ID. Each stream holds a thread of
+    # its own: the servers run SERVER_THREADS + EVENT_MAX_STREAMS threads per
+    # process, and clients past the cap get 503 and poll /api/appointments/changes
+    EVENT_MAX_STREAMS = int(os.environ.get('EVENT_MAX_STREAMS') or 32)
+    EVENT_STREAM_MAX_SECONDS = int(os.environ.get('EVENT_STREAM_MAX_SECONDS') or 300)
+    
+    # Seconds a cached doctor directory may be served before it is rebuilt;
+    # writes in this process invalidate it immediately
+    DOCTOR_CACHE_TTL = int(os.environ.get('DOCTOR_CACHE_TTL') or 300)
+    
+    # Requests slower than this are logged with their slowest SQL statements
+    SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS') or 1.0)
+    SLOW_REQUEST_LOG_STATEMENTS = 5
+    
     # CORS Configuration
     CORS_ORIGINS = ["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:3000", "http://127.0.0.1:5173"]
     
@@ -21,3 +93,48 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     DEFAULT_MAIL_SENDER = os.environ.get('DEFAULT_MAIL_SENDER') or 'noreply@medcenter.com'
+    
+    # Background delivery: one pooled SMTP session, batched sends, bounded queue
+    MAIL_ASYNC = os.environ.get('MAIL_ASYNC', 'true').lower() in ['true', 'on', '1']
+    MAIL_QUEUE_SIZE = int(os.environ.get('MAIL_QUEUE_SIZE') or 1000)
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE') or 20)
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES') or 3)
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF') or 1.0)
+    
+    # History archival: appointments dated more than ARCHIVE_AFTER_DAYS ago move
+    # to appointments_archive in batches of ARCHIVE_BATCH_SIZE, every
+    # ARCHIVE_INTERVAL_SECONDS; listings read the archive only for date ranges
+    # that reach it
+    ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', 'false').lower() in ['true', 'on', '1']
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 365)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 1000)
+    ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('ARCHIVE_INTERVAL_SECONDS') or 3600)
+    ARCHIVE_BATCH_PAUSE_SECONDS = float(os.environ.get('ARCHIVE_BATCH_PAUSE_SECONDS') or 0.05)
+    
+    # Background jobs run in every worker process, but each run first claims
+    # the job's job_leases row; a claim not renewed for JOB_LEASE_SECONDS
+    # (a process that died mid-run) can be taken over
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS') or 300)
+    
+    # Expired availability: unbooked slots dated more than
+    # AVAILABILITY_RETENTION_DAYS ago are deleted in batches of
+    # AVAILABILITY_CLEANUP_BATCH_SIZE, every AVAILABILITY_CLEANUP_INTERVAL_SECONDS
+    AVAILABILITY_CLEANUP_ENABLED = os.environ.get('AVAILABILITY_CLEANUP_ENABLED', 'false').lower() in ['true', 'on', '1']
+    AVAILABILITY_RETENTION_DAYS = int(os.environ.get('AVAILABILITY_RETENTION_DAYS') or 30)
+    AVAILABILITY_CLEANUP_BATCH_SIZE = int(os.environ.get('AVAILABILITY_CLEANUP_BATCH_SIZE') or 500)
+    AVAILABILITY_CLEANUP_INTERVAL_SECONDS = int(os.environ.get('AVAILABILITY_CLEANUP_INTERVAL_SECONDS') or 3600)
+    AVAILABILITY_CLEANUP_PAUSE_SECONDS = float(os.environ.get('AVAILABILITY_CLEANUP_PAUSE_SECONDS') or 0.05)
+    
+    # Idempotency-Key support on booking, cancel and status writes: responses
+    # are replayed for IDEMPOTENCY_TTL_SECONDS; a claim whose request never
+    # finished can be taken over after IDEMPOTENCY_LOCK_SECONDS
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 86400)
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS') or 60)
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS = int(os.environ.get('IDEMPOTENCY_PURGE_INTERVAL_SECONDS') or 300)
+    
+    # Appointment reminders, sent REMINDER_LEAD_HOURS before the appointment
+    REMINDERS_ENABLED = os.environ.get('REMINDERS_ENABLED', 'false').lower() in ['true', 'on', '1']
+    REMINDER_LEAD_HOURS = int(os.environ.get('REMINDER_LEAD_HOURS') or 24)
+    REMINDER_INTERVAL_SECONDS = int(os.environ.get('REMINDER_INTERVAL_SECONDS') or 60)
+    REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE') or 500)
+    REMINDER_WORKERS = int(os.environ.get('REMINDER_WORKERS') or 8)
@@ -0,0 +1,45 @@
+"""Production WSGI profile: gunicorn -c gunicorn.conf.py wsgi:app
+
+Threaded workers (gthread): each of SERVER_WORKERS processes serves
+SERVER_THREADS requests at once, so a request waiting on a database lock
+blocks one thread instead of a whole process. An event stream holds its
+thread for as long as it is open, so each process gets EVENT_MAX_STREAMS
+extra threads and the stream route refuses streams beyond that; open
+dashboards can then never take the threads requests need. The app is not preloaded
+because create_app() starts background threads (email delivery, reminders)
+that would not survive the fork; the schema is set up once in the master.
+"""
+import os
+
+from config import Config
+
+bind = os.environ.get('SERVER_BIND', '0.0.0.0:5000')
+workers = Config.SERVER_WORKERS
+worker_class = 'gthread'
+threads = Config.SERVER_THREADS + Config.EVENT_MAX_STREAMS
+
+# gthread workers heartbeat from their main loop, so long requests and event
+# streams do not trip the timeout; it only catches hung processes
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound the growth of in-process caches
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = os.environ.get('SERVER_ACCESS_LOG') or None
+
+
+def on_starting(server):
+    # Workers would otherwise race to create the schema on a fresh database
+    from app import setup_database
+    from models import db
+
+    app = setup_database()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+    # Workers are forked from this process and inherit the class attribute
+    Config.DB_SETUP_ON_START = False
@@ -1,12 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
 
-# Create shared database instance
-db = SQLAlchemy()
+from .routing import RoutingSession
+
+# Create shared database instance; reads of GET requests may go to a replica
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Import all models to ensure they're registered
 from .patient import Patient
 from .doctor import Doctor
 from .appointment import Appointment
 from .availability import Availability
+from .occupancy import DoctorDayOccupancy
+from .archive import ArchivedAppointment
+from .idempotency import IdempotencyRecord
+from .job_lease import JobLease
 
-__all__ = ['db', 'Patient', 'Doctor', 'Appointment', 'Availability']
+__all__ = ['db', 'Patient', 'Doctor', 'Appointment', 'Availability', 'DoctorDayOccupancy', 'ArchivedAppointment', 'IdempotencyRecord', 'JobLease']
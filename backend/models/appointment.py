@@ -4,6 +4,16 @@ from datetime import datetime
 class Appointment(db.Model):
     __tablename__ = 'appointments'
     
+    # Statuses that keep a doctor's slot occupied
+    ACTIVE_STATUSES = ('scheduled', 'confirmed')
+    
+    # Allowed status changes; statuses without an entry are final
+    STATUS_TRANSITIONS = {
+        'scheduled': ('confirmed', 'rejected', 'cancelled'),
+        'confirmed': ('completed', 'cancelled'),
+    }
+    STATUSES = ('scheduled', 'confirmed', 'rejected', 'cancelled', 'completed')
+    
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
@@ -12,24 +22,63 @@ class Appointment(db.Model):
     duration_minutes = db.Column(db.Integer, default=30)
     status = db.Column(db.String(20), default='scheduled')  # scheduled, completed, cancelled, no_show
     notes = db.Column(db.Text)
+    reminder_sent_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'patient_id': self.patient_id,
-            'doctor_id': self.doctor_id,
-            'appointment_date': self.appointment_date.isoformat() if self.appointment_date else None,
-            'appointment_time': self.appointment_time.strftime('%H:%M') if self.appointment_time else None,
-            'duration_minutes': self.duration_minutes,
-            'status': self.status,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'patient': self.patient.to_dict() if self.patient else None,
-            'doctor': self.doctor.to_dict() if self.doctor else None
+    __table_args__ = (
+        # Slot conflict checks and doctor schedules
+        db.Index('ix_appointments_doctor_slot', 'doctor_id', 'appointment_date', 'appointment_time', 'status'),
+        # Patient appointment listings
+        db.Index('ix_appointments_patient_date', 'patient_id', 'appointment_date'),
+        # Archival sweeps of the oldest appointments
+        db.Index('ix_appointments_date', 'appointment_date', 'id'),
+        # Change feeds for reconnecting dashboards (?since=)
+        db.Index('ix_appointments_doctor_updated', 'doctor_id', 'updated_at'),
+        db.Index('ix_appointments_patient_updated', 'patient_id', 'updated_at'),
+        # Reminder dispatch: only appointments still waiting for a reminder
+        db.Index(
+            'ix_appointments_reminder_due', 'appointment_date', 'appointment_time',
+            sqlite_where=db.text('reminder_sent_at IS NULL'),
+            postgresql_where=db.text('reminder_sent_at IS NULL')
+        ),
+        # At most one active appointment per doctor slot
+        db.Index(
+            'uq_appointments_active_slot', 'doctor_id', 'appointment_date', 'appointment_time',
+            unique=True,
+            sqlite_where=db.text("status IN ('scheduled', 'confirmed')"),
+            postgresql_where=db.text("status IN ('scheduled', 'confirmed')")
+        ),
+    )
+    
+    def to_dict(self, fields=None):
+        """Serialize the appointment; fields limits the output to the given keys"""
+        data = {
+            'id': lambda: self.id,
+            'patient_id': lambda: self.patient_id,
+            'doctor_id': lambda: self.doctor_id,
+            'appointment_date': lambda: self.appointment_date.isoformat() if self.appointment_date else None,
+            'appointment_time': lambda: self.appointment_time.strftime('%H:%M') if self.appointment_time else None,
+            'duration_minutes': lambda: self.duration_minutes,
+            'status': lambda: self.status,
+            'notes': lambda: self.notes,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None,
+            'patient': lambda: self.patient.to_dict() if self.patient else None,
+            'doctor': lambda: self.doctor.to_dict() if self.doctor else None
         }
+        # Only requested attributes are touched, so unloaded columns and
+        # relationships are never lazy-loaded
+        return {key: data[key]() for key in (fields or data)}
+    
+    @classmethod
+    def can_transition(cls, old_status, new_status):
+        return new_status in cls.STATUS_TRANSITIONS.get(old_status, ())
+    
+    @classmethod
+    def source_statuses(cls, new_status):
+        """Statuses an appointment may move to new_status from"""
+        return tuple(status for status, targets in cls.STATUS_TRANSITIONS.items() if new_status in targets)
     
     def __repr__(self):
         return f'<Appointment {self.id} - Patient: {self.patient_id}, Doctor: {self.doctor_id}>'
@@ -0,0 +1,43 @@
+from models import db
+from models.appointment import Appointment
+from datetime import datetime
+
+class ArchivedAppointment(db.Model):
+    """An appointment moved out of the live table by the archiver
+
+    Rows keep their original id and columns, so history listings can union
+    both tables under the Appointment mapping. Only appointments dated
+    before the archive horizon live here; they are read-only.
+    """
+    __tablename__ = 'appointments_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id', ondelete='CASCADE'), nullable=False)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id', ondelete='CASCADE'), nullable=False)
+    appointment_date = db.Column(db.Date, nullable=False)
+    appointment_time = db.Column(db.Time, nullable=False)
+    duration_minutes = db.Column(db.Integer, default=30)
+    status = db.Column(db.String(20))
+    notes = db.Column(db.Text)
+    reminder_sent_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Doctor and patient history listings, newest first
+        db.Index('ix_appointments_archive_doctor_date', 'doctor_id', 'appointment_date', 'appointment_time'),
+        db.Index('ix_appointments_archive_patient_date', 'patient_id', 'appointment_date'),
+        # Newest archived date, which decides whether a listing needs this table
+        db.Index('ix_appointments_archive_date', 'appointment_date'),
+    )
+
+    # Relationships
+    patient = db.relationship('Patient', viewonly=True)
+    doctor = db.relationship('Doctor', viewonly=True)
+
+    # Same fields and projection as live appointments
+    to_dict = Appointment.to_dict
+
+    def __repr__(self):
+        return f'<ArchivedAppointment {self.id} - Patient: {self.patient_id}, Doctor: {self.doctor_id}>'
@@ -11,6 +11,13 @@ class Availability(db.Model):
     is_booked = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Open slot listings per doctor and day
+        db.Index('ix_availability_doctor_date_booked', 'doctor_id', 'date', 'is_booked'),
+        # A doctor publishes each slot once
+        db.Index('uq_availability_doctor_slot', 'doctor_id', 'date', 'time', unique=True),
+    )
+    
     # Relationships
     doctor = db.relationship('Doctor', backref=db.backref('availability_slots', lazy=True, cascade='all, delete-orphan'))
     
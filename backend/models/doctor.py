@@ -16,6 +16,14 @@ class Doctor(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Directory search filters and sort keys
+        db.Index('ix_doctors_specialization_fee', 'specialization', 'consultation_fee'),
+        db.Index('ix_doctors_fee', 'consultation_fee'),
+        db.Index('ix_doctors_experience', 'experience_years'),
+        db.Index('ix_doctors_name', 'name'),
+    )
+    
     # Relationships
     appointments = db.relationship('Appointment', backref='doctor', lazy=True, cascade='all, delete-orphan')
     
@@ -33,5 +41,8 @@ class Doctor(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    # Fields shown on directory search result cards
+    CARD_FIELDS = ('id', 'name', 'specialization', 'experience_years', 'consultation_fee')
+    
     def __repr__(self):
         return f'<Doctor {self.name}>'
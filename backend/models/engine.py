@@ -0,0 +1,93 @@
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+from models import db
+from models.routing import REPLICA_BIND_PREFIX
+
+
+def engine_options(config, url=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database (or another URL)
+
+    Pool sizing applies to every server database and to file-backed SQLite;
+    in-memory SQLite keeps Flask-SQLAlchemy's single shared connection.
+    Explicit SQLALCHEMY_ENGINE_OPTIONS entries win over the derived ones.
+    """
+    url = make_url(url or config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=config.get('DB_POOL_SIZE', 10),
+            max_overflow=config.get('DB_MAX_OVERFLOW', 20),
+            pool_timeout=config.get('DB_POOL_TIMEOUT', 30),
+            pool_recycle=config.get('DB_POOL_RECYCLE', 1800),
+            pool_pre_ping=config.get('DB_POOL_PRE_PING', True),
+        )
+
+    if url.get_backend_name() == 'sqlite':
+        # The driver's own lock wait; PRAGMA busy_timeout below keeps it in sync
+        options['connect_args'] = {'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 10000) / 1000}
+
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the replica URLs, replica_1 ... replica_n
+
+    Flask-SQLAlchemy does not apply SQLALCHEMY_ENGINE_OPTIONS to binds, so
+    each replica carries its own pool settings.
+    """
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    for index, url in enumerate(config.get('DATABASE_REPLICA_URLS') or [], start=1):
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = {'url': url, **engine_options(config, url)}
+    return binds
+
+
+def configure_engines(app):
+    """Apply the SQLite pragmas from config to every new connection
+
+    WAL lets readers proceed while a writer commits, busy_timeout makes
+    writers queue for the lock instead of failing with "database is locked",
+    and synchronous=NORMAL skips the per-commit fsync that WAL makes safe to drop.
+    """
+    pragmas = [
+        ('journal_mode', app.config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', app.config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', app.config.get('SQLITE_BUSY_TIMEOUT_MS')),
+    ]
+    pragmas = [(name, value) for name, value in pragmas if value not in (None, '')]
+    if not pragmas:
+        return
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'sqlite' or _is_memory_sqlite(engine.url):
+                continue
+            event.listen(engine, 'connect', apply_pragmas)
+            # Connections opened before the listener existed lack the pragmas
+            engine.dispose()
+
+
+def checkpoint_wal():
+    """Fold the SQLite write-ahead log back into the database after bulk deletes
+
+    A large maintenance run leaves a long WAL that every reader searches page
+    by page until the log restarts; no-op on other databases.
+    """
+    if db.engine.dialect.name != 'sqlite' or _is_memory_sqlite(db.engine.url):
+        return
+    db.session.execute(text('PRAGMA wal_checkpoint(TRUNCATE)'))
+    db.session.commit()
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
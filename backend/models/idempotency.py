@@ -0,0 +1,35 @@
+from models import db
+
+class IdempotencyRecord(db.Model):
+    """Outcome of a write request sent with an Idempotency-Key header
+
+    key_hash digests the caller's scope and key, fingerprint the method, path
+    and body. status_code stays NULL while the first request is running;
+    afterwards the compressed JSON response and the headers the view set
+    (JSON list of name/value pairs) are kept until expires_at so retries can
+    be answered from here.
+    """
+    __tablename__ = 'idempotency_keys'
+
+    key_hash = db.Column(db.LargeBinary(16), primary_key=True)
+    fingerprint = db.Column(db.LargeBinary(16), nullable=False)
+    status_code = db.Column(db.SmallInteger, nullable=True)
+    response = db.Column(db.LargeBinary, nullable=True)
+    headers = db.Column(db.Text, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Purging expired entries
+        db.Index('ix_idempotency_keys_expires', 'expires_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'key_hash': self.key_hash.hex() if self.key_hash else None,
+            'status_code': self.status_code,
+            'completed': self.status_code is not None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    def __repr__(self):
+        return f'<IdempotencyRecord {self.key_hash.hex() if self.key_hash else None} {self.status_code}>'
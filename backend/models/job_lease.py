@@ -0,0 +1,27 @@
+from models import db
+
+class JobLease(db.Model):
+    """Which process may currently run a background job
+
+    Every worker process starts the same job threads; a run first claims its
+    job's row by setting holder and locked_until. A claim that is not renewed
+    lapses at locked_until, so a process that dies mid-run blocks the job for
+    at most one lease period. last_run_at is when the last run completed.
+    """
+    __tablename__ = 'job_leases'
+
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_run_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'locked_until': self.locked_until.isoformat() if self.locked_until else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+    def __repr__(self):
+        return f'<JobLease {self.name} {self.holder}>'
@@ -0,0 +1,53 @@
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema():
+    """Bring tables created by older db.create_all() runs up to the current models"""
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            # create_all() has already created it with every column and index
+            continue
+
+        _add_missing_columns(engine, inspector, table)
+        _create_missing_indexes(engine, inspector, table)
+
+
+def _add_missing_columns(engine, inspector, table):
+    existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+
+    for column in table.columns:
+        if column.name in existing_columns:
+            continue
+
+        column_type = column.type.compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+            )
+        logger.info('Added column %s.%s', table.name, column.name)
+
+
+def _create_missing_indexes(engine, inspector, table):
+    existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+
+    for index in table.indexes:
+        if index.name in existing_indexes:
+            continue
+
+        try:
+            index.create(bind=engine)
+            logger.info('Created index %s on %s', index.name, table.name)
+        except (IntegrityError, OperationalError) as e:
+            # Existing duplicate rows block a unique index; leave it for manual cleanup
+            logger.warning('Could not create index %s on %s: %s', index.name, table.name, e)
@@ -0,0 +1,59 @@
+from models import db
+from datetime import datetime
+
+# One bit per minute of the day; bit n is the minute starting at n minutes past midnight
+DAY_MINUTES = 24 * 60
+BITMAP_BYTES = DAY_MINUTES // 8
+
+
+class DoctorDayOccupancy(db.Model):
+    """Materialised occupancy of one doctor on one day
+
+    published holds the minutes opened by Availability rows (NULL when the
+    doctor published nothing that day, i.e. default working hours apply) and
+    busy the minutes covered by active appointments. Rows are maintained in
+    the same transaction as the writes to those tables; days without a row
+    have neither.
+    """
+    __tablename__ = 'doctor_day_occupancy'
+
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id', ondelete='CASCADE'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    published = db.Column(db.LargeBinary(BITMAP_BYTES), nullable=True)
+    busy = db.Column(db.LargeBinary(BITMAP_BYTES), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Single-row lookups and per-month range reads
+        db.Index('uq_occupancy_doctor_date', 'doctor_id', 'date', unique=True),
+    )
+
+    @staticmethod
+    def encode(mask):
+        return mask.to_bytes(BITMAP_BYTES, 'little')
+
+    @staticmethod
+    def decode(value):
+        return int.from_bytes(value, 'little') if value is not None else None
+
+    @property
+    def published_mask(self):
+        return self.decode(self.published)
+
+    @property
+    def busy_mask(self):
+        return self.decode(self.busy)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'doctor_id': self.doctor_id,
+            'date': self.date.isoformat() if self.date else None,
+            'published_minutes': bin(self.published_mask).count('1') if self.published is not None else None,
+            'busy_minutes': bin(self.busy_mask).count('1'),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<DoctorDayOccupancy {self.doctor_id} {self.date}>'
@@ -0,0 +1,27 @@
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+# Bind keys of read replicas in SQLALCHEMY_BINDS; their metadata is empty, so
+# create_all() and migrations only ever touch the primary
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs of replica-routed requests to a replica
+
+    A request is replica-routed when g.db_replica names a replica bind (see
+    services.replica_routing). Flushes, writes, SELECT ... FOR UPDATE and
+    anything outside such a request use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _is_plain_select(clause):
+            replica = g.get('db_replica') if has_request_context() else None
+            if replica is not None:
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_plain_select(clause):
+    return isinstance(clause, Select) and clause._for_update_arg is None
@@ -0,0 +1,87 @@
+import logging
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, inspect, text
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# External-content FTS5 index over doctors; it stores only the index and
+# reads column values from the doctors table. Kept out of db.metadata so
+# create_all() never tries to create it as a regular table.
+doctors_fts = Table(
+    'doctors_fts', MetaData(),
+    Column('rowid', Integer, primary_key=True),
+    Column('name', Text),
+    Column('education', Text),
+)
+
+# Free text matches name and education; specialization is an exact filter.
+# The LIKE fallback in services.doctor_search matches the same columns.
+FTS_COLUMNS = ('name', 'education')
+
+_FTS_DDL = (
+    "CREATE VIRTUAL TABLE doctors_fts USING fts5("
+    "name, education, content='doctors', content_rowid='id', tokenize='unicode61')",
+    # Triggers keep the index in sync with every write path, including bulk inserts
+    "CREATE TRIGGER doctors_fts_ai AFTER INSERT ON doctors BEGIN "
+    "INSERT INTO doctors_fts(rowid, name, education) "
+    "VALUES (new.id, new.name, new.education); END",
+    "CREATE TRIGGER doctors_fts_ad AFTER DELETE ON doctors BEGIN "
+    "INSERT INTO doctors_fts(doctors_fts, rowid, name, education) "
+    "VALUES ('delete', old.id, old.name, old.education); END",
+    "CREATE TRIGGER doctors_fts_au AFTER UPDATE OF name, education ON doctors BEGIN "
+    "INSERT INTO doctors_fts(doctors_fts, rowid, name, education) "
+    "VALUES ('delete', old.id, old.name, old.education); "
+    "INSERT INTO doctors_fts(rowid, name, education) "
+    "VALUES (new.id, new.name, new.education); END",
+    "INSERT INTO doctors_fts(doctors_fts) VALUES ('rebuild')",
+)
+
+# Removes an index built over other columns so it can be created afresh
+_DROP_FTS_DDL = (
+    "DROP TRIGGER IF EXISTS doctors_fts_ai",
+    "DROP TRIGGER IF EXISTS doctors_fts_ad",
+    "DROP TRIGGER IF EXISTS doctors_fts_au",
+    "DROP TABLE IF EXISTS doctors_fts",
+)
+
+
+# Engine URL -> whether its database has a usable doctors_fts index. Worker
+# processes that did not run setup_database() find out on first use.
+_fts_engines = {}
+
+
+def full_text_available():
+    engine = db.engine
+    url = str(engine.url)
+    available = _fts_engines.get(url)
+    if available is None:
+        available = engine.dialect.name == 'sqlite' and 'doctors_fts' in inspect(engine).get_table_names()
+        _fts_engines[url] = available
+    return available
+
+
+def ensure_doctor_search_index():
+    """Create the doctors full-text index and its sync triggers if missing or stale (SQLite only)"""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    inspector = inspect(engine)
+    exists = 'doctors_fts' in inspector.get_table_names()
+    columns = tuple(column['name'] for column in inspector.get_columns('doctors_fts')) if exists else ()
+    if columns != FTS_COLUMNS:
+        if exists:
+            logger.info('Rebuilding doctor full-text index over %s (was %s)', FTS_COLUMNS, columns)
+        try:
+            with engine.begin() as connection:
+                for statement in _DROP_FTS_DDL + _FTS_DDL:
+                    connection.execute(text(statement))
+        except Exception as e:
+            # SQLite builds without FTS5 fall back to LIKE matching
+            logger.warning('Doctor full-text index unavailable: %s', e)
+            _fts_engines[str(engine.url)] = False
+            return
+
+    _fts_engines[str(engine.url)] = True
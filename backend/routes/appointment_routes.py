@@ -1,12 +1,51 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, time
+from flask_jwt_extended import jwt_required
+from datetime import datetime, timedelta
 
-from models import Appointment, Doctor, Patient, db
+from models import Appointment, Doctor, db
+from services.archive import appointment_history_query, find_appointment
+from services.appointment_status import MAX_BATCH_TRANSITIONS, StatusTransitionError, apply_status_transitions, change_status
+from services.availability_engine import find_free_slots, free_days
+from services.email_service import email_service
+from services.events import appointment_changes, event_broker
+from services.idempotency import idempotent
+from services.identity import current_identity, current_user_id
+from services.booking_service import reserve_slot, release_slot, SlotUnavailableError
+from services.pagination import list_response, parse_date_range, parse_pagination
+from services.serialization import APPOINTMENT_COLUMNS, APPOINTMENT_KEYSET, parse_appointment_fields
 
 appointment_bp = Blueprint('appointment', __name__)
 
+# Longest date range accepted by the bulk availability search
+MAX_SEARCH_DAYS = 90
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _is_participant(appointment):
+    """Whether the authenticated user is this appointment's patient or doctor"""
+    role, user_id = current_identity()
+    if role == 'patient':
+        return appointment.patient_id == user_id
+    if role == 'doctor':
+        return appointment.doctor_id == user_id
+    return False
+
+
+def _status_forbidden(appointment, new_status):
+    """Why the authenticated user may not set this status, or None"""
+    if not _is_participant(appointment):
+        return 'Unauthorized to update this appointment'
+    # Patients may only cancel; confirming and completing is the doctor's call
+    if current_identity()[0] == 'patient' and new_status not in (appointment.status, 'cancelled'):
+        return 'Patients can only cancel appointments'
+    return None
+
+
 @appointment_bp.route('/', methods=['POST'])
+@idempotent
 def create_appointment():
     try:
         # Get patient_id from request data for now (temporary fix)
@@ -44,30 +83,26 @@ def create_appointment():
         if appointment_datetime <= datetime.now():
             return jsonify({'error': 'Appointment must be scheduled for a future date and time'}), 400
         
-        # Check if appointment slot is already taken
-        existing_appointment = Appointment.query.filter_by(
-            doctor_id=data['doctor_id'],
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            status='scheduled'
-        ).first()
-        
-        if existing_appointment:
-            return jsonify({'error': 'This appointment slot is already booked'}), 400
-        
-        # Create new appointment
-        appointment = Appointment(
-            patient_id=patient_id,
-            doctor_id=data['doctor_id'],
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            duration_minutes=data.get('duration_minutes', 30),
-            notes=data.get('notes', '')
-        )
-        
-        from models import db
-        db.session.add(appointment)
-        db.session.commit()
+        duration_minutes = int(data.get('duration_minutes') or 30)
+        if duration_minutes <= 0:
+            return jsonify({'error': 'duration_minutes must be positive'}), 400
+        
+        # Reserve the slot atomically; conflicts surface as SlotUnavailableError
+        try:
+            appointment = reserve_slot(
+                patient_id=patient_id,
+                doctor_id=doctor.id,
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                duration_minutes=duration_minutes,
+                notes=data.get('notes', '')
+            )
+        except SlotUnavailableError as e:
+            return jsonify({'error': str(e)}), 409
+        
+        # Queued for the background sender; never waits on SMTP
+        email_service.notify_appointment(appointment, 'booked')
+        event_broker.publish_appointment(appointment, 'appointment.created')
         
         return jsonify({
             'message': 'Appointment booked successfully',
@@ -81,11 +116,13 @@ def create_appointment():
 @jwt_required()
 def get_appointment(appointment_id):
     try:
-        user_id = get_jwt_identity()
-        appointment = Appointment.query.get_or_404(appointment_id)
+        # Archived appointments stay readable by their participants
+        appointment = find_appointment(appointment_id)
+        if appointment is None:
+            return jsonify({'error': 'Appointment not found'}), 404
         
         # Check if user is authorized to view this appointment
-        if appointment.patient_id != user_id and appointment.doctor_id != user_id:
+        if not _is_participant(appointment):
             return jsonify({'error': 'Unauthorized to view this appointment'}), 403
         
         return jsonify({
@@ -99,24 +136,27 @@ def get_appointment(appointment_id):
 @jwt_required()
 def update_appointment(appointment_id):
     try:
-        user_id = get_jwt_identity()
         appointment = Appointment.query.get_or_404(appointment_id)
         
-        # Check if user is authorized to update this appointment
-        if appointment.patient_id != user_id and appointment.doctor_id != user_id:
-            return jsonify({'error': 'Unauthorized to update this appointment'}), 403
+        data = request.get_json() or {}
         
-        data = request.get_json()
+        new_status = data.get('status', appointment.status)
+        if new_status not in Appointment.STATUSES:
+            return jsonify({'error': f'Invalid status. Must be one of: {list(Appointment.STATUSES)}'}), 400
         
-        # Update allowed fields
-        updatable_fields = ['status', 'notes']
-        for field in updatable_fields:
-            if field in data:
-                setattr(appointment, field, data[field])
+        # Check if user is authorized to update this appointment
+        forbidden = _status_forbidden(appointment, new_status)
+        if forbidden:
+            return jsonify({'error': forbidden}), 403
         
-        from models import db
-        with db.session.begin():
-            db.session.commit()
+        if 'notes' in data:
+            appointment.notes = data['notes']
+        
+        # Status changes follow the state machine and free the slot, like PUT /<id>/status
+        try:
+            change_status(appointment, new_status)
+        except StatusTransitionError as e:
+            return jsonify({'error': str(e)}), 409
         
         return jsonify({
             'message': 'Appointment updated successfully',
@@ -128,13 +168,13 @@ def update_appointment(appointment_id):
 
 @appointment_bp.route('/<int:appointment_id>', methods=['DELETE'])
 @jwt_required()
+@idempotent
 def cancel_appointment(appointment_id):
     try:
-        user_id = get_jwt_identity()
         appointment = Appointment.query.get_or_404(appointment_id)
         
         # Check if user is authorized to cancel this appointment
-        if appointment.patient_id != user_id and appointment.doctor_id != user_id:
+        if not _is_participant(appointment):
             return jsonify({'error': 'Unauthorized to cancel this appointment'}), 403
         
         # Only allow cancellation of scheduled appointments
@@ -142,10 +182,10 @@ def cancel_appointment(appointment_id):
             return jsonify({'error': 'Cannot cancel an appointment that is not scheduled'}), 400
         
         appointment.status = 'cancelled'
-        
-        from models import db
-        with db.session.begin():
-            db.session.commit()
+        release_slot(appointment)
+        db.session.commit()
+        email_service.notify_appointment(appointment, 'cancelled')
+        event_broker.publish_appointment(appointment)
         
         return jsonify({
             'message': 'Appointment cancelled successfully',
@@ -161,28 +201,31 @@ def get_doctor_appointments():
         # Get doctor_id from query parameter (temporary fix)
         doctor_id = request.args.get('doctor_id') or 1  # Default to doctor ID 1 for testing
         
-        # Get query parameters for filtering
+        # Get query parameters for filtering; a date range (?date= or
+        # ?start_date= / ?end_date=) that reaches archived days also reads the archive
         status = request.args.get('status')
-        date = request.args.get('date')
-        
-        query = Appointment.query.options(db.joinedload(Appointment.patient)).filter_by(doctor_id=doctor_id)
-        
-        if status:
-            query = query.filter_by(status=status)
         
-        if date:
-            query = query.filter_by(appointment_date=datetime.strptime(date, '%Y-%m-%d').date())
+        # Field projection (?fields= / ?view=) and keyset pagination (?limit= / ?cursor= / ?stream=)
+        try:
+            fields = parse_appointment_fields(request.args)
+            page = parse_pagination(request.args, APPOINTMENT_KEYSET)
+            start_date, end_date = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        appointments = query.order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc()).all()
+        query, keyset = appointment_history_query(fields, start_date, end_date, doctor_id=doctor_id, status=status or None)
         
-        return jsonify({
-            'appointments': [appointment.to_dict() for appointment in appointments]
-        }), 200
+        return list_response(
+            query, keyset, lambda appointment: appointment.to_dict(fields),
+            descending=True, envelope='appointments', **page
+        ), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @appointment_bp.route('/<int:appointment_id>/status', methods=['PUT'])
+@jwt_required()
+@idempotent
 def update_appointment_status(appointment_id):
     try:
         data = request.get_json()
@@ -192,9 +235,8 @@ def update_appointment_status(appointment_id):
             return jsonify({'error': 'Status is required'}), 400
         
         # Valid status values
-        valid_statuses = ['scheduled', 'confirmed', 'rejected', 'cancelled', 'completed']
-        if new_status not in valid_statuses:
-            return jsonify({'error': f'Invalid status. Must be one of: {valid_statuses}'}), 400
+        if new_status not in Appointment.STATUSES:
+            return jsonify({'error': f'Invalid status. Must be one of: {list(Appointment.STATUSES)}'}), 400
         
         # Get appointment with patient data
         appointment = Appointment.query.options(db.joinedload(Appointment.patient)).get(appointment_id)
@@ -202,10 +244,14 @@ def update_appointment_status(appointment_id):
         if not appointment:
             return jsonify({'error': 'Appointment not found'}), 404
         
-        # Update status
-        old_status = appointment.status
-        appointment.status = new_status
-        db.session.commit()
+        forbidden = _status_forbidden(appointment, new_status)
+        if forbidden:
+            return jsonify({'error': forbidden}), 403
+        
+        try:
+            old_status = change_status(appointment, new_status)
+        except StatusTransitionError as e:
+            return jsonify({'error': str(e)}), 409
         
         return jsonify({
             'message': f'Appointment status updated from {old_status} to {new_status}',
@@ -216,6 +262,53 @@ def update_appointment_status(appointment_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@appointment_bp.route('/status', methods=['PUT'])
+@jwt_required()
+@idempotent
+def update_appointment_statuses():
+    try:
+        # Doctors change their own appointments only; others' ids are reported as not found
+        doctor_id = current_user_id('doctor')
+        if doctor_id is None:
+            return jsonify({'error': 'Doctor access required'}), 403
+        
+        data = request.get_json() or {}
+        
+        # {"transitions": [{"id": 1, "status": "confirmed"}, ...]} or
+        # {"ids": [1, 2], "status": "confirmed"}
+        if 'transitions' in data:
+            items = data['transitions']
+            if not isinstance(items, list):
+                return jsonify({'error': 'transitions must be a list'}), 400
+        else:
+            if not isinstance(data.get('ids'), list):
+                return jsonify({'error': 'transitions or ids is required'}), 400
+            items = [{'id': appointment_id, 'status': data.get('status')} for appointment_id in data['ids']]
+        
+        if len(items) > MAX_BATCH_TRANSITIONS:
+            return jsonify({'error': f'At most {MAX_BATCH_TRANSITIONS} appointments per request'}), 400
+        
+        transitions = {}
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+                return jsonify({'error': f'Invalid transition {item!r}'}), 400
+            if item.get('status') not in Appointment.STATUSES:
+                return jsonify({'error': f'Invalid status. Must be one of: {list(Appointment.STATUSES)}'}), 400
+            if transitions.get(item['id'], item['status']) != item['status']:
+                return jsonify({'error': f"Conflicting statuses for appointment {item['id']}"}), 400
+            transitions[item['id']] = item['status']
+        
+        result = apply_status_transitions(transitions, doctor_id=doctor_id)
+        
+        return jsonify({
+            'message': f"{len(result['updated'])} appointments updated",
+            **result
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @appointment_bp.route('/doctor/<int:doctor_id>/available-slots', methods=['GET'])
 def get_available_slots(doctor_id):
     try:
@@ -229,32 +322,13 @@ def get_available_slots(doctor_id):
         
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        # Get all appointments for this doctor on this date
-        booked_appointments = Appointment.query.filter_by(
-            doctor_id=doctor_id,
-            appointment_date=date,
-            status='scheduled'
-        ).all()
-        
-        # Generate available time slots (9 AM to 5 PM, 30-minute intervals)
-        booked_times = {appt.appointment_time for appt in booked_appointments}
-        
-        available_slots = []
-        start_time = time(9, 0)  # 9:00 AM
-        end_time = time(17, 0)   # 5:00 PM
-        
-        current_time = start_time
-        while current_time < end_time:
-            if current_time not in booked_times:
-                available_slots.append(current_time.strftime('%H:%M'))
-            
-            # Add 30 minutes
-            minutes = current_time.minute + 30
-            hours = current_time.hour
-            if minutes >= 60:
-                minutes -= 60
-                hours += 1
-            current_time = time(hours, minutes)
+        duration = request.args.get('duration', type=int)
+        if duration is not None and duration <= 0:
+            return jsonify({'error': 'Duration must be a positive number of minutes'}), 400
+        
+        # Free intervals from published availability minus active appointments
+        slots = find_free_slots([doctor.id], date, date, duration=duration)
+        available_slots = [slot.strftime('%H:%M') for slot in slots[doctor.id][date]]
         
         return jsonify({
             'available_slots': available_slots
@@ -262,3 +336,125 @@ def get_available_slots(doctor_id):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@appointment_bp.route('/doctor/<int:doctor_id>/free-days', methods=['GET'])
+def get_free_days(doctor_id):
+    try:
+        doctor = Doctor.query.get_or_404(doctor_id)
+        
+        # Calendar month (YYYY-MM), defaulting to the current one
+        month = request.args.get('month') or datetime.now().strftime('%Y-%m')
+        try:
+            start_date = datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid month format. Use YYYY-MM'}), 400
+        end_date = (start_date + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+        
+        duration = request.args.get('duration', type=int)
+        if duration is not None and duration <= 0:
+            return jsonify({'error': 'Duration must be a positive number of minutes'}), 400
+        
+        # One range read of the doctor's occupancy rows for the month
+        days = free_days(doctor.id, start_date, end_date, duration=duration)
+        
+        return jsonify({
+            'doctor_id': doctor.id,
+            'month': start_date.strftime('%Y-%m'),
+            'free_days': [day.isoformat() for day in days]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@appointment_bp.route('/available-slots', methods=['GET'])
+def search_available_slots():
+    try:
+        # Date range (inclusive), defaulting to the next week
+        try:
+            start_date = _parse_date(request.args.get('start_date')) or datetime.now().date()
+            end_date = _parse_date(request.args.get('end_date')) or start_date + timedelta(days=6)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        if end_date < start_date:
+            return jsonify({'error': 'end_date must not be before start_date'}), 400
+        if (end_date - start_date).days >= MAX_SEARCH_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_SEARCH_DAYS} days'}), 400
+        
+        duration = request.args.get('duration', type=int)
+        if duration is not None and duration <= 0:
+            return jsonify({'error': 'Duration must be a positive number of minutes'}), 400
+        
+        # Doctor filters
+        query = db.session.query(Doctor.id, Doctor.name, Doctor.specialization, Doctor.consultation_fee)
+        
+        specialization = request.args.get('specialization')
+        if specialization:
+            query = query.filter(Doctor.specialization == specialization)
+        
+        max_fee = request.args.get('max_fee', type=float)
+        if max_fee is not None:
+            query = query.filter(Doctor.consultation_fee <= max_fee)
+        
+        doctor_ids = request.args.get('doctor_ids')
+        if doctor_ids:
+            try:
+                query = query.filter(Doctor.id.in_([int(doctor_id) for doctor_id in doctor_ids.split(',')]))
+            except ValueError:
+                return jsonify({'error': 'doctor_ids must be a comma-separated list of integers'}), 400
+        
+        doctors = query.order_by(Doctor.id).all()
+        
+        # One occupancy read across all doctors and days
+        slots = find_free_slots([doctor.id for doctor in doctors], start_date, end_date, duration=duration) if doctors else {}
+        
+        results = []
+        for doctor in doctors:
+            days = slots.get(doctor.id, {})
+            results.append({
+                'doctor_id': doctor.id,
+                'name': doctor.name,
+                'specialization': doctor.specialization,
+                'consultation_fee': doctor.consultation_fee,
+                'slots': {
+                    day.isoformat(): [slot.strftime('%H:%M') for slot in day_slots]
+                    for day, day_slots in sorted(days.items()) if day_slots
+                }
+            })
+        
+        return jsonify({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'doctors': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@appointment_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_appointment_changes():
+    try:
+        # Appointments changed after ?since=, for dashboards reconnecting to the event stream
+        since_str = request.args.get('since')
+        if not since_str:
+            return jsonify({'error': 'since parameter is required'}), 400
+        try:
+            since = datetime.fromisoformat(since_str)
+        except ValueError:
+            return jsonify({'error': 'Invalid since timestamp. Use ISO 8601'}), 400
+        
+        # Only the caller's own appointments, whatever ids the query string names
+        role, user_id = current_identity()
+        if role is None:
+            return jsonify({'error': 'User not found'}), 401
+        
+        appointments, next_since = appointment_changes(since, **{f'{role}_id': user_id})
+        
+        return jsonify({
+            'appointments': [appointment.to_dict(APPOINTMENT_COLUMNS) for appointment in appointments],
+            'since': next_since.isoformat()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
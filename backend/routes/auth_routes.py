@@ -1,12 +1,22 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask_jwt_extended import jwt_required
 from datetime import datetime
+import math
 
 from models import Patient, Doctor
+from services.auth_service import LoginThrottled, auth_service
+from services.doctor_directory import invalidate_doctor
+from services.identity import create_tokens, create_user_access_token, current_identity, get_user_profile
 
 auth_bp = Blueprint('auth', __name__)
 
+
+def _throttled(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+    return response, 429
+
+
 @auth_bp.route('/patient/register', methods=['POST'])
 def patient_register():
     try:
@@ -26,7 +36,7 @@ def patient_register():
         patient = Patient(
             name=data['name'],
             email=data['email'],
-            password=generate_password_hash(data['password']),
+            password=auth_service.hash_password(data['password']),
             phone=data['phone'],
             date_of_birth=datetime.strptime(data['dateOfBirth'], '%Y-%m-%d').date(),
             gender=data['gender']
@@ -36,12 +46,12 @@ def patient_register():
         db.session.add(patient)
         db.session.commit()
         
-        # Create access token
-        access_token = create_access_token(identity=patient.id)
+        # Create access and refresh tokens
+        tokens = create_tokens('patient', patient)
         
         return jsonify({
             'message': 'Patient registered successfully',
-            'access_token': access_token,
+            **tokens,
             'patient': patient.to_dict()
         }), 201
         
@@ -56,16 +66,19 @@ def patient_login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
         
-        patient = Patient.query.filter_by(email=data['email']).first()
+        try:
+            patient = auth_service.authenticate(Patient, data['email'], data['password'])
+        except LoginThrottled as e:
+            return _throttled(e)
         
-        if not patient or not check_password_hash(patient.password, data['password']):
+        if not patient:
             return jsonify({'error': 'Invalid email or password'}), 401
         
-        access_token = create_access_token(identity=patient.id)
+        tokens = create_tokens('patient', patient)
         
         return jsonify({
             'message': 'Login successful',
-            'access_token': access_token,
+            **tokens,
             'patient': patient.to_dict()
         }), 200
         
@@ -91,7 +104,7 @@ def doctor_register():
         doctor = Doctor(
             name=data['name'],
             email=data['email'],
-            password=generate_password_hash(data['password']),
+            password=auth_service.hash_password(data['password']),
             specialization=data['specialization'],
             phone=data['phone'],
             experience_years=int(data['experienceYears']),
@@ -102,13 +115,14 @@ def doctor_register():
         from models import db
         db.session.add(doctor)
         db.session.commit()
+        invalidate_doctor(doctor.id)
         
-        # Create access token
-        access_token = create_access_token(identity=doctor.id)
+        # Create access and refresh tokens
+        tokens = create_tokens('doctor', doctor)
         
         return jsonify({
             'message': 'Doctor registered successfully',
-            'access_token': access_token,
+            **tokens,
             'doctor': doctor.to_dict()
         }), 201
         
@@ -123,44 +137,56 @@ def doctor_login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
         
-        doctor = Doctor.query.filter_by(email=data['email']).first()
+        try:
+            doctor = auth_service.authenticate(Doctor, data['email'], data['password'])
+        except LoginThrottled as e:
+            return _throttled(e)
         
-        if not doctor or not check_password_hash(doctor.password, data['password']):
+        if not doctor:
             return jsonify({'error': 'Invalid email or password'}), 401
         
-        access_token = create_access_token(identity=doctor.id)
+        tokens = create_tokens('doctor', doctor)
         
         return jsonify({
             'message': 'Login successful',
-            'access_token': access_token,
+            **tokens,
             'doctor': doctor.to_dict()
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_access_token():
+    try:
+        role, user_id = current_identity()
+        profile = get_user_profile(role, user_id) if role else None
+        if not profile:
+            return jsonify({'error': 'User not found'}), 401
+        
+        # Claims are rebuilt from the current profile so renames show up
+        access_token = create_user_access_token(role, user_id, profile['name'], profile['email'])
+        return jsonify({'access_token': access_token}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
     try:
-        user_id = get_jwt_identity()
-        
-        # Try to find user in both tables
-        patient = Patient.query.get(user_id)
-        doctor = Doctor.query.get(user_id)
-        
-        if patient:
-            return jsonify({
-                'user_type': 'patient',
-                'user': patient.to_dict()
-            }), 200
-        elif doctor:
-            return jsonify({
-                'user_type': 'doctor',
-                'user': doctor.to_dict()
-            }), 200
-        else:
+        # The token names the role, so only one (cached) profile lookup is needed
+        role, user_id = current_identity()
+        profile = get_user_profile(role, user_id) if role else None
+        
+        if not profile:
             return jsonify({'error': 'User not found'}), 404
+        
+        return jsonify({
+            'user_type': role,
+            'user': profile
+        }), 200
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
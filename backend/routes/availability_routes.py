@@ -1,10 +1,17 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, date, time
-from models import Availability, db
+from models import Availability, Doctor, db
+from services.availability_engine import exclude_busy_slots
+from services.availability_schedule import bulk_create_slots, expand_recurrence, parse_slot_list
+from services.events import event_broker
+from services.occupancy import refresh_days
+from services.pagination import list_response, parse_date_range, parse_pagination
 
 availability_bp = Blueprint('availability', __name__)
 
+AVAILABILITY_KEYSET = (Availability.date, Availability.time, Availability.id)
+
 @availability_bp.route('', methods=['GET'])
 def get_availability():
     try:
@@ -14,21 +21,37 @@ def get_availability():
             return jsonify({'error': 'Doctor ID required'}), 400
         doctor_id = int(doctor_id)
         
-        # Get query parameters for filtering
-        date_filter = request.args.get('date')
+        # Keyset pagination (?limit= / ?cursor=) or streaming (?stream=)
+        try:
+            page = parse_pagination(request.args, AVAILABILITY_KEYSET)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
+        # Date filters: ?date= or ?start_date= / ?end_date=; without them the
+        # listing starts today, an index range on (doctor_id, date, time)
+        try:
+            start_date, end_date = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if start_date is None and end_date is None:
+            start_date = date.today()
+        
+        # reserve_slot flags every slot an appointment overlaps, so booked rows
+        # are filtered before the LIMIT; the engine check below only catches
+        # stale flags that occupancy-check has not repaired yet
         query = Availability.query.filter_by(doctor_id=doctor_id, is_booked=False)
         
-        if date_filter:
-            try:
-                filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-                query = query.filter_by(date=filter_date)
-            except ValueError:
-                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        if start_date is not None:
+            query = query.filter(Availability.date >= start_date)
+        if end_date is not None:
+            query = query.filter(Availability.date <= end_date)
         
-        availability = query.order_by(Availability.date.asc(), Availability.time.asc()).all()
-        
-        return jsonify([slot.to_dict() for slot in availability]), 200
+        # Open slots are the ones no active appointment overlaps; a page that
+        # loses rows to the check is refilled from the following ones
+        return list_response(
+            query, AVAILABILITY_KEYSET, Availability.to_dict,
+            transform=lambda slots: exclude_busy_slots(doctor_id, slots), **page
+        ), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -76,7 +99,9 @@ def add_availability():
         )
         
         db.session.add(availability)
+        refresh_days([(doctor_id, slot_date)])
         db.session.commit()
+        event_broker.publish_availability(availability, 'availability.created')
         
         return jsonify({
             'message': 'Availability slot added successfully',
@@ -87,6 +112,44 @@ def add_availability():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@availability_bp.route('/bulk', methods=['POST'])
+def bulk_add_availability():
+    try:
+        data = request.get_json() or {}
+        doctor_id = request.headers.get('X-Doctor-ID') or data.get('doctor_id')
+        if not doctor_id:
+            return jsonify({'error': 'Doctor ID required'}), 400
+        doctor_id = int(doctor_id)
+        
+        if not db.session.query(Doctor.id).filter_by(id=doctor_id).first():
+            return jsonify({'error': 'Doctor not found'}), 404
+        
+        # Either an explicit slot list or a weekly recurrence rule
+        if ('slots' in data) == ('recurrence' in data):
+            return jsonify({'error': 'Provide either slots or recurrence'}), 400
+        
+        try:
+            if 'slots' in data:
+                slots = parse_slot_list(data['slots'])
+            else:
+                slots = expand_recurrence(data['recurrence'])
+            summary = bulk_create_slots(doctor_id, slots)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if summary['created']:
+            # One event for the whole batch; clients refetch the range
+            event_broker.publish('availability.bulk_created', doctor_id, summary)
+        
+        return jsonify({
+            'message': f"{summary['created']} availability slots added",
+            **summary
+        }), 201 if summary['created'] else 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @availability_bp.route('/<int:slot_id>', methods=['DELETE'])
 def remove_availability(slot_id):
     try:
@@ -108,7 +171,9 @@ def remove_availability(slot_id):
         
         # Delete the slot
         db.session.delete(slot)
+        refresh_days([(doctor_id, slot.date)])
         db.session.commit()
+        event_broker.publish_availability(slot, 'availability.deleted')
         
         return jsonify({'message': 'Availability slot removed successfully'}), 200
         
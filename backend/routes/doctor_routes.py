@@ -1,15 +1,56 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from datetime import datetime, timedelta
 
-from models import Doctor, Appointment, Patient
+from models import Doctor, Patient
+from services.archive import appointment_history_query, doctor_patient_ids
+from services.dashboard import MAX_SUMMARY_DAYS, doctor_summary
+from services.doctor_directory import conditional_response, get_directory_entry, get_doctor_entry, invalidate_doctor
+from services.doctor_search import DEFAULT_SEARCH_LIMIT, parse_search, search_query
+from services.identity import current_user_id, get_user_profile, invalidate_identity
+from services.pagination import list_response, parse_date_range, parse_pagination
+from services.serialization import APPOINTMENT_KEYSET, parse_appointment_fields
 
 doctor_bp = Blueprint('doctor', __name__)
 
+DOCTOR_KEYSET = (Doctor.id,)
+
 @doctor_bp.route('', methods=['GET'])
 def get_doctors():
     try:
-        doctors = Doctor.query.all()
-        return jsonify([doctor.to_dict() for doctor in doctors]), 200
+        # Keyset pagination on id (?limit= / ?cursor=) or streaming (?stream=)
+        try:
+            page = parse_pagination(request.args, DOCTOR_KEYSET)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # The full directory is served from cache with conditional GET support
+        if not any(page.values()):
+            return conditional_response(get_directory_entry())
+        
+        return list_response(Doctor.query, DOCTOR_KEYSET, Doctor.to_dict, **page), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@doctor_bp.route('/search', methods=['GET'])
+def search_doctors():
+    try:
+        # ?q= free text, ?specialization= (comma separated), ?min_fee= / ?max_fee=,
+        # ?min_experience= / ?max_experience=, ?sort= and keyset pagination
+        try:
+            params = parse_search(request.args)
+            query, order_columns, descending = search_query(params)
+            page = parse_pagination(request.args, order_columns)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        page['limit'] = page['limit'] or (None if page['stream'] else DEFAULT_SEARCH_LIMIT)
+        return list_response(
+            query, order_columns, lambda row: {field: getattr(row, field) for field in Doctor.CARD_FIELDS},
+            descending=descending, envelope='doctors', **page
+        ), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -18,8 +59,11 @@ def get_doctors():
 @doctor_bp.route('/<int:doctor_id>', methods=['GET'])
 def get_doctor(doctor_id):
     try:
-        doctor = Doctor.query.get_or_404(doctor_id)
-        return jsonify(doctor.to_dict()), 200
+        entry = get_doctor_entry(doctor_id)
+        if not entry:
+            return jsonify({'error': 'Doctor not found'}), 404
+        
+        return conditional_response(entry)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -29,10 +73,16 @@ def get_doctor(doctor_id):
 @jwt_required()
 def get_doctor_profile():
     try:
-        doctor_id = get_jwt_identity()
-        doctor = Doctor.query.get_or_404(doctor_id)
+        doctor_id = current_user_id('doctor')
+        if doctor_id is None:
+            return jsonify({'error': 'Doctor access required'}), 403
+        
+        # Served from the identity cache in the common case
+        profile = get_user_profile('doctor', doctor_id)
+        if not profile:
+            return jsonify({'error': 'Doctor not found'}), 404
         return jsonify({
-            'doctor': doctor.to_dict()
+            'doctor': profile
         }), 200
         
     except Exception as e:
@@ -43,7 +93,9 @@ def get_doctor_profile():
 @jwt_required()
 def update_doctor_profile():
     try:
-        doctor_id = get_jwt_identity()
+        doctor_id = current_user_id('doctor')
+        if doctor_id is None:
+            return jsonify({'error': 'Doctor access required'}), 403
         doctor = Doctor.query.get_or_404(doctor_id)
         
         data = request.get_json()
@@ -55,8 +107,9 @@ def update_doctor_profile():
                 setattr(doctor, field, data[field])
         
         from models import db
-        with db.session.begin():
-            db.session.commit()
+        db.session.commit()
+        invalidate_doctor(doctor.id)
+        invalidate_identity('doctor', doctor.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -73,10 +126,8 @@ def get_doctor_patients():
         # Get doctor_id from JWT token (temporary fix)
         doctor_id = request.args.get('doctor_id') or 1  # Default to doctor ID 1 for testing
         
-        # Get all patients who have appointments with this doctor
-        appointments = Appointment.query.filter_by(doctor_id=doctor_id).all()
-        patient_ids = list(set([apt.patient_id for apt in appointments]))
-        patients = Patient.query.filter(Patient.id.in_(patient_ids)).all()
+        # Patients with at least one live or archived appointment with this doctor, deduplicated in SQL
+        patients = Patient.query.filter(Patient.id.in_(doctor_patient_ids(int(doctor_id)))).order_by(Patient.id).all()
         
         return jsonify({
             'patients': [patient.to_dict() for patient in patients]
@@ -86,29 +137,59 @@ def get_doctor_patients():
         return jsonify({'error': str(e)}), 500
 
 
+@doctor_bp.route('/summary', methods=['GET'])
+@jwt_required()
+def get_doctor_summary():
+    try:
+        doctor_id = current_user_id('doctor')
+        if doctor_id is None:
+            return jsonify({'error': 'Doctor access required'}), 403
+        
+        # Date range for status counts and the per-day histogram, defaulting to the next 30 days
+        today = datetime.now().date()
+        try:
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else today
+            end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else start_date + timedelta(days=29)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        if end_date < start_date:
+            return jsonify({'error': 'end_date must not be before start_date'}), 400
+        if (end_date - start_date).days >= MAX_SUMMARY_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_SUMMARY_DAYS} days'}), 400
+        
+        return jsonify(doctor_summary(doctor_id, start_date, end_date, today)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @doctor_bp.route('/appointments', methods=['GET'])
 @jwt_required()
 def get_doctor_appointments():
     try:
-        doctor_id = get_jwt_identity()
+        doctor_id = current_user_id('doctor')
+        if doctor_id is None:
+            return jsonify({'error': 'Doctor access required'}), 403
         
-        # Get query parameters for filtering
+        # Get query parameters for filtering; a date range (?date= or
+        # ?start_date= / ?end_date=) that reaches archived days also reads the archive
         status = request.args.get('status')
-        date = request.args.get('date')
-        
-        query = Appointment.query.filter_by(doctor_id=doctor_id)
         
-        if status:
-            query = query.filter_by(status=status)
+        # Field projection (?fields= / ?view=) and keyset pagination (?limit= / ?cursor= / ?stream=)
+        try:
+            fields = parse_appointment_fields(request.args)
+            page = parse_pagination(request.args, APPOINTMENT_KEYSET)
+            start_date, end_date = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if date:
-            query = query.filter_by(appointment_date=datetime.strptime(date, '%Y-%m-%d').date())
+        query, keyset = appointment_history_query(fields, start_date, end_date, doctor_id=doctor_id, status=status or None)
         
-        appointments = query.order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc()).all()
-        
-        return jsonify({
-            'appointments': [appointment.to_dict() for appointment in appointments]
-        }), 200
+        return list_response(
+            query, keyset, lambda appointment: appointment.to_dict(fields),
+            descending=True, envelope='appointments', **page
+        ), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
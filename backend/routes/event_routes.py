@@ -0,0 +1,150 @@
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import get_jwt, jwt_required
+from datetime import datetime
+import queue
+import random
+import time
+
+from models import db
+from services.events import appointment_changes, event_broker, format_sse
+from services.identity import STREAM_SCOPE, create_stream_token, current_identity
+from services.serialization import APPOINTMENT_COLUMNS
+
+event_bp = Blueprint('events', __name__)
+
+# Comment lines keep idle connections open through proxies
+HEARTBEAT_SECONDS = 15
+
+# Retry-After sent with 503 when a process already serves EVENT_MAX_STREAMS streams
+STREAM_BUSY_RETRY_SECONDS = 30
+
+@event_bp.route('/token', methods=['POST'])
+@jwt_required()
+def issue_stream_token():
+    try:
+        role, user_id = current_identity()
+        if role is None:
+            return jsonify({'error': 'User not found'}), 401
+        
+        return jsonify({
+            'token': create_stream_token(role, user_id),
+            'expires_in': current_app.config.get('EVENT_TOKEN_SECONDS', 60)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@event_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['query_string'])
+def stream_events():
+    # EventSource cannot send custom headers, so it connects with ?jwt=<token
+    # from POST /token>; long-lived access tokens are kept out of URLs
+    if get_jwt().get('scope') != STREAM_SCOPE:
+        return jsonify({'error': 'Stream token required'}), 401
+    
+    # Events for the caller's own appointments only
+    role, user_id = current_identity()
+    if role is None:
+        return jsonify({'error': 'User not found'}), 401
+    doctor_id, patient_id = (user_id, None) if role == 'doctor' else (None, user_id)
+    
+    # Other worker processes publish to their own broker; their changes reach
+    # this stream through the shared change feed every EVENT_POLL_SECONDS
+    poll_seconds = current_app.config.get('EVENT_POLL_SECONDS', 5)
+    # Ids sent on this stream are change feed cursors, so a reconnecting
+    # client resumes from the last one it saw instead of missing changes
+    resume_from = _resume_cursor()
+    since = resume_from or datetime.utcnow()
+    
+    # Every open stream holds a server thread; past the cap clients poll /changes
+    subscription = event_broker.subscribe(
+        doctor_id=doctor_id, patient_id=patient_id, limit=current_app.config.get('EVENT_MAX_STREAMS')
+    )
+    if subscription is None:
+        response = jsonify({
+            'error': 'Too many open event streams; poll /api/appointments/changes instead',
+            'retry_after': STREAM_BUSY_RETRY_SECONDS
+        })
+        response.headers['Retry-After'] = str(STREAM_BUSY_RETRY_SECONDS)
+        return response, 503
+    
+    # Streams end after EVENT_STREAM_MAX_SECONDS (spread out so clients do
+    # not all reconnect at once) and the browser reconnects by itself
+    max_seconds = current_app.config.get('EVENT_STREAM_MAX_SECONDS', 300)
+    closes_at = time.monotonic() + max_seconds * random.uniform(0.9, 1.0)
+    
+    def poll(since, streamed):
+        appointments, next_since = appointment_changes(since, doctor_id=doctor_id, patient_id=patient_id)
+        changes = [appointment.to_dict(APPOINTMENT_COLUMNS) for appointment in appointments]
+        # Hold no connection while the client is idle
+        db.session.remove()
+        
+        events = [
+            event_broker.event('appointment.updated', change['doctor_id'], change, patient_id=change['patient_id'])
+            for change in changes if streamed.get(change['id']) != change['updated_at']
+        ]
+        # Rows re-read inside the overlap window are only sent again if they changed
+        return next_since, events, {change['id']: change['updated_at'] for change in changes}
+    
+    def generate():
+        nonlocal since
+        streamed = {}
+        last_poll = last_write = time.monotonic()
+        wait = min(HEARTBEAT_SECONDS, poll_seconds) if poll_seconds > 0 else HEARTBEAT_SECONDS
+        try:
+            yield 'retry: 5000\n\n'
+            # A resumed stream first catches up on what happened while the client was away
+            catch_up = resume_from is not None
+            while time.monotonic() < closes_at:
+                if subscription.overflowed:
+                    # Client fell behind; it should reload via /api/appointments/changes
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                
+                if not catch_up:
+                    try:
+                        event = subscription.events.get(timeout=max(0, min(wait, closes_at - time.monotonic())))
+                    except queue.Empty:
+                        event = None
+                    if event is not None:
+                        if event['type'].startswith('appointment.'):
+                            streamed[event['data']['id']] = event['data'].get('updated_at')
+                        last_write = time.monotonic()
+                        yield format_sse(event, _cursor(since))
+                
+                if catch_up or (poll_seconds > 0 and time.monotonic() - last_poll >= poll_seconds):
+                    catch_up = False
+                    last_poll = time.monotonic()
+                    since, events, streamed = poll(since, streamed)
+                    for event in events:
+                        yield format_sse(event, _cursor(since))
+                    # Advance the client's Last-Event-ID even when nothing changed
+                    yield f'id: {_cursor(since)}\nevent: cursor\ndata: {{}}\n\n'
+                    last_write = time.monotonic()
+                
+                if time.monotonic() - last_write >= HEARTBEAT_SECONDS:
+                    last_write = time.monotonic()
+                    yield ': keep-alive\n\n'
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # The generator's own cleanup never runs if the client leaves before the first chunk
+    response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+    return response
+
+
+def _cursor(since):
+    return since.isoformat()
+
+
+def _resume_cursor():
+    """Change feed position from Last-Event-ID (or ?last_event_id= after a new token), if valid"""
+    value = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Patient, Appointment
+from flask_jwt_extended import jwt_required
+from models import db, Patient
 from datetime import datetime
-
-print('patient', __name__)
+from services.archive import appointment_history_query
+from services.identity import current_user_id, get_user_profile, invalidate_identity
+from services.pagination import list_response, parse_date_range, parse_pagination
+from services.serialization import APPOINTMENT_KEYSET, parse_appointment_fields
 
 patient_bp = Blueprint('patient', __name__)
 
@@ -11,10 +13,16 @@ patient_bp = Blueprint('patient', __name__)
 @jwt_required()
 def get_patient_profile():
     try:
-        patient_id = get_jwt_identity()
-        patient = Patient.query.get_or_404(patient_id)
+        patient_id = current_user_id('patient')
+        if patient_id is None:
+            return jsonify({'error': 'Patient access required'}), 403
+        
+        # Served from the identity cache in the common case
+        profile = get_user_profile('patient', patient_id)
+        if not profile:
+            return jsonify({'error': 'Patient not found'}), 404
         return jsonify({
-            'patient': patient.to_dict()
+            'patient': profile
         }), 200
         
     except Exception as e:
@@ -24,7 +32,9 @@ def get_patient_profile():
 @jwt_required()
 def update_patient_profile():
     try:
-        patient_id = get_jwt_identity()
+        patient_id = current_user_id('patient')
+        if patient_id is None:
+            return jsonify({'error': 'Patient access required'}), 403
         patient = Patient.query.get_or_404(patient_id)
         
         data = request.get_json()
@@ -38,9 +48,8 @@ def update_patient_profile():
                 else:
                     setattr(patient, field, data[field])
         
-        from models import db
-        with db.session.begin():
-            db.session.commit()
+        db.session.commit()
+        invalidate_identity('patient', patient.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -57,34 +66,24 @@ def get_patient_appointments():
         patient_id_header = request.headers.get('X-Patient-ID')
         patient_id = int(patient_id_header) if patient_id_header else 1  # Default to patient ID 1 for testing
         
-        print(f"=== DEBUGGING PATIENT APPOINTMENTS ===")
-        print(f"Patient ID from header: {patient_id_header}")
-        print(f"Using patient_id: {patient_id}")
-        print(f"Request headers: {dict(request.headers)}")
-        
-        # Get query parameters for filtering
+        # Get query parameters for filtering; a date range (?date= or
+        # ?start_date= / ?end_date=) that reaches archived days also reads the archive
         status = request.args.get('status')
-        date = request.args.get('date')
-        
-        query = Appointment.query.options(db.joinedload(Appointment.doctor)).filter_by(patient_id=patient_id)
         
-        if status:
-            query = query.filter_by(status=status)
+        # Field projection (?fields= / ?view=) and keyset pagination (?limit= / ?cursor= / ?stream=)
+        try:
+            fields = parse_appointment_fields(request.args)
+            page = parse_pagination(request.args, APPOINTMENT_KEYSET)
+            start_date, end_date = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if date:
-            query = query.filter_by(appointment_date=datetime.strptime(date, '%Y-%m-%d').date())
+        query, keyset = appointment_history_query(fields, start_date, end_date, patient_id=patient_id, status=status or None)
         
-        appointments = query.order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc()).all()
-        
-        print(f"Total appointments found: {len(appointments)}")
-        for apt in appointments:
-            print(f"Appointment ID: {apt.id}, Status: {apt.status}, Patient ID: {apt.patient_id}")
-        
-        print(f"=== END DEBUGGING ===")
-        
-        return jsonify({
-            'appointments': [appointment.to_dict() for appointment in appointments]
-        }), 200
+        return list_response(
+            query, keyset, lambda appointment: appointment.to_dict(fields),
+            descending=True, envelope='appointments', **page
+        ), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
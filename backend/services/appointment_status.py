@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import update
+
+from models import db, Appointment, Doctor, Patient
+from services.booking_service import release_slot, release_slots
+from services.email_service import email_service
+from services.events import event_broker
+from services.serialization import APPOINTMENT_COLUMNS, appointment_load_options
+
+# Largest number of appointments accepted by one batch request
+MAX_BATCH_TRANSITIONS = 500
+
+# Moving into these statuses mails the patient a cancellation notice
+CANCELLATION_STATUSES = ('cancelled', 'rejected')
+
+
+class StatusTransitionError(Exception):
+    """Raised when an appointment cannot move to the requested status"""
+
+
+def change_status(appointment, new_status):
+    """Move one appointment to new_status and commit, with any other pending changes
+
+    The single-appointment counterpart of apply_status_transitions: the move
+    must be an edge of Appointment.STATUS_TRANSITIONS and is written with a
+    WHERE on the status that was checked, an appointment leaving the active
+    statuses frees its slot in the same transaction, and the patient is
+    mailed on cancellation. Keeping the current status only commits.
+    Raises StatusTransitionError; returns the previous status.
+    """
+    old_status = appointment.status
+    if new_status != old_status:
+        if not Appointment.can_transition(old_status, new_status):
+            raise StatusTransitionError(f'Cannot change status from {old_status} to {new_status}')
+
+        changed = db.session.execute(
+            update(Appointment)
+            .where(Appointment.id == appointment.id, Appointment.status == old_status)
+            .values(status=new_status, updated_at=datetime.utcnow())
+        ).rowcount
+        if not changed:
+            db.session.rollback()
+            raise StatusTransitionError('Appointment status changed concurrently')
+
+        # No edge leads back into an active status, so a move never needs a slot
+        if old_status in Appointment.ACTIVE_STATUSES and new_status not in Appointment.ACTIVE_STATUSES:
+            release_slot(appointment)
+
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if new_status in CANCELLATION_STATUSES and old_status != new_status:
+        email_service.notify_appointment(appointment, 'cancelled')
+    event_broker.publish_appointment(appointment)
+    return old_status
+
+
+def apply_status_transitions(transitions, doctor_id=None):
+    """Apply {appointment_id: new_status} changes in one transaction
+
+    Every change is checked against Appointment.STATUS_TRANSITIONS. Valid
+    changes are written with one UPDATE per target status; its WHERE clause
+    repeats the allowed source statuses, so a row changed concurrently is
+    reported as a conflict instead of being moved along an invalid edge.
+    Slots of appointments leaving an active status are released in one more
+    UPDATE, and the cancellation mails go to EmailService as one batch.
+    With doctor_id set, appointments of other doctors are treated as missing.
+    """
+    current = dict(
+        db.session.query(Appointment.id, Appointment.status).filter(
+            Appointment.id.in_(list(transitions)),
+            *([Appointment.doctor_id == doctor_id] if doctor_id is not None else [])
+        ).all()
+    )
+
+    errors = []
+    unchanged = []
+    by_status = defaultdict(list)
+    for appointment_id, new_status in transitions.items():
+        old_status = current.get(appointment_id)
+        if old_status is None:
+            errors.append({'id': appointment_id, 'error': 'Appointment not found'})
+        elif old_status == new_status:
+            unchanged.append(appointment_id)
+        elif not Appointment.can_transition(old_status, new_status):
+            errors.append({'id': appointment_id, 'error': f'Cannot change status from {old_status} to {new_status}'})
+        else:
+            by_status[new_status].append(appointment_id)
+
+    now = datetime.utcnow()
+    updated = defaultdict(list)
+    try:
+        for new_status, appointment_ids in by_status.items():
+            result = db.session.execute(
+                update(Appointment)
+                .where(
+                    Appointment.id.in_(appointment_ids),
+                    Appointment.status.in_(Appointment.source_statuses(new_status))
+                )
+                .values(status=new_status, updated_at=now)
+                .returning(Appointment.id)
+                .execution_options(synchronize_session=False)
+            )
+            updated[new_status] = [row[0] for row in result]
+            for appointment_id in set(appointment_ids) - set(updated[new_status]):
+                errors.append({'id': appointment_id, 'error': 'Appointment status changed concurrently'})
+
+        # Slots of appointments that stopped being active become free again
+        released = [
+            appointment_id
+            for new_status, appointment_ids in updated.items()
+            if new_status not in Appointment.ACTIVE_STATUSES
+            for appointment_id in appointment_ids
+        ]
+        if released:
+            release_slots(
+                db.session.query(
+                    Appointment.doctor_id, Appointment.appointment_date,
+                    Appointment.appointment_time, Appointment.duration_minutes
+                ).filter(Appointment.id.in_(released)).all()
+            )
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    changed_ids = [appointment_id for appointment_ids in updated.values() for appointment_id in appointment_ids]
+    appointments = Appointment.query.options(*appointment_load_options(APPOINTMENT_COLUMNS)).filter(
+        Appointment.id.in_(changed_ids)
+    ).order_by(Appointment.id).all() if changed_ids else []
+
+    for appointment in appointments:
+        event_broker.publish_appointment(appointment)
+
+    cancelled = [
+        appointment_id
+        for new_status in CANCELLATION_STATUSES
+        for appointment_id in updated.get(new_status, [])
+    ]
+    emails = email_service.notify_appointments(_mail_details(cancelled), 'cancelled') if cancelled else 0
+
+    return {
+        'updated': [appointment.to_dict(APPOINTMENT_COLUMNS) for appointment in appointments],
+        'unchanged': sorted(unchanged),
+        'errors': sorted(errors, key=lambda error: error['id']),
+        'emails_queued': emails,
+    }
+
+
+def _mail_details(appointment_ids):
+    rows = db.session.query(
+        Patient.email, Patient.name, Doctor.name,
+        Appointment.appointment_date, Appointment.appointment_time
+    ).join(Patient, Appointment.patient_id == Patient.id).join(
+        Doctor, Appointment.doctor_id == Doctor.id
+    ).filter(Appointment.id.in_(appointment_ids)).all()
+
+    return [
+        (email, patient_name, doctor_name, appointment_date.isoformat(), appointment_time.strftime('%H:%M'))
+        for email, patient_name, doctor_name, appointment_date, appointment_time in rows
+    ]
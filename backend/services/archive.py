@@ -0,0 +1,270 @@
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+import click
+from sqlalchemy import delete, func, insert, literal, select, union, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from models import db, Appointment, ArchivedAppointment
+from models.engine import checkpoint_wal
+from services.job_lease import Lease
+from services.occupancy import vacate
+from services.serialization import APPOINTMENT_KEYSET, appointment_load_options
+
+logger = logging.getLogger(__name__)
+
+# Columns copied into the archive; ArchivedAppointment adds archived_at
+HISTORY_COLUMNS = tuple(column.key for column in Appointment.__table__.columns)
+
+# job_leases row that lets one process at a time archive
+ARCHIVE_LEASE = 'appointment-archiver'
+
+
+class AppointmentArchiver:
+    """Moves appointments dated before the horizon into appointments_archive
+
+    Each batch copies the oldest rows and deletes them from the live table in
+    one transaction, so an interrupted run leaves every row in exactly one
+    table and the next run simply continues with what is left. Every worker
+    process starts an archiver, but a run only goes ahead in the process
+    that holds the ARCHIVE_LEASE row, at most once per interval; SQLite
+    ignores SKIP LOCKED, so the lease is what keeps runs apart. The archiver
+    pauses between batches so live bookings get the write lock.
+    """
+
+    def __init__(self, after_days=365, interval_seconds=3600, batch_size=1000, pause_seconds=0.05, lease_seconds=300):
+        self.after_days = after_days
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.lease_seconds = lease_seconds
+
+        self._app = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self, app):
+        if self._thread and self._thread.is_alive():
+            return
+        self._app = app
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='appointment-archiver', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        lease = Lease(ARCHIVE_LEASE, self.lease_seconds)
+        while not self._stopping.is_set():
+            try:
+                with self._app.app_context():
+                    if lease.acquire(min_interval=self.interval_seconds):
+                        completed = False
+                        try:
+                            self.run_once(lease=lease)
+                            completed = True
+                        finally:
+                            lease.release(completed)
+            except Exception:
+                logger.exception('Appointment archival failed')
+            self._stopping.wait(self.interval_seconds)
+
+    def cutoff(self, today=None):
+        """Appointments dated before this day are archived"""
+        return (today or date.today()) - timedelta(days=self.after_days)
+
+    def run_once(self, today=None, before=None, max_batches=None, lease=None):
+        """Archive everything dated before the cutoff (or before=); must run inside an app context
+
+        With a lease, it is renewed after every batch and the run stops if
+        another process has taken the job over.
+        """
+        before = before or self.cutoff(today)
+        stats = {'before': before.isoformat(), 'archived': 0, 'already_archived': 0, 'batches': 0, 'conflicts': 0}
+
+        while max_batches is None or stats['batches'] < max_batches:
+            rows = self._next_batch(before)
+            if not rows:
+                break
+
+            stats['batches'] += 1
+            try:
+                copied = self._move(rows, datetime.utcnow())
+                stats['archived'] += copied
+                stats['already_archived'] += len(rows) - copied
+            except IntegrityError:
+                # Another archiver copied some of these rows between our read
+                # and write; the same batch would fail again, so leave the
+                # rest to the next run
+                db.session.rollback()
+                stats['conflicts'] += 1
+                break
+
+            if lease is not None and not lease.renew():
+                logger.warning('Archiver lease lapsed; stopping after %d batches', stats['batches'])
+                break
+            if self._stopping.wait(self.pause_seconds):
+                break
+
+        if stats['archived']:
+            logger.info('Archived %d appointments dated before %s', stats['archived'], stats['before'])
+            checkpoint_wal()
+        return stats
+
+    def _next_batch(self, before):
+        # SQLite reuses the largest rowid after a delete; keeping the newest
+        # row in place means an archived id is never handed out again
+        newest_id = db.session.query(func.max(Appointment.id)).scalar()
+        if newest_id is None:
+            return []
+
+        return db.session.query(
+            Appointment.id, Appointment.doctor_id, Appointment.appointment_date,
+            Appointment.appointment_time, Appointment.duration_minutes, Appointment.status
+        ).filter(
+            Appointment.appointment_date < before,
+            Appointment.id < newest_id
+        ).order_by(
+            Appointment.appointment_date, Appointment.id
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+    def _move(self, rows, now):
+        """Copy the rows into the archive and delete them; returns how many were copied
+
+        Rows whose id is already archived (left behind by an earlier run) are
+        only deleted, so a batch cannot fail on them over and over.
+        """
+        appointment_ids = [row.id for row in rows]
+        archived_ids = {
+            archived_id for (archived_id,) in
+            db.session.query(ArchivedAppointment.id).filter(ArchivedAppointment.id.in_(appointment_ids))
+        }
+        copy_ids = [appointment_id for appointment_id in appointment_ids if appointment_id not in archived_ids]
+        if copy_ids:
+            db.session.execute(
+                insert(ArchivedAppointment).from_select(
+                    HISTORY_COLUMNS + ('archived_at',),
+                    select(*[getattr(Appointment, column) for column in HISTORY_COLUMNS], literal(now))
+                    .where(Appointment.id.in_(copy_ids))
+                )
+            )
+        # Past bookings that never reached a final status still hold occupancy bits
+        vacate([
+            (row.doctor_id, row.appointment_date, row.appointment_time, row.duration_minutes)
+            for row in rows if row.status in Appointment.ACTIVE_STATUSES
+        ])
+        db.session.execute(
+            delete(Appointment)
+            .where(Appointment.id.in_(appointment_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return len(copy_ids)
+
+
+def newest_archived_date():
+    return db.session.query(func.max(ArchivedAppointment.appointment_date)).scalar()
+
+
+def reaches_archive(start_date=None, end_date=None):
+    """Whether a listing filtered to [start_date, end_date] can include archived appointments
+
+    Listings without any date filter show live appointments only.
+    """
+    if start_date is None and end_date is None:
+        return False
+    newest = newest_archived_date()
+    return newest is not None and (start_date is None or start_date <= newest)
+
+
+def appointment_history_query(fields, start_date=None, end_date=None, **filters):
+    """(query, keyset columns) for an appointment listing
+
+    filters are column equality filters such as doctor_id or status (None
+    values are ignored). The query reads the live table, plus the archive
+    when the date range reaches archived days; both branches are filtered
+    before the union so each uses its own doctor/patient index.
+    """
+    filters = {key: value for key, value in filters.items() if value is not None}
+
+    def restrict(statement, model):
+        for key, value in filters.items():
+            statement = statement.filter(getattr(model, key) == value)
+        if start_date is not None:
+            statement = statement.filter(model.appointment_date >= start_date)
+        if end_date is not None:
+            statement = statement.filter(model.appointment_date <= end_date)
+        return statement
+
+    if not reaches_archive(start_date, end_date):
+        query = restrict(Appointment.query.options(*appointment_load_options(fields)), Appointment)
+        return query, APPOINTMENT_KEYSET
+
+    branches = [
+        restrict(select(*[getattr(model, column) for column in HISTORY_COLUMNS]), model)
+        for model in (Appointment, ArchivedAppointment)
+    ]
+    history = aliased(Appointment, union_all(*branches).subquery('appointment_history'))
+    query = db.session.query(history).options(*appointment_load_options(fields, history))
+    return query, (history.appointment_date, history.appointment_time, history.id)
+
+
+def doctor_patient_ids(doctor_id):
+    """SELECT of the distinct patients with a live or archived appointment with the doctor"""
+    return union(
+        select(Appointment.patient_id).where(Appointment.doctor_id == doctor_id),
+        select(ArchivedAppointment.patient_id).where(ArchivedAppointment.doctor_id == doctor_id)
+    )
+
+
+def find_appointment(appointment_id):
+    """A live appointment, or its archived copy; None when neither exists"""
+    return db.session.get(Appointment, appointment_id) or db.session.get(ArchivedAppointment, appointment_id)
+
+
+def init_archiver(app):
+    """Start the appointment archiver when ARCHIVE_ENABLED is set"""
+    if not app.config.get('ARCHIVE_ENABLED'):
+        return None
+
+    archiver = AppointmentArchiver(
+        after_days=app.config.get('ARCHIVE_AFTER_DAYS', 365),
+        interval_seconds=app.config.get('ARCHIVE_INTERVAL_SECONDS', 3600),
+        batch_size=app.config.get('ARCHIVE_BATCH_SIZE', 1000),
+        pause_seconds=app.config.get('ARCHIVE_BATCH_PAUSE_SECONDS', 0.05),
+        lease_seconds=app.config.get('JOB_LEASE_SECONDS', 300)
+    )
+    archiver.start(app)
+    app.extensions['appointment_archiver'] = archiver
+    return archiver
+
+
+def register_archive_commands(app):
+    """flask archive-appointments [--before YYYY-MM-DD] [--batch-size N] [--max-batches N]"""
+
+    @app.cli.command('archive-appointments')
+    @click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), help='Archive appointments dated before this day')
+    @click.option('--batch-size', type=int, help='Appointments moved per transaction')
+    @click.option('--max-batches', type=int, help='Stop after this many batches; the next run resumes')
+    def archive_appointments(before, batch_size, max_batches):
+        archiver = AppointmentArchiver(
+            after_days=app.config.get('ARCHIVE_AFTER_DAYS', 365),
+            batch_size=batch_size or app.config.get('ARCHIVE_BATCH_SIZE', 1000),
+            pause_seconds=0
+        )
+        # Never alongside a server's archiver (or another cron run)
+        lease = Lease(ARCHIVE_LEASE, app.config.get('JOB_LEASE_SECONDS', 300))
+        if not lease.acquire():
+            raise click.ClickException('Another process is archiving appointments; try again later')
+        completed = False
+        try:
+            stats = archiver.run_once(before=before.date() if before else None, max_batches=max_batches, lease=lease)
+            completed = True
+        finally:
+            lease.release(completed)
+        click.echo(', '.join(f'{key}={value}' for key, value in stats.items()))
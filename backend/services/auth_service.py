@@ -0,0 +1,89 @@
+import logging
+import secrets
+
+from flask import current_app, request
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from models import db
+from services.rate_limiter import TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class LoginThrottled(Exception):
+    """Raised when a login attempt exceeds the per-IP or per-account rate"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many login attempts. Try again later.')
+        self.retry_after = retry_after
+
+
+class AuthService:
+    """Password hashing and throttled credential checks for the login routes"""
+
+    def __init__(self):
+        # method -> (stored hash prefix, hash of a random password)
+        self._method_info = {}
+
+    def hash_password(self, password):
+        return generate_password_hash(password, method=self._method())
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with different parameters than configured"""
+        return password_hash.split('$', 1)[0] != self._info()[0]
+
+    def authenticate(self, model, email, password):
+        """Return the user with these credentials or None, in roughly constant time
+
+        Unknown emails are checked against a dummy hash of the configured cost,
+        so response time does not reveal which accounts exist. Correct
+        passwords stored with outdated parameters are rehashed.
+        """
+        self.throttle(model.__tablename__, email)
+
+        user = model.query.filter_by(email=email).first()
+        if user is None:
+            check_password_hash(self._info()[1], password)
+            return None
+
+        if not check_password_hash(user.password, password):
+            return None
+
+        if self.needs_rehash(user.password):
+            user.password = self.hash_password(password)
+            db.session.commit()
+            logger.info('Rehashed password for %s %s', model.__tablename__, user.id)
+        return user
+
+    def throttle(self, scope, email):
+        """Consume one attempt from the caller's IP bucket and the account's bucket"""
+        config = current_app.config
+        if not config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+            return
+
+        limiters = (
+            (TokenBucketLimiter(config['LOGIN_IP_PER_MINUTE'] / 60, config['LOGIN_IP_BURST'], 'login:ip'),
+             request.remote_addr or 'unknown'),
+            (TokenBucketLimiter(config['LOGIN_ACCOUNT_PER_MINUTE'] / 60, config['LOGIN_ACCOUNT_BURST'], f'login:{scope}'),
+             (email or '').strip().lower()),
+        )
+        for limiter, key in limiters:
+            allowed, retry_after = limiter.hit(key)
+            if not allowed:
+                raise LoginThrottled(retry_after)
+
+    def _method(self):
+        return current_app.config.get('PASSWORD_HASH_METHOD') or 'pbkdf2'
+
+    def _info(self):
+        method = self._method()
+        info = self._method_info.get(method)
+        if info is None:
+            dummy = generate_password_hash(secrets.token_urlsafe(16), method=method)
+            info = (dummy.split('$', 1)[0], dummy)
+            self._method_info[method] = info
+        return info
+
+
+# Create a singleton instance
+auth_service = AuthService()
@@ -0,0 +1,170 @@
+import logging
+import threading
+from datetime import date, timedelta
+
+import click
+from sqlalchemy import delete
+
+from models import db, Availability, Doctor
+from models.engine import checkpoint_wal
+from services.job_lease import Lease
+from services.occupancy import refresh_days
+
+logger = logging.getLogger(__name__)
+
+# job_leases row that lets one process at a time clean up
+CLEANUP_LEASE = 'availability-cleaner'
+
+
+class AvailabilityCleaner:
+    """Deletes unbooked availability slots dated before the retention window
+
+    Works one doctor at a time over the (doctor_id, date, is_booked) index, in
+    small batches that each delete the slots and recompute the affected
+    occupancy days in one transaction, so a run can stop anywhere and the next
+    one picks up the remaining slots. Booked slots are kept; they back the
+    appointment history and the dashboard's booked-slot counts. As with the
+    archiver, only the process holding the CLEANUP_LEASE row runs a round.
+    """
+
+    def __init__(self, retention_days=30, interval_seconds=3600, batch_size=500, pause_seconds=0.05, lease_seconds=300):
+        self.retention_days = retention_days
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.lease_seconds = lease_seconds
+
+        self._app = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self, app):
+        if self._thread and self._thread.is_alive():
+            return
+        self._app = app
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='availability-cleaner', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        lease = Lease(CLEANUP_LEASE, self.lease_seconds)
+        while not self._stopping.is_set():
+            try:
+                with self._app.app_context():
+                    if lease.acquire(min_interval=self.interval_seconds):
+                        completed = False
+                        try:
+                            self.run_once(lease=lease)
+                            completed = True
+                        finally:
+                            lease.release(completed)
+            except Exception:
+                logger.exception('Availability cleanup failed')
+            self._stopping.wait(self.interval_seconds)
+
+    def cutoff(self, today=None):
+        """Unbooked slots dated before this day are deleted"""
+        return (today or date.today()) - timedelta(days=self.retention_days)
+
+    def run_once(self, today=None, before=None, max_batches=None, lease=None):
+        """Delete every expired unbooked slot once; must run inside an app context
+
+        With a lease, it is renewed after every batch and the run stops if
+        another process has taken the job over.
+        """
+        before = before or self.cutoff(today)
+        stats = {'before': before.isoformat(), 'deleted': 0, 'batches': 0, 'doctors': 0}
+
+        doctor_ids = [doctor_id for (doctor_id,) in db.session.query(Doctor.id).order_by(Doctor.id)]
+        lost = False
+        for doctor_id in doctor_ids:
+            cleaned = False
+            while max_batches is None or stats['batches'] < max_batches:
+                slots = self._next_batch(doctor_id, before)
+                if not slots:
+                    break
+
+                self._delete(doctor_id, slots)
+                stats['batches'] += 1
+                stats['deleted'] += len(slots)
+                cleaned = True
+                if lease is not None and not lease.renew():
+                    logger.warning('Availability cleaner lease lapsed; stopping after %d batches', stats['batches'])
+                    lost = True
+                    break
+                if self._stopping.wait(self.pause_seconds):
+                    break
+            if cleaned:
+                stats['doctors'] += 1
+            if lost or self._stopping.is_set() or (max_batches is not None and stats['batches'] >= max_batches):
+                break
+
+        if stats['deleted']:
+            logger.info('Deleted %d expired availability slots dated before %s', stats['deleted'], stats['before'])
+            checkpoint_wal()
+        return stats
+
+    def _next_batch(self, doctor_id, before):
+        return db.session.query(Availability.id, Availability.date).filter(
+            Availability.doctor_id == doctor_id,
+            Availability.date < before,
+            Availability.is_booked.is_(False)
+        ).order_by(Availability.date).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+    def _delete(self, doctor_id, slots):
+        db.session.execute(
+            delete(Availability)
+            .where(Availability.id.in_([slot.id for slot in slots]), Availability.is_booked.is_(False))
+            .execution_options(synchronize_session=False)
+        )
+        # Past days lose their published minutes; days left empty drop their row
+        refresh_days({(doctor_id, slot.date) for slot in slots})
+        db.session.commit()
+
+
+def init_availability_cleanup(app):
+    """Start the availability cleaner when AVAILABILITY_CLEANUP_ENABLED is set"""
+    if not app.config.get('AVAILABILITY_CLEANUP_ENABLED'):
+        return None
+
+    cleaner = AvailabilityCleaner(
+        retention_days=app.config.get('AVAILABILITY_RETENTION_DAYS', 30),
+        interval_seconds=app.config.get('AVAILABILITY_CLEANUP_INTERVAL_SECONDS', 3600),
+        batch_size=app.config.get('AVAILABILITY_CLEANUP_BATCH_SIZE', 500),
+        pause_seconds=app.config.get('AVAILABILITY_CLEANUP_PAUSE_SECONDS', 0.05),
+        lease_seconds=app.config.get('JOB_LEASE_SECONDS', 300)
+    )
+    cleaner.start(app)
+    app.extensions['availability_cleaner'] = cleaner
+    return cleaner
+
+
+def register_availability_commands(app):
+    """flask purge-availability [--before YYYY-MM-DD] [--batch-size N] [--max-batches N]"""
+
+    @app.cli.command('purge-availability')
+    @click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), help='Delete unbooked slots dated before this day')
+    @click.option('--batch-size', type=int, help='Slots deleted per transaction')
+    @click.option('--max-batches', type=int, help='Stop after this many batches; the next run resumes')
+    def purge_availability(before, batch_size, max_batches):
+        cleaner = AvailabilityCleaner(
+            retention_days=app.config.get('AVAILABILITY_RETENTION_DAYS', 30),
+            batch_size=batch_size or app.config.get('AVAILABILITY_CLEANUP_BATCH_SIZE', 500),
+            pause_seconds=0
+        )
+        # Never alongside a server's cleaner (or another cron run)
+        lease = Lease(CLEANUP_LEASE, app.config.get('JOB_LEASE_SECONDS', 300))
+        if not lease.acquire():
+            raise click.ClickException('Another process is purging availability; try again later')
+        completed = False
+        try:
+            stats = cleaner.run_once(before=before.date() if before else None, max_batches=max_batches, lease=lease)
+            completed = True
+        finally:
+            lease.release(completed)
+        click.echo(', '.join(f'{key}={value}' for key, value in stats.items()))
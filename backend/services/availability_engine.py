@@ -0,0 +1,118 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from flask import current_app
+
+from services.occupancy import DAY_MINUTES, interval_mask, intervals_mask, load_days, mask_intervals
+
+# Intervals are half-open (start, end) pairs in minutes since midnight, kept
+# per (doctor_id, date). Working windows come from published Availability rows
+# (each row opens one slot) or the default working hours when a doctor has not
+# published anything for a day; busy intervals come from active appointments.
+# Both are read from the materialised DoctorDayOccupancy rows, so any range of
+# days costs one indexed read and a single day is a single row.
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def slot_starts(free, duration, step):
+    """Start minutes of every duration-long slot that fits inside the free intervals"""
+    starts = []
+    for start, end in free:
+        candidate = start
+        while candidate + duration <= end:
+            starts.append(candidate)
+            candidate += step
+    return starts
+
+
+def slot_minutes():
+    return current_app.config.get('SLOT_MINUTES', 30)
+
+
+def default_windows():
+    start_hour, end_hour = current_app.config.get('DEFAULT_WORKING_HOURS', (9, 17))
+    return [(start_hour * 60, end_hour * 60)]
+
+
+def free_mask(published, busy, day, now=None, defaults=None):
+    """Bookable minutes of one day: its published (or default) hours minus busy and past time"""
+    now = now or datetime.now()
+    if day < now.date():
+        return 0
+    if published is None:
+        published = defaults if defaults is not None else intervals_mask(default_windows())
+
+    free = published & ~busy
+    # Nothing before the current time can be booked
+    if day == now.date():
+        free &= ~interval_mask(0, to_minutes(now.time()) + 1)
+    return free
+
+
+def free_intervals(doctor_ids, start_date, end_date, now=None):
+    """Free intervals for every doctor and day in the range, from one occupancy read"""
+    now = now or datetime.now()
+    days = load_days(doctor_ids, start_date, end_date)
+    defaults = intervals_mask(default_windows())
+
+    result = defaultdict(dict)
+    day = start_date
+    while day <= end_date:
+        for doctor_id in doctor_ids:
+            published, busy = days.get((doctor_id, day), (None, 0))
+            result[doctor_id][day] = mask_intervals(free_mask(published, busy, day, now, defaults))
+        day += timedelta(days=1)
+
+    return result
+
+
+def find_free_slots(doctor_ids, start_date, end_date, duration=None, step=None, now=None):
+    """Bookable slot start times as {doctor_id: {date: [time, ...]}}"""
+    duration = duration or slot_minutes()
+    step = step or slot_minutes()
+
+    slots = defaultdict(dict)
+    for doctor_id, days in free_intervals(doctor_ids, start_date, end_date, now).items():
+        for day, free in days.items():
+            slots[doctor_id][day] = [from_minutes(start) for start in slot_starts(free, duration, step)]
+    return slots
+
+
+def is_bookable(occupancy, appointment_date, start, end, now=None):
+    """Whether [start, end) lies inside the free time of one DoctorDayOccupancy row (or None)"""
+    if end > DAY_MINUTES:
+        return False
+    published, busy = (occupancy.published_mask, occupancy.busy_mask) if occupancy else (None, 0)
+    wanted = interval_mask(start, end)
+    return free_mask(published, busy, appointment_date, now) & wanted == wanted
+
+
+def free_days(doctor_id, start_date, end_date, duration=None, now=None):
+    """Dates in the range on which at least one duration-long slot is free"""
+    duration = duration or slot_minutes()
+    days = free_intervals([doctor_id], start_date, end_date, now)[doctor_id]
+    return [day for day, free in sorted(days.items()) if any(end - start >= duration for start, end in free)]
+
+
+def exclude_busy_slots(doctor_id, slots):
+    """Drop published Availability rows that an active appointment overlaps"""
+    if not slots:
+        return []
+
+    length = slot_minutes()
+    days = load_days([doctor_id], min(slot.date for slot in slots), max(slot.date for slot in slots))
+
+    free_slots = []
+    for slot in slots:
+        start = to_minutes(slot.time)
+        _, busy = days.get((doctor_id, slot.date), (None, 0))
+        if not busy & interval_mask(start, start + length):
+            free_slots.append(slot)
+    return free_slots
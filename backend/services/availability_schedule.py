@@ -0,0 +1,180 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Availability
+from services.availability_engine import DAY_MINUTES, default_windows, from_minutes, slot_minutes, to_minutes
+from services.occupancy import refresh_days
+
+# Upper bounds for one bulk request
+MAX_BULK_SLOTS = 10000
+MAX_SCHEDULE_DAYS = 366
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def parse_slot_list(items):
+    """[{'date': 'YYYY-MM-DD', 'time': 'HH:MM'}, ...] -> list of (date, time)"""
+    if not isinstance(items, list):
+        raise ValueError('slots must be a list of {"date", "time"} objects')
+
+    slots = []
+    for item in items:
+        try:
+            slots.append((
+                datetime.strptime(item['date'], '%Y-%m-%d').date(),
+                datetime.strptime(item['time'], '%H:%M').time()
+            ))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Invalid slot {item!r}. Use YYYY-MM-DD for date and HH:MM for time')
+    return slots
+
+
+def expand_recurrence(rule):
+    """Expand a weekly recurrence rule into (date, time) slots
+
+    rule: start_date, end_date (inclusive), weekdays (0-6 with Monday = 0, or
+    'mon'..'sun'; default every day), hours (list of {'start', 'end'} windows;
+    default working hours), slot_minutes (a multiple of SLOT_MINUTES,
+    default SLOT_MINUTES; each block is split into SLOT_MINUTES slots) and
+    exclude_dates (list of dates to skip).
+    """
+    if not isinstance(rule, dict):
+        raise ValueError('recurrence must be an object')
+
+    try:
+        start_date = _parse_date(rule['start_date'])
+        end_date = _parse_date(rule['end_date'])
+        exclude_dates = {_parse_date(value) for value in rule.get('exclude_dates') or []}
+    except KeyError as e:
+        raise ValueError(f'recurrence.{e.args[0]} is required')
+
+    if end_date < start_date:
+        raise ValueError('recurrence.end_date must not be before start_date')
+    if (end_date - start_date).days >= MAX_SCHEDULE_DAYS:
+        raise ValueError(f'Recurrence cannot span more than {MAX_SCHEDULE_DAYS} days')
+
+    weekdays = _parse_weekdays(rule.get('weekdays'))
+    windows = _parse_windows(rule.get('hours'))
+
+    # Every Availability row is one SLOT_MINUTES window to occupancy and the
+    # engine, so longer blocks are published as consecutive sub-slots
+    step = slot_minutes()
+    length = rule.get('slot_minutes') or step
+    if not isinstance(length, int) or length <= 0 or length % step:
+        raise ValueError(f'recurrence.slot_minutes must be a positive multiple of {step}')
+
+    day_starts = [
+        from_minutes(minute)
+        for window_start, window_end in windows
+        for block in range(window_start, window_end - length + 1, length)
+        for minute in range(block, block + length, step)
+    ]
+
+    slots = []
+    current = start_date
+    while current <= end_date:
+        if current.weekday() in weekdays and current not in exclude_dates:
+            slots.extend((current, slot_time) for slot_time in day_starts)
+        current += timedelta(days=1)
+    return slots
+
+
+def bulk_create_slots(doctor_id, slots, today=None):
+    """Insert the new slots for a doctor in one transaction
+
+    Duplicates within the request, past dates and slots that already exist
+    are skipped. Existing rows are found with one query over the requested
+    date range, and the rest are inserted with a single executemany.
+    Returns {'created', 'skipped', 'skipped_past', 'start_date', 'end_date'}.
+    """
+    today = today or date.today()
+    requested = set(slots)
+    if len(requested) > MAX_BULK_SLOTS:
+        raise ValueError(f'Cannot create more than {MAX_BULK_SLOTS} slots in one request')
+
+    future = {slot for slot in requested if slot[0] >= today}
+    summary = {
+        'created': 0,
+        'skipped': len(slots),
+        'skipped_past': len(requested) - len(future),
+        'start_date': min(future)[0].isoformat() if future else None,
+        'end_date': max(future)[0].isoformat() if future else None,
+    }
+    if not future:
+        return summary
+
+    # A concurrent request may insert the same slots between our read and
+    # write; the unique index rejects the batch and one retry re-reads them
+    for attempt in range(2):
+        try:
+            new_slots = sorted(future - _existing_slots(doctor_id, future))
+            if new_slots:
+                db.session.execute(insert(Availability), [
+                    {'doctor_id': doctor_id, 'date': slot_date, 'time': slot_time, 'is_booked': False}
+                    for slot_date, slot_time in new_slots
+                ])
+                refresh_days({(doctor_id, slot_date) for slot_date, _ in new_slots})
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+
+    summary['created'] = len(new_slots)
+    summary['skipped'] = len(slots) - len(new_slots)
+    return summary
+
+
+def _existing_slots(doctor_id, slots):
+    dates = [slot_date for slot_date, _ in slots]
+    rows = db.session.query(Availability.date, Availability.time).filter(
+        Availability.doctor_id == doctor_id,
+        Availability.date >= min(dates),
+        Availability.date <= max(dates)
+    )
+    if len(slots) <= 500:
+        # Small requests match exactly the requested slots instead of the whole range
+        rows = rows.filter(tuple_(Availability.date, Availability.time).in_(slots))
+    return set(rows.all())
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid date {value!r}. Use YYYY-MM-DD')
+
+
+def _parse_weekdays(values):
+    if values is None:
+        return set(range(7))
+
+    weekdays = set()
+    for value in values:
+        if isinstance(value, str) and value.lower()[:3] in WEEKDAYS:
+            weekdays.add(WEEKDAYS.index(value.lower()[:3]))
+        elif isinstance(value, int) and 0 <= value <= 6:
+            weekdays.add(value)
+        else:
+            raise ValueError(f'Invalid weekday {value!r}. Use 0-6 (Monday = 0) or mon..sun')
+    return weekdays
+
+
+def _parse_windows(values):
+    if not values:
+        return default_windows()
+
+    windows = []
+    for value in values:
+        try:
+            start = to_minutes(datetime.strptime(value['start'], '%H:%M').time())
+            end = to_minutes(datetime.strptime(value['end'], '%H:%M').time()) if value['end'] != '24:00' else DAY_MINUTES
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Invalid hours {value!r}. Use {{"start": "HH:MM", "end": "HH:MM"}}')
+        if end <= start:
+            raise ValueError(f'Invalid hours {value!r}: end must be after start')
+        windows.append((start, end))
+    return windows
@@ -0,0 +1,104 @@
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Appointment, Availability
+from services.availability_engine import DAY_MINUTES, from_minutes, is_bookable, slot_minutes, to_minutes
+from services.occupancy import load_day, lock_doctors, occupy, vacate
+
+
+class SlotUnavailableError(Exception):
+    """Raised when the requested doctor slot cannot be reserved"""
+
+
+def reserve_slot(patient_id, doctor_id, appointment_date, appointment_time, duration_minutes=30, notes=''):
+    """Book a doctor slot in a single transaction, raising SlotUnavailableError on conflict"""
+    try:
+        # Serialize bookings for this doctor: the row lock (SQLite: write lock)
+        # is held until commit, so the checks below cannot interleave
+        lock_doctors([doctor_id])
+
+        # One occupancy row decides; its busy minutes cover every active appointment
+        occupancy = load_day(doctor_id, appointment_date)
+        start = to_minutes(appointment_time)
+        if not is_bookable(occupancy, appointment_date, start, start + duration_minutes):
+            raise SlotUnavailableError('This appointment slot is not available')
+
+        _set_slots_booked(doctor_id, appointment_date, appointment_time, duration_minutes, True)
+
+        appointment = Appointment(
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            appointment_date=appointment_date,
+            appointment_time=appointment_time,
+            duration_minutes=duration_minutes,
+            notes=notes
+        )
+        db.session.add(appointment)
+
+        # The unique active-slot index is the last line of defence
+        db.session.flush()
+        occupy(occupancy, doctor_id, appointment_date, start, start + duration_minutes)
+        db.session.commit()
+        return appointment
+
+    except IntegrityError:
+        db.session.rollback()
+        raise SlotUnavailableError('This appointment slot is already booked')
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def release_slot(appointment):
+    """Mark the availability rows covered by an appointment as free again
+
+    Call after the appointment left the active statuses; its busy minutes
+    are cleared from the day's occupancy in the same transaction.
+    """
+    _set_slots_booked(
+        appointment.doctor_id, appointment.appointment_date,
+        appointment.appointment_time, appointment.duration_minutes or 30, False
+    )
+    vacate([(
+        appointment.doctor_id, appointment.appointment_date,
+        appointment.appointment_time, appointment.duration_minutes
+    )])
+
+
+def release_slots(appointments):
+    """release_slot for many (doctor_id, date, time, duration) rows in one UPDATE"""
+    if not appointments:
+        return
+    db.session.execute(
+        update(Availability)
+        .where(or_(*[
+            _slot_window(doctor_id, appointment_date, start_time, duration_minutes or 30)
+            for doctor_id, appointment_date, start_time, duration_minutes in appointments
+        ]))
+        .values(is_booked=False)
+        .execution_options(synchronize_session=False)
+    )
+    vacate(appointments)
+
+
+def _set_slots_booked(doctor_id, appointment_date, start_time, duration_minutes, is_booked):
+    db.session.execute(
+        update(Availability)
+        .where(_slot_window(doctor_id, appointment_date, start_time, duration_minutes))
+        .values(is_booked=is_booked)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _slot_window(doctor_id, appointment_date, start_time, duration_minutes):
+    # Published slots whose window overlaps the appointment interval
+    start = to_minutes(start_time)
+    first_slot = max(start - slot_minutes() + 1, 0)
+    last_slot = min(start + duration_minutes, DAY_MINUTES) - 1
+
+    return and_(
+        Availability.doctor_id == doctor_id,
+        Availability.date == appointment_date,
+        Availability.time >= from_minutes(first_slot),
+        Availability.time <= from_minutes(last_slot)
+    )
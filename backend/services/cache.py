@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class InMemoryCache:
+    """Process-local key/value cache with optional per-entry TTL
+
+    A shared backend (e.g. a Redis wrapper) can replace it through
+    set_cache_backend() as long as it offers the same get/set/delete methods.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared instance used by the services
+cache = InMemoryCache()
+
+
+def get_cache():
+    return cache
+
+
+def set_cache_backend(backend):
+    global cache
+    cache = backend
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import case, func
+
+from models import db, Appointment, ArchivedAppointment, Availability
+from services.archive import doctor_patient_ids, reaches_archive
+
+# Longest date range a summary covers
+MAX_SUMMARY_DAYS = 366
+
+
+def doctor_summary(doctor_id, start_date, end_date, today):
+    """Dashboard figures for a doctor, computed with three aggregate queries
+
+    Status counts and the per-day histogram cover [start_date, end_date],
+    including archived appointments when the range reaches them;
+    today/upcoming/pending counts cover live appointments (archived ones are
+    in the past) and distinct patients cover both tables.
+    """
+    active = Appointment.status.in_(Appointment.ACTIVE_STATUSES)
+
+    distinct_patients = db.session.query(func.count()).select_from(
+        doctor_patient_ids(doctor_id).subquery()
+    ).scalar()
+
+    totals = db.session.query(
+        func.coalesce(func.sum(case((active & (Appointment.appointment_date == today), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((active & (Appointment.appointment_date >= today), 1), else_=0)), 0),
+        func.coalesce(func.sum(case(
+            ((Appointment.status == 'scheduled') & (Appointment.appointment_date >= today), 1), else_=0
+        )), 0),
+    ).filter(Appointment.doctor_id == doctor_id).one()
+
+    models = (Appointment, ArchivedAppointment) if reaches_archive(start_date, end_date) else (Appointment,)
+    appointment_rows = [
+        row
+        for model in models
+        for row in db.session.query(
+            model.appointment_date, model.status, func.count(model.id)
+        ).filter(
+            model.doctor_id == doctor_id,
+            model.appointment_date >= start_date,
+            model.appointment_date <= end_date
+        ).group_by(model.appointment_date, model.status)
+    ]
+
+    slot_rows = db.session.query(
+        Availability.date, func.count(Availability.id),
+        func.coalesce(func.sum(case((Availability.is_booked.is_(True), 1), else_=0)), 0)
+    ).filter(
+        Availability.doctor_id == doctor_id,
+        Availability.date >= start_date,
+        Availability.date <= end_date
+    ).group_by(Availability.date).all()
+
+    status_counts = defaultdict(int)
+    days = defaultdict(lambda: {'appointments': defaultdict(int), 'slots': 0, 'booked_slots': 0})
+    for appointment_date, status, count in appointment_rows:
+        status_counts[status] += count
+        days[appointment_date]['appointments'][status] += count
+    for slot_date, slots, booked in slot_rows:
+        days[slot_date]['slots'] = slots
+        days[slot_date]['booked_slots'] = booked
+
+    histogram = []
+    current = start_date
+    while current <= end_date:
+        day = days.get(current)
+        appointments = dict(day['appointments']) if day else {}
+        slots = day['slots'] if day else 0
+        booked = day['booked_slots'] if day else 0
+        histogram.append({
+            'date': current.isoformat(),
+            'appointments': appointments,
+            'total': sum(appointments.values()),
+            'slots': slots,
+            'booked_slots': booked,
+        })
+        current += timedelta(days=1)
+
+    slots = sum(day['slots'] for day in histogram)
+    booked = sum(day['booked_slots'] for day in histogram)
+    today_count, upcoming, pending = totals
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'status_counts': {status: status_counts.get(status, 0) for status in Appointment.STATUSES},
+        'today': int(today_count),
+        'upcoming': int(upcoming),
+        'pending_requests': int(pending),
+        'distinct_patients': distinct_patients,
+        'utilisation': {
+            'slots': slots,
+            'booked_slots': booked,
+            'rate': round(booked / slots, 4) if slots else None,
+        },
+        'days': histogram,
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from flask import Response, current_app, request
+
+from models import Doctor
+from services.cache import get_cache
+from services.replica_routing import replica_cache_ttl
+
+DIRECTORY_KEY = 'doctors:directory'
+
+
+def _doctor_key(doctor_id):
+    return f'doctors:{doctor_id}'
+
+
+def _build_entry(payload, last_modified):
+    body = json.dumps(payload, sort_keys=True).encode()
+    return {
+        'body': body,
+        'etag': hashlib.sha1(body).hexdigest(),
+        'last_modified': last_modified,
+    }
+
+
+def _cached(key, build):
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        entry = build()
+        if entry is not None:
+            cache.set(key, entry, ttl=replica_cache_ttl(current_app.config.get('DOCTOR_CACHE_TTL')))
+    return entry
+
+
+def get_directory_entry():
+    """Serialized list of every doctor, rebuilt only after invalidation or TTL expiry"""
+    def build():
+        doctors = Doctor.query.order_by(Doctor.id).all()
+        timestamps = [doctor.updated_at for doctor in doctors if doctor.updated_at]
+        return _build_entry([doctor.to_dict() for doctor in doctors], max(timestamps) if timestamps else None)
+
+    return _cached(DIRECTORY_KEY, build)
+
+
+def get_doctor_entry(doctor_id):
+    """Serialized single doctor, or None if it does not exist"""
+    def build():
+        doctor = Doctor.query.get(doctor_id)
+        if not doctor:
+            return None
+        return _build_entry(doctor.to_dict(), doctor.updated_at)
+
+    return _cached(_doctor_key(doctor_id), build)
+
+
+def invalidate_doctor(doctor_id=None):
+    """Drop cached directory data after a doctor is created or updated"""
+    keys = [DIRECTORY_KEY]
+    if doctor_id is not None:
+        keys.append(_doctor_key(doctor_id))
+    get_cache().delete(*keys)
+
+
+def conditional_response(entry):
+    """JSON response carrying ETag/Last-Modified; 304 when the client copy is current"""
+    response = Response(entry['body'], mimetype='application/json')
+    response.set_etag(entry['etag'])
+    if entry['last_modified']:
+        response.last_modified = entry['last_modified']
+    # Clients may keep the copy but must revalidate before reuse
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,86 @@
+import re
+
+from sqlalchemy import Float, func, literal_column, or_, text, type_coerce
+
+from models import db, Doctor
+from models.search import doctors_fts, full_text_available
+
+DEFAULT_SEARCH_LIMIT = 20
+
+# Keyset columns per sort key; '-key' sorts descending
+SORT_KEYS = {
+    'name': (Doctor.name, Doctor.id),
+    'fee': (Doctor.consultation_fee, Doctor.id),
+    'experience': (Doctor.experience_years, Doctor.id),
+}
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def parse_search(args):
+    """Validate search query parameters; raises ValueError"""
+    params = {
+        'q': (args.get('q') or '').strip(),
+        'specializations': [value.strip() for value in (args.get('specialization') or '').split(',') if value.strip()],
+    }
+
+    for name, cast in (('min_fee', float), ('max_fee', float), ('min_experience', int), ('max_experience', int)):
+        value = args.get(name)
+        try:
+            params[name] = cast(value) if value not in (None, '') else None
+        except ValueError:
+            raise ValueError(f'{name} must be a number')
+
+    sort = args.get('sort') or ('relevance' if params['q'] else 'name')
+    if sort == 'relevance':
+        if not params['q']:
+            raise ValueError('sort=relevance requires q')
+    elif sort.lstrip('-') not in SORT_KEYS:
+        raise ValueError(f"Invalid sort. Must be one of: relevance, {', '.join(SORT_KEYS)} (prefix - for descending)")
+    params['sort'] = sort
+    return params
+
+
+def search_query(params):
+    """(query, keyset columns, descending) for the search parameters
+
+    Rows carry only Doctor.CARD_FIELDS (plus the rank when sorting by
+    relevance). Free text uses the FTS5 index where available and falls back
+    to case-insensitive LIKE on name and education elsewhere.
+    """
+    columns = [getattr(Doctor, field) for field in Doctor.CARD_FIELDS]
+    terms = _TERM.findall(params['q'])
+    rank = None
+
+    if terms and full_text_available():
+        # Every term must match as a prefix in any indexed column
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rank = type_coerce(func.bm25(literal_column('doctors_fts')), Float).label('rank')
+        query = db.session.query(*columns, rank).join(
+            doctors_fts, doctors_fts.c.rowid == Doctor.id
+        ).filter(text('doctors_fts MATCH :match').bindparams(match=match))
+    else:
+        query = db.session.query(*columns)
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(or_(Doctor.name.ilike(pattern), Doctor.education.ilike(pattern)))
+
+    if params['specializations']:
+        query = query.filter(Doctor.specialization.in_(params['specializations']))
+    if params['min_fee'] is not None:
+        query = query.filter(Doctor.consultation_fee >= params['min_fee'])
+    if params['max_fee'] is not None:
+        query = query.filter(Doctor.consultation_fee <= params['max_fee'])
+    if params['min_experience'] is not None:
+        query = query.filter(Doctor.experience_years >= params['min_experience'])
+    if params['max_experience'] is not None:
+        query = query.filter(Doctor.experience_years <= params['max_experience'])
+
+    sort = params['sort']
+    if sort == 'relevance':
+        if rank is None:
+            # No full-text index: fall back to name order
+            return query, SORT_KEYS['name'], False
+        # bm25() is lower for better matches
+        return query, (rank, Doctor.id), False
+    return query, SORT_KEYS[sort.lstrip('-')], sort.startswith('-')
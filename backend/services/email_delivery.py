@@ -0,0 +1,171 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the SMTP session is unusable and must be reopened
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, OSError)
+
+
+class EmailDeliveryQueue:
+    """Background SMTP sender with a bounded queue and one persistent connection
+
+    Messages are (sender, recipient, text) tuples. The worker drains up to
+    batch_size messages per wake-up and sends them over the same session,
+    reconnecting on connection errors and retrying failed messages with
+    exponential backoff. The session is closed after idle_timeout seconds
+    without mail.
+    """
+
+    def __init__(self, connect, max_queue_size=1000, batch_size=20, max_retries=3,
+                 backoff_seconds=1.0, idle_timeout=30.0, enqueue_timeout=0.0):
+        self._connect = connect
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.idle_timeout = idle_timeout
+        self.enqueue_timeout = enqueue_timeout
+
+        self._connection = None
+        self._thread = None
+        self._pending_retries = 0
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0, 'sent': 0, 'failed': 0, 'retried': 0,
+            'dropped': 0, 'batches': 0, 'connections': 0,
+        }
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='email-delivery', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Stop after the queued messages have been attempted"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._close()
+
+    def submit(self, sender, recipient, text):
+        """Queue a message; returns False when the queue is full (backpressure)"""
+        try:
+            if self.enqueue_timeout:
+                self._queue.put((sender, recipient, text, 0), timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait((sender, recipient, text, 0))
+        except queue.Full:
+            self._count('dropped')
+            logger.warning('Email queue full, dropping message to %s', recipient)
+            return False
+
+        self._count('enqueued')
+        return True
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['pending_retries'] = self._pending_retries
+        stats['queue_size'] = self._queue.qsize()
+        stats['max_queue_size'] = self._queue.maxsize
+        return stats
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _count_pending(self, amount):
+        with self._stats_lock:
+            self._pending_retries += amount
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty() and not self._pending_retries):
+            try:
+                first = self._queue.get(timeout=self.idle_timeout if not self._stopping.is_set() else 0.1)
+            except queue.Empty:
+                # Idle: release the SMTP session instead of holding it open
+                self._close()
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._count('batches')
+            retry = []
+            for message in batch:
+                if not self._deliver(message):
+                    retry.append(message)
+            for _ in batch:
+                self._queue.task_done()
+
+            for sender, recipient, text, attempts in retry:
+                self._schedule_retry(sender, recipient, text, attempts + 1)
+
+        self._close()
+
+    def _deliver(self, message):
+        sender, recipient, text, _ = message
+        try:
+            connection = self._ensure_connection()
+            connection.sendmail(sender, recipient, text)
+            self._count('sent')
+            return True
+        except CONNECTION_ERRORS as e:
+            logger.warning('SMTP connection error sending to %s: %s', recipient, e)
+            self._close()
+            return False
+        except smtplib.SMTPException as e:
+            logger.warning('SMTP error sending to %s: %s', recipient, e)
+            return False
+
+    def _schedule_retry(self, sender, recipient, text, attempts):
+        if attempts > self.max_retries:
+            self._count('failed')
+            logger.error('Giving up on email to %s after %d attempts', recipient, attempts)
+            return
+
+        self._count('retried')
+        self._count_pending(1)
+        delay = self.backoff_seconds * (2 ** (attempts - 1))
+
+        def requeue():
+            try:
+                self._queue.put_nowait((sender, recipient, text, attempts))
+            except queue.Full:
+                self._count('dropped')
+            finally:
+                self._count_pending(-1)
+
+        if self._stopping.is_set():
+            time.sleep(delay)
+            requeue()
+        else:
+            timer = threading.Timer(delay, requeue)
+            timer.daemon = True
+            timer.start()
+
+    def _ensure_connection(self):
+        if self._connection is None:
+            self._connection = self._connect()
+            self._count('connections')
+        return self._connection
+
+    def _close(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except Exception:
+            pass
+        self._connection = None
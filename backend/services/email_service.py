@@ -2,8 +2,13 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from flask import current_app
+import logging
 import os
 
+from services.email_delivery import EmailDeliveryQueue
+
+logger = logging.getLogger(__name__)
+
 class EmailService:
     def __init__(self):
         self.smtp_server = os.environ.get('MAIL_SERVER')
@@ -12,34 +17,48 @@ class EmailService:
         self.username = os.environ.get('MAIL_USERNAME')
         self.password = os.environ.get('MAIL_PASSWORD')
         self.default_sender = os.environ.get('DEFAULT_MAIL_SENDER') or 'noreply@medcenter.com'
+        self.delivery_queue = None
+    
+    def init_app(self, app):
+        """Load mail settings from the app config and start the background sender"""
+        config = app.config
+        self.smtp_server = config.get('MAIL_SERVER')
+        self.smtp_port = config.get('MAIL_PORT', 587)
+        self.use_tls = config.get('MAIL_USE_TLS', True)
+        self.username = config.get('MAIL_USERNAME')
+        self.password = config.get('MAIL_PASSWORD')
+        self.default_sender = config.get('DEFAULT_MAIL_SENDER') or 'noreply@medcenter.com'
+        
+        if self.delivery_queue:
+            self.delivery_queue.stop()
+            self.delivery_queue = None
+        
+        if self.is_configured() and config.get('MAIL_ASYNC', True):
+            self.delivery_queue = EmailDeliveryQueue(
+                self._connect,
+                max_queue_size=config.get('MAIL_QUEUE_SIZE', 1000),
+                batch_size=config.get('MAIL_BATCH_SIZE', 20),
+                max_retries=config.get('MAIL_MAX_RETRIES', 3),
+                backoff_seconds=config.get('MAIL_RETRY_BACKOFF', 1.0)
+            )
+            self.delivery_queue.start()
+    
+    def is_configured(self):
+        # Credentials are optional so local stand-in servers work without auth
+        return bool(self.smtp_server)
+    
+    def delivery_stats(self):
+        """Queue depth and delivery counters, or None when sending synchronously"""
+        return self.delivery_queue.stats() if self.delivery_queue else None
     
     def send_appointment_confirmation(self, recipient_email, patient_name, doctor_name, appointment_date, appointment_time):
         """Send appointment confirmation email to patient"""
         try:
-            if not self.smtp_server or not self.username or not self.password:
+            if not self.is_configured():
                 print("Email service not configured. Skipping email.")
                 return True
             
-            subject = f"Appointment Confirmation - {doctor_name}"
-            
-            body = f"""
-Dear {patient_name},
-
-Your appointment has been successfully confirmed!
-
-Appointment Details:
-- Doctor: {doctor_name}
-- Date: {appointment_date}
-- Time: {appointment_time}
-
-Please arrive 15 minutes before your scheduled appointment time.
-
-If you need to reschedule or cancel, please contact us at least 24 hours in advance.
-
-Best regards,
-Medical Center Team
-            """
-            
+            subject, body = self._confirmation_message(patient_name, doctor_name, appointment_date, appointment_time)
             return self._send_email(recipient_email, subject, body)
             
         except Exception as e:
@@ -49,7 +68,7 @@ Medical Center Team
     def send_appointment_reminder(self, recipient_email, patient_name, doctor_name, appointment_date, appointment_time):
         """Send appointment reminder email to patient"""
         try:
-            if not self.smtp_server or not self.username or not self.password:
+            if not self.is_configured():
                 print("Email service not configured. Skipping email.")
                 return True
             
@@ -85,13 +104,79 @@ Medical Center Team
     def send_appointment_cancellation(self, recipient_email, patient_name, doctor_name, appointment_date, appointment_time):
         """Send appointment cancellation confirmation"""
         try:
-            if not self.smtp_server or not self.username or not self.password:
+            if not self.is_configured():
                 print("Email service not configured. Skipping email.")
                 return True
             
-            subject = f"Appointment Cancelled - {doctor_name}"
+            subject, body = self._cancellation_message(patient_name, doctor_name, appointment_date, appointment_time)
+            return self._send_email(recipient_email, subject, body)
             
-            body = f"""
+        except Exception as e:
+            print(f"Failed to send appointment cancellation: {str(e)}")
+            return False
+    
+    def notify_appointment(self, appointment, event):
+        """Send the patient mail for an appointment event: 'booked' or 'cancelled'"""
+        patient = appointment.patient
+        doctor = appointment.doctor
+        if not patient or not doctor:
+            return False
+        
+        args = (
+            patient.email, patient.name, doctor.name,
+            appointment.appointment_date.isoformat(), appointment.appointment_time.strftime('%H:%M')
+        )
+        if event == 'booked':
+            return self.send_appointment_confirmation(*args)
+        if event == 'cancelled':
+            return self.send_appointment_cancellation(*args)
+        return False
+    
+    def notify_appointments(self, rows, event):
+        """Mail many patients about an appointment event as one batch
+
+        rows are (email, patient_name, doctor_name, date, time) tuples. The
+        batch is queued together for the background sender, or sent over a
+        single SMTP session when sending synchronously. Returns the number of
+        messages accepted.
+        """
+        compose = {'booked': self._confirmation_message, 'cancelled': self._cancellation_message}.get(event)
+        if compose is None or not rows:
+            return 0
+        
+        if not self.is_configured():
+            logger.debug('Email service not configured; skipping %d emails', len(rows))
+            return len(rows)
+        
+        messages = [(row[0], *compose(*row[1:])) for row in rows]
+        return self._send_batch(messages)
+    
+    def _confirmation_message(self, patient_name, doctor_name, appointment_date, appointment_time):
+        subject = f"Appointment Confirmation - {doctor_name}"
+        
+        body = f"""
+Dear {patient_name},
+
+Your appointment has been successfully confirmed!
+
+Appointment Details:
+- Doctor: {doctor_name}
+- Date: {appointment_date}
+- Time: {appointment_time}
+
+Please arrive 15 minutes before your scheduled appointment time.
+
+If you need to reschedule or cancel, please contact us at least 24 hours in advance.
+
+Best regards,
+Medical Center Team
+        """
+        return subject, body
+    
+    def _cancellation_message(self, patient_name, doctor_name, appointment_date, appointment_time):
+        subject = f"Appointment Cancelled - {doctor_name}"
+        
+        body = f"""
 Dear {patient_name},
 
 Your appointment has been cancelled as requested.
@@ -105,30 +190,57 @@ If you would like to reschedule, please visit our website or contact us directly
 
 Best regards,
 Medical Center Team
-            """
-            
-            return self._send_email(recipient_email, subject, body)
-            
+        """
+        return subject, body
+    
+    def _build_message(self, recipient_email, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.default_sender
+        msg['To'] = recipient_email
+        msg['Subject'] = subject
+        
+        msg.attach(MIMEText(body, 'plain'))
+        return msg.as_string()
+    
+    def _send_batch(self, messages):
+        """Send (recipient, subject, body) messages; queued or over one session"""
+        if self.delivery_queue:
+            return sum(
+                self.delivery_queue.submit(self.default_sender, recipient, self._build_message(recipient, subject, body))
+                for recipient, subject, body in messages
+            )
+        
+        sent = 0
+        try:
+            server = self._connect()
         except Exception as e:
-            print(f"Failed to send appointment cancellation: {str(e)}")
-            return False
+            logger.error('Failed to send email batch: %s', e)
+            return 0
+        try:
+            for recipient, subject, body in messages:
+                try:
+                    server.sendmail(self.default_sender, recipient, self._build_message(recipient, subject, body))
+                    sent += 1
+                except smtplib.SMTPException as e:
+                    logger.warning('Failed to send email to %s: %s', recipient, e)
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                pass
+        
+        logger.info('Email batch sent: %d/%d', sent, len(messages))
+        return sent
     
     def _send_email(self, recipient_email, subject, body):
-        """Internal method to send email"""
+        """Internal method to send email; queued for the background sender when it runs"""
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.default_sender
-            msg['To'] = recipient_email
-            msg['Subject'] = subject
+            text = self._build_message(recipient_email, subject, body)
             
-            msg.attach(MIMEText(body, 'plain'))
+            if self.delivery_queue:
+                return self.delivery_queue.submit(self.default_sender, recipient_email, text)
             
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            if self.use_tls:
-                server.starttls()
-            
-            server.login(self.username, self.password)
-            text = msg.as_string()
+            server = self._connect()
             server.sendmail(self.default_sender, recipient_email, text)
             server.quit()
             
@@ -138,6 +250,16 @@ Medical Center Team
         except Exception as e:
             print(f"Failed to send email: {str(e)}")
             return False
+    
+    def _connect(self):
+        """Open an authenticated SMTP session"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
 
 # Create a singleton instance
 email_service = EmailService()
@@ -0,0 +1,121 @@
+import itertools
+import json
+import queue
+import threading
+from datetime import datetime, timedelta
+
+from models import Appointment
+from services.serialization import APPOINTMENT_COLUMNS, appointment_load_options
+
+# Change feed cursors step back this far so commits racing a poll are not missed
+CHANGE_FEED_OVERLAP = timedelta(seconds=5)
+
+
+class Subscription:
+    """One connected client; receives events matching its doctor/patient filter"""
+
+    def __init__(self, doctor_id=None, patient_id=None, max_pending=100):
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        self.events = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def matches(self, event):
+        if self.doctor_id is not None and event['doctor_id'] != self.doctor_id:
+            return False
+        if self.patient_id is not None and event.get('patient_id') != self.patient_id:
+            return False
+        return True
+
+
+class EventBroker:
+    """In-process fan-out of appointment and availability changes
+
+    Events only reach clients connected to the same process; event streams
+    poll appointment_changes() for appointments changed by other processes,
+    and clients that reconnect (or whose queue overflowed) catch up through
+    the ?since= delta endpoint.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, doctor_id=None, patient_id=None, limit=None):
+        """A new subscription, or None when limit subscriptions are already open"""
+        subscription = Subscription(doctor_id, patient_id)
+        with self._lock:
+            if limit is not None and len(self._subscriptions) >= limit:
+                return None
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def event(self, event_type, doctor_id, data, patient_id=None):
+        return {
+            'id': next(self._ids),
+            'type': event_type,
+            'doctor_id': doctor_id,
+            'patient_id': patient_id,
+            'data': data,
+            'timestamp': datetime.utcnow().isoformat(),
+        }
+
+    def publish(self, event_type, doctor_id, data, patient_id=None):
+        event = self.event(event_type, doctor_id, data, patient_id)
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.events.put_nowait(event)
+            except queue.Full:
+                # Slow client: stop queueing and tell it to resynchronise
+                subscription.overflowed = True
+
+    def publish_appointment(self, appointment, event_type='appointment.updated'):
+        self.publish(
+            event_type, appointment.doctor_id,
+            appointment.to_dict(APPOINTMENT_COLUMNS), patient_id=appointment.patient_id
+        )
+
+    def publish_availability(self, slot, event_type='availability.updated'):
+        self.publish(event_type, slot.doctor_id, slot.to_dict())
+
+
+def appointment_changes(since, doctor_id=None, patient_id=None):
+    """Appointments updated after since, oldest first, and the since for the next read
+
+    The database is the change feed every worker process shares: the
+    /api/appointments/changes endpoint and each open event stream read it.
+    """
+    # Taken before the query so nothing committed meanwhile is skipped next time
+    next_since = datetime.utcnow() - CHANGE_FEED_OVERLAP
+
+    query = Appointment.query.options(*appointment_load_options(APPOINTMENT_COLUMNS)).filter(Appointment.updated_at > since)
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    if patient_id is not None:
+        query = query.filter(Appointment.patient_id == patient_id)
+
+    return query.order_by(Appointment.updated_at, Appointment.id).all(), next_since
+
+
+def format_sse(event, event_id=None):
+    """One SSE message; event_id overrides the event's own id (streams send their feed cursor)"""
+    return f"id: {event['id'] if event_id is None else event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+# Create a singleton instance
+event_broker = EventBroker()
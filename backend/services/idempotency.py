@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Regenerated for the replayed body rather than stored
+UNSTORED_HEADERS = {'content-type', 'content-length', REPLAYED_HEADER.lower()}
+
+# Expired entries removed per purge statement
+PURGE_BATCH_SIZE = 1000
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def _digest(*parts):
+    """16-byte digest of the parts; collisions are out of reach at any realistic key count"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part if isinstance(part, bytes) else str(part).encode())
+        hasher.update(b'\0')
+    return hasher.digest()
+
+
+def _scope():
+    """Keys are per caller: role:user_id of a valid token
+
+    Unauthenticated writes (booking takes patient_id from the body) are scoped
+    to the client address and that patient, so anonymous callers never share
+    a key space.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        claims = get_jwt()
+    except Exception:
+        claims = {}
+    if claims.get('sub'):
+        return f"{claims.get('role')}:{claims['sub']}"
+
+    body = request.get_json(silent=True)
+    patient_id = body.get('patient_id') if isinstance(body, dict) else None
+    return f'anonymous:{request.remote_addr}:{patient_id}'
+
+
+def _claim(key_hash, fingerprint, now):
+    """Insert an in-progress record; returns None when claimed, else the existing record"""
+    lock_until = now + timedelta(seconds=current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+
+    while True:
+        try:
+            db.session.execute(insert(IdempotencyRecord).values(
+                key_hash=key_hash, fingerprint=fingerprint, expires_at=lock_until
+            ))
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        # Take over an expired entry, including claims of requests that died mid-flight
+        taken = db.session.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key_hash == key_hash, IdempotencyRecord.expires_at <= now)
+            .values(fingerprint=fingerprint, status_code=None, response=None, headers=None, expires_at=lock_until)
+        ).rowcount
+        db.session.commit()
+        if taken:
+            return None
+
+        record = db.session.execute(
+            select(IdempotencyRecord).where(IdempotencyRecord.key_hash == key_hash)
+        ).scalar_one_or_none()
+        if record is not None:
+            return record
+        # Purged between the insert and the read; claim again
+
+
+def _complete(key_hash, response):
+    ttl = current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400)
+    db.session.execute(
+        update(IdempotencyRecord)
+        .where(IdempotencyRecord.key_hash == key_hash)
+        .values(
+            status_code=response.status_code,
+            response=zlib.compress(response.get_data()),
+            headers=json.dumps([
+                [name, value] for name, value in response.headers.items()
+                if name.lower() not in UNSTORED_HEADERS
+            ]),
+            expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+        )
+    )
+    db.session.commit()
+
+
+def _release(key_hash):
+    # Server errors are not stored; the client may retry the request for real
+    db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key_hash == key_hash))
+    db.session.commit()
+
+
+def _replay(record):
+    response = current_app.response_class(
+        zlib.decompress(record.response), status=record.status_code, mimetype='application/json'
+    )
+    # Records completed before headers were stored replay the body alone
+    for name, value in json.loads(record.headers or '[]'):
+        response.headers.add(name, value)
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def purge_expired(now=None):
+    """Delete expired records in batches; returns how many were removed"""
+    now = now or datetime.utcnow()
+    removed = 0
+    while True:
+        expired = select(IdempotencyRecord.key_hash).where(
+            IdempotencyRecord.expires_at <= now
+        ).limit(PURGE_BATCH_SIZE)
+        count = db.session.execute(
+            delete(IdempotencyRecord).where(IdempotencyRecord.key_hash.in_(expired))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        removed += count
+        if count < PURGE_BATCH_SIZE:
+            return removed
+
+
+def _maybe_purge():
+    """Purge at most once per IDEMPOTENCY_PURGE_INTERVAL_SECONDS per process"""
+    global _last_purge
+    interval = current_app.config.get('IDEMPOTENCY_PURGE_INTERVAL_SECONDS', 300)
+    with _purge_lock:
+        if time.monotonic() - _last_purge < interval:
+            return
+        _last_purge = time.monotonic()
+    try:
+        removed = purge_expired()
+        if removed:
+            logger.info('Purged %d expired idempotency keys', removed)
+    except Exception:
+        db.session.rollback()
+        logger.exception('Idempotency key purge failed')
+
+
+def idempotent(view):
+    """Answer retries of a write request carrying an Idempotency-Key from the stored response
+
+    The first request with a key claims it and runs the view; its response
+    (anything below 500), headers included, is kept for
+    IDEMPOTENCY_TTL_SECONDS. Repeats with the same key and body get that
+    response back, with Idempotent-Replayed: true, without running the view
+    again; after_request hooks such as the replica pin cookie run on it as
+    usual. A repeat while the first request is still running gets 409, and
+    reusing a key for a different request 422. Requests without the header
+    are unaffected. Place it below jwt_required so rejected credentials never
+    claim a key.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+        key_hash = _digest(_scope(), key)
+        fingerprint = _digest(request.method, request.path, request.get_data())
+
+        record = _claim(key_hash, fingerprint, datetime.utcnow())
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+            if record.status_code is None:
+                response = jsonify({'error': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            return _replay(record)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            _release(key_hash)
+            raise
+
+        # Discard whatever the view left uncommitted before recording the outcome
+        db.session.rollback()
+        if response.status_code >= 500:
+            _release(key_hash)
+        else:
+            _complete(key_hash, response)
+        _maybe_purge()
+        return response
+
+    return wrapper
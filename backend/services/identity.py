@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from flask import current_app, request
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt, get_jwt_identity
+
+from models import Doctor, Patient
+from services.cache import get_cache
+from services.replica_routing import replica_cache_ttl
+
+USER_MODELS = {'patient': Patient, 'doctor': Doctor}
+
+# Scope claim of event stream tokens
+STREAM_SCOPE = 'events'
+
+
+def _identity_key(role, user_id):
+    return f'identity:{role}:{user_id}'
+
+
+def create_user_access_token(role, user_id, name, email):
+    """Access token carrying role and profile claims
+
+    The subject is the id as a string (PyJWT 2.10+ rejects non-string "sub").
+    """
+    return create_access_token(
+        identity=str(user_id), additional_claims={'role': role, 'name': name, 'email': email}
+    )
+
+
+def create_stream_token(role, user_id):
+    """Short-lived token for the event stream
+
+    EventSource cannot send headers, so this one travels in the query string;
+    it expires after EVENT_TOKEN_SECONDS and is only accepted by the stream.
+    """
+    return create_access_token(
+        identity=str(user_id), additional_claims={'role': role, 'scope': STREAM_SCOPE},
+        expires_delta=timedelta(seconds=current_app.config.get('EVENT_TOKEN_SECONDS', 60))
+    )
+
+
+def verify_token_scope(jwt_header, jwt_data):
+    """JWTManager token_verification_loader: stream tokens open the event stream and nothing else"""
+    return jwt_data.get('scope') != STREAM_SCOPE or request.endpoint == 'events.stream_events'
+
+
+def create_tokens(role, user):
+    """Access and refresh tokens for a freshly authenticated user"""
+    return {
+        'access_token': create_user_access_token(role, user.id, user.name, user.email),
+        'refresh_token': create_refresh_token(identity=str(user.id), additional_claims={'role': role}),
+    }
+
+
+def current_identity():
+    """(role, user_id) of the verified token in the current request
+
+    Tokens issued before role claims existed are resolved the old way:
+    patient first, then doctor.
+    """
+    user_id = int(get_jwt_identity())
+    role = get_jwt().get('role')
+    if role not in USER_MODELS:
+        role = next((role for role in USER_MODELS if get_user_profile(role, user_id)), None)
+    return role, user_id
+
+
+def current_user_id(role=None):
+    """Id of the authenticated user, or None when a role is required and does not match"""
+    token_role, user_id = current_identity()
+    if role is not None and token_role != role:
+        return None
+    return user_id
+
+
+def get_user_profile(role, user_id):
+    """Serialized user profile, cached for IDENTITY_CACHE_TTL seconds; None if missing"""
+    cache = get_cache()
+    key = _identity_key(role, user_id)
+    profile = cache.get(key)
+    if profile is None:
+        user = USER_MODELS[role].query.get(user_id)
+        if user is None:
+            return None
+        profile = user.to_dict()
+        cache.set(key, profile, ttl=replica_cache_ttl(current_app.config.get('IDENTITY_CACHE_TTL')))
+    return profile
+
+
+def invalidate_identity(role, user_id):
+    """Drop a cached profile after the user's row changes"""
+    get_cache().delete(_identity_key(role, user_id))
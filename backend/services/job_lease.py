@@ -0,0 +1,75 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, JobLease
+
+
+class Lease:
+    """Claim on a job_leases row, so one process at a time runs a background job
+
+    Claims and renewals are conditional UPDATEs, which every database
+    serialises; unlike SKIP LOCKED this also holds on SQLite. The holder
+    renews the claim while it works and releases it when done.
+    """
+
+    def __init__(self, name, ttl_seconds=300):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self, min_interval=0, now=None):
+        """Claim the job; False while another process holds it, or if it completed under min_interval seconds ago"""
+        now = now or datetime.utcnow()
+        self._ensure_row()
+
+        claimed = db.session.execute(
+            update(JobLease)
+            .where(
+                JobLease.name == self.name,
+                or_(JobLease.locked_until.is_(None), JobLease.locked_until <= now, JobLease.holder == self.holder),
+                or_(JobLease.last_run_at.is_(None), JobLease.last_run_at <= now - timedelta(seconds=min_interval))
+            )
+            .values(holder=self.holder, locked_until=now + timedelta(seconds=self.ttl_seconds))
+        ).rowcount
+        db.session.commit()
+        return bool(claimed)
+
+    def renew(self, now=None):
+        """Extend the claim; False when it lapsed and another process took the job over"""
+        now = now or datetime.utcnow()
+        renewed = db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == self.name, JobLease.holder == self.holder)
+            .values(locked_until=now + timedelta(seconds=self.ttl_seconds))
+        ).rowcount
+        db.session.commit()
+        return bool(renewed)
+
+    def release(self, completed=True):
+        """Give the job back; a completed run also records last_run_at"""
+        # A failed run may have left its transaction open
+        db.session.rollback()
+        values = {'holder': None, 'locked_until': None}
+        if completed:
+            values['last_run_at'] = datetime.utcnow()
+        db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == self.name, JobLease.holder == self.holder)
+            .values(**values)
+        )
+        db.session.commit()
+
+    def _ensure_row(self):
+        if db.session.get(JobLease, self.name) is not None:
+            return
+        try:
+            db.session.execute(insert(JobLease).values(name=self.name))
+            db.session.commit()
+        except IntegrityError:
+            # Another process created it first
+            db.session.rollback()
@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+from services.email_service import email_service
+from services.events import event_broker
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Per-endpoint request metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.db_seconds = defaultdict(float)
+        self.response_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.gauges = {}
+
+    def observe_request(self, endpoint, method, status, seconds, query_count, db_seconds, size):
+        key = (endpoint, method)
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            self.latency[key].observe(seconds)
+            self.queries[key].observe(query_count)
+            self.db_seconds[key] += db_seconds
+            if size is not None:
+                self.response_bytes[key].observe(size)
+
+    def register_gauge(self, name, help_text, collect):
+        """collect() returns a number, a {((label, value), ...): number} dict, or None to skip"""
+        self.gauges[name] = (help_text, collect)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += _header('http_requests_total', 'Requests by endpoint, method and status', 'counter')
+            for (endpoint, method, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {value}')
+
+            lines += _histogram('http_request_duration_seconds', 'Request latency', self.latency)
+            lines += _histogram('http_request_sql_statements', 'SQL statements per request', self.queries)
+            lines += _histogram('http_response_size_bytes', 'Response body size', self.response_bytes)
+
+            lines += _header('http_request_db_seconds_total', 'Time spent executing SQL', 'counter')
+            for (endpoint, method), value in sorted(self.db_seconds.items()):
+                lines.append(f'http_request_db_seconds_total{_labels(endpoint=endpoint, method=method)} {value:.6f}')
+
+        for name, (help_text, collect) in sorted(self.gauges.items()):
+            values = collect()
+            if values is None:
+                continue
+            lines += _header(name, help_text, 'gauge')
+            if isinstance(values, dict):
+                for labels, value in sorted(values.items()):
+                    lines.append(f'{name}{_labels(**dict(labels))} {value}')
+            else:
+                lines.append(f'{name} {values}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _header(name, help_text, metric_type):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram(name, help_text, histograms):
+    lines = _header(name, help_text, 'histogram')
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(endpoint=endpoint, method=method)} {histogram.total:.6f}')
+        lines.append(f'{name}_count{_labels(endpoint=endpoint, method=method)} {histogram.count}')
+    return lines
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    if not has_request_context() or 'sql_stats' not in g:
+        return
+
+    elapsed = time.perf_counter() - started
+    stats = g.sql_stats
+    stats['count'] += 1
+    stats['seconds'] += elapsed
+    stats['statements'].append((elapsed, statement))
+
+
+def instrument_engine(engine):
+    """Count SQL statements and time for the current request on this engine"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_metrics(app):
+    """Register request instrumentation and the /metrics endpoint"""
+    registry = MetricsRegistry()
+    app.extensions['metrics'] = registry
+
+    slow_seconds = app.config.get('SLOW_REQUEST_SECONDS', 1.0)
+    slow_statements = app.config.get('SLOW_REQUEST_LOG_STATEMENTS', 5)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_stats = {'count': 0, 'seconds': 0.0, 'statements': []}
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_started' not in g:
+            return response
+
+        elapsed = time.perf_counter() - g.request_started
+        stats = g.sql_stats
+        # Route templates keep label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        size = None if response.is_streamed else response.calculate_content_length()
+
+        registry.observe_request(
+            endpoint, request.method, response.status_code,
+            elapsed, stats['count'], stats['seconds'], size
+        )
+
+        if elapsed >= slow_seconds:
+            slowest = sorted(stats['statements'], key=lambda item: item[0], reverse=True)[:slow_statements]
+            logger.warning(
+                'Slow request %s %s: %.3fs, %d SQL statements, %.3fs in DB\n%s',
+                request.method, request.full_path, elapsed, stats['count'], stats['seconds'],
+                '\n'.join(f'  {seconds * 1000:.1f}ms {statement}' for seconds, statement in slowest)
+            )
+
+        if response.status_code >= 500 and not response.is_streamed:
+            body = response.get_json(silent=True) or {}
+            logger.error('%s %s failed: %s', request.method, request.full_path, body.get('error'))
+
+        return response
+
+    registry.register_gauge(
+        'email_delivery_queue', 'Background email delivery counters and queue depth',
+        lambda: {(('stat', key),): value for key, value in (email_service.delivery_stats() or {}).items()} or None
+    )
+    registry.register_gauge('event_stream_subscribers', 'Connected event stream clients', event_broker.subscriber_count)
+    
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return registry
@@ -0,0 +1,340 @@
+import logging
+from collections import defaultdict
+
+import click
+from flask import current_app
+from sqlalchemy import delete, insert, tuple_, update
+
+from models import db, Appointment, Availability, Doctor, DoctorDayOccupancy
+from models.occupancy import DAY_MINUTES
+
+logger = logging.getLogger(__name__)
+
+# Days rewritten per DELETE / INSERT statement
+WRITE_BATCH_SIZE = 500
+
+# Doctors whose source rows the consistency check loads at once
+CHECK_BATCH_DOCTORS = 200
+
+# Occupancy is kept as minute bitmaps per (doctor_id, date), see
+# DoctorDayOccupancy. Bookings and releases flip busy bits in place: active
+# appointments never overlap, because reserve_slot checks the row before it
+# inserts. Availability changes recompute the affected days from the source
+# tables, since published slots may overlap. Read-modify-writes lock the row
+# (bookings also hold the doctor lock), so concurrent writers cannot lose
+# each other's bits.
+
+
+def interval_mask(start, end):
+    """Bitmap of the minutes in [start, end)"""
+    start, end = max(start, 0), min(end, DAY_MINUTES)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def intervals_mask(intervals):
+    mask = 0
+    for start, end in intervals:
+        mask |= interval_mask(start, end)
+    return mask
+
+
+def mask_intervals(mask):
+    """Sorted, merged (start, end) intervals of the set bits"""
+    intervals = []
+    position = 0
+    while mask:
+        gap = (mask & -mask).bit_length() - 1
+        mask >>= gap
+        position += gap
+        # Length of the run of ones now at the bottom
+        run = (~mask & (mask + 1)).bit_length() - 1
+        intervals.append((position, position + run))
+        mask >>= run
+        position += run
+    return intervals
+
+
+def load_days(doctor_ids, start_date, end_date):
+    """{(doctor_id, date): (published_mask or None, busy_mask)} for the days that have a row"""
+    rows = db.session.query(
+        DoctorDayOccupancy.doctor_id, DoctorDayOccupancy.date,
+        DoctorDayOccupancy.published, DoctorDayOccupancy.busy
+    ).filter(
+        DoctorDayOccupancy.doctor_id.in_(doctor_ids),
+        DoctorDayOccupancy.date >= start_date,
+        DoctorDayOccupancy.date <= end_date
+    ).all()
+
+    return {
+        (doctor_id, day): (DoctorDayOccupancy.decode(published), DoctorDayOccupancy.decode(busy))
+        for doctor_id, day, published, busy in rows
+    }
+
+
+def lock_doctors(doctor_ids):
+    """Serialize occupancy writers per doctor until the transaction ends"""
+    # No-op write; leaves updated_at untouched so caches keyed on it stay valid
+    db.session.execute(
+        update(Doctor)
+        .where(Doctor.id.in_(sorted(set(doctor_ids))))
+        .values(updated_at=Doctor.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def load_day(doctor_id, day):
+    """The locked DoctorDayOccupancy row of one doctor and day, or None"""
+    return DoctorDayOccupancy.query.filter_by(doctor_id=doctor_id, date=day).with_for_update().first()
+
+
+def occupy(occupancy, doctor_id, day, start, end):
+    """Mark [start, end) busy in a row from load_day(); the caller holds the doctor lock"""
+    mask = interval_mask(start, end)
+
+    if occupancy is None:
+        db.session.add(DoctorDayOccupancy(
+            doctor_id=doctor_id, date=day, published=None, busy=DoctorDayOccupancy.encode(mask)
+        ))
+    else:
+        occupancy.busy = DoctorDayOccupancy.encode(occupancy.busy_mask | mask)
+
+
+def vacate(appointments):
+    """Clear the busy minutes of (doctor_id, date, time, duration) appointments that stopped being active"""
+    masks = defaultdict(int)
+    for doctor_id, day, start_time, duration in appointments:
+        start = start_time.hour * 60 + start_time.minute
+        masks[(doctor_id, day)] |= interval_mask(start, start + (duration or 30))
+    if not masks:
+        return
+
+    rows = DoctorDayOccupancy.query.filter(
+        tuple_(DoctorDayOccupancy.doctor_id, DoctorDayOccupancy.date).in_(sorted(masks))
+    ).with_for_update().all()
+
+    for row in rows:
+        busy = row.busy_mask & ~masks[(row.doctor_id, row.date)]
+        if busy or row.published is not None:
+            row.busy = DoctorDayOccupancy.encode(busy)
+        else:
+            # Days without published slots or bookings keep no row
+            db.session.delete(row)
+
+
+def refresh_days(keys):
+    """Recompute the rows of the given (doctor_id, date) days from the source tables
+
+    Runs inside the caller's transaction, after its writes to Availability or
+    Appointment have been made.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    lock_doctors({doctor_id for doctor_id, _ in keys})
+    days = source_days(
+        {doctor_id for doctor_id, _ in keys},
+        min(day for _, day in keys), max(day for _, day in keys)
+    )
+    _replace_rows(keys, {key: value for key, value in days.items() if key in keys})
+
+
+def source_days(doctor_ids, start_date=None, end_date=None):
+    """Occupancy masks computed from Availability and active Appointment rows"""
+    length = current_app.config.get('SLOT_MINUTES', 30)
+
+    slots = db.session.query(Availability.doctor_id, Availability.date, Availability.time).filter(
+        Availability.doctor_id.in_(doctor_ids)
+    )
+    appointments = db.session.query(
+        Appointment.doctor_id, Appointment.appointment_date,
+        Appointment.appointment_time, Appointment.duration_minutes
+    ).filter(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.status.in_(Appointment.ACTIVE_STATUSES)
+    )
+    if start_date is not None:
+        slots = slots.filter(Availability.date >= start_date)
+        appointments = appointments.filter(Appointment.appointment_date >= start_date)
+    if end_date is not None:
+        slots = slots.filter(Availability.date <= end_date)
+        appointments = appointments.filter(Appointment.appointment_date <= end_date)
+
+    published = defaultdict(int)
+    for doctor_id, day, slot_time in slots:
+        start = slot_time.hour * 60 + slot_time.minute
+        published[(doctor_id, day)] |= interval_mask(start, start + length)
+
+    busy = defaultdict(int)
+    for doctor_id, day, appointment_time, duration in appointments:
+        start = appointment_time.hour * 60 + appointment_time.minute
+        busy[(doctor_id, day)] |= interval_mask(start, start + (duration or 30))
+
+    return {key: (published.get(key), busy.get(key, 0)) for key in published.keys() | busy.keys()}
+
+
+def _replace_rows(keys, days):
+    """Delete the rows of keys and insert the given masks; days without data keep no row"""
+    keys = sorted(keys)
+    for index in range(0, len(keys), WRITE_BATCH_SIZE):
+        db.session.execute(
+            delete(DoctorDayOccupancy)
+            .where(tuple_(DoctorDayOccupancy.doctor_id, DoctorDayOccupancy.date).in_(keys[index:index + WRITE_BATCH_SIZE]))
+            .execution_options(synchronize_session=False)
+        )
+
+    rows = [
+        {
+            'doctor_id': doctor_id,
+            'date': day,
+            'published': DoctorDayOccupancy.encode(published) if published is not None else None,
+            'busy': DoctorDayOccupancy.encode(busy),
+        }
+        for (doctor_id, day), (published, busy) in sorted(days.items())
+        if published is not None or busy
+    ]
+    for index in range(0, len(rows), WRITE_BATCH_SIZE):
+        db.session.execute(insert(DoctorDayOccupancy), rows[index:index + WRITE_BATCH_SIZE])
+
+
+def slot_flag_errors(doctor_ids):
+    """Availability rows whose is_booked disagrees with the active appointments
+
+    Returns {True: ids that should be booked, False: ids that should be free}
+    and the (doctor_id, date) days whose active appointments overlap each
+    other. A slot is booked when its SLOT_MINUTES window overlaps an active
+    appointment, the rule reserve_slot and release_slot apply.
+    """
+    length = current_app.config.get('SLOT_MINUTES', 30)
+
+    busy = defaultdict(int)
+    overlapping = set()
+    for doctor_id, day, appointment_time, duration in db.session.query(
+        Appointment.doctor_id, Appointment.appointment_date,
+        Appointment.appointment_time, Appointment.duration_minutes
+    ).filter(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.status.in_(Appointment.ACTIVE_STATUSES)
+    ):
+        start = appointment_time.hour * 60 + appointment_time.minute
+        mask = interval_mask(start, start + (duration or 30))
+        if busy[(doctor_id, day)] & mask:
+            overlapping.add((doctor_id, day))
+        busy[(doctor_id, day)] |= mask
+
+    wrong = {True: [], False: []}
+    for slot_id, doctor_id, day, slot_time, is_booked in db.session.query(
+        Availability.id, Availability.doctor_id, Availability.date, Availability.time, Availability.is_booked
+    ).filter(Availability.doctor_id.in_(doctor_ids)):
+        start = slot_time.hour * 60 + slot_time.minute
+        booked = bool(busy.get((doctor_id, day), 0) & interval_mask(start, start + length))
+        if booked != bool(is_booked):
+            wrong[booked].append(slot_id)
+
+    return wrong, overlapping
+
+
+def check_occupancy(repair=False, sample_size=20):
+    """Compare stored occupancy with the source tables, optionally rewriting bad days
+
+    Returns counts of days that are missing (source data but no row), stale
+    (row differs) and orphaned (row without source data), of availability
+    slots whose is_booked flag is wrong (stale_flags) and of days with
+    overlapping active appointments, plus a sample of the affected keys.
+    With repair=True bad days are recomputed and wrong flags rewritten,
+    committed one doctor batch at a time; overlapping appointments are
+    only reported, since one of them has to be moved or cancelled by hand.
+    """
+    doctor_ids = [doctor_id for (doctor_id,) in db.session.query(Doctor.id).order_by(Doctor.id)]
+    stats = {
+        'doctors': len(doctor_ids), 'days': 0, 'missing': 0, 'stale': 0, 'orphaned': 0,
+        'stale_flags': 0, 'overlapping': 0, 'repaired': 0, 'repaired_flags': 0
+    }
+    sample = []
+
+    for index in range(0, len(doctor_ids), CHECK_BATCH_DOCTORS):
+        batch = doctor_ids[index:index + CHECK_BATCH_DOCTORS]
+        flags, overlapping = slot_flag_errors(batch)
+        stats['stale_flags'] += len(flags[True]) + len(flags[False])
+        stats['overlapping'] += len(overlapping)
+        for doctor_id, day in sorted(overlapping)[:max(sample_size - len(sample), 0)]:
+            sample.append({'doctor_id': doctor_id, 'date': day.isoformat(), 'problem': 'overlap'})
+
+        if repair and (flags[True] or flags[False]):
+            try:
+                for is_booked, slot_ids in flags.items():
+                    for start in range(0, len(slot_ids), WRITE_BATCH_SIZE):
+                        db.session.execute(
+                            update(Availability)
+                            .where(Availability.id.in_(slot_ids[start:start + WRITE_BATCH_SIZE]))
+                            .values(is_booked=is_booked)
+                            .execution_options(synchronize_session=False)
+                        )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            stats['repaired_flags'] += len(flags[True]) + len(flags[False])
+
+        expected = source_days(batch)
+        stored = {
+            (doctor_id, day): (DoctorDayOccupancy.decode(published), DoctorDayOccupancy.decode(busy))
+            for doctor_id, day, published, busy in db.session.query(
+                DoctorDayOccupancy.doctor_id, DoctorDayOccupancy.date,
+                DoctorDayOccupancy.published, DoctorDayOccupancy.busy
+            ).filter(DoctorDayOccupancy.doctor_id.in_(batch))
+        }
+
+        bad = []
+        for key in sorted(expected.keys() | stored.keys()):
+            stats['days'] += 1
+            if key not in stored:
+                problem = 'missing'
+            elif key not in expected:
+                problem = 'orphaned'
+            elif stored[key] != expected[key]:
+                problem = 'stale'
+            else:
+                continue
+            stats[problem] += 1
+            bad.append(key)
+            if len(sample) < sample_size:
+                sample.append({'doctor_id': key[0], 'date': key[1].isoformat(), 'problem': problem})
+
+        if repair and bad:
+            try:
+                refresh_days(bad)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            stats['repaired'] += len(bad)
+
+    db.session.rollback()
+    stats['sample'] = sample
+    return stats
+
+
+def ensure_occupancy():
+    """Build the occupancy table when it is empty but source rows exist (first start, upgrades)"""
+    if db.session.query(DoctorDayOccupancy.id).first():
+        return
+    if not (db.session.query(Availability.id).first() or db.session.query(Appointment.id).first()):
+        return
+
+    stats = check_occupancy(repair=True)
+    logger.info('Built doctor occupancy for %d days', stats['repaired'])
+
+
+def register_occupancy_commands(app):
+    """flask occupancy-check [--repair]"""
+
+    @app.cli.command('occupancy-check')
+    @click.option('--repair', is_flag=True, help='Recompute days that do not match the source tables')
+    def occupancy_check(repair):
+        stats = check_occupancy(repair=repair)
+        for problem in stats.pop('sample'):
+            click.echo(f"{problem['problem']:>8}  doctor {problem['doctor_id']}  {problem['date']}")
+        click.echo(', '.join(f'{key}={value}' for key, value in stats.items()))
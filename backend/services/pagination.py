@@ -0,0 +1,154 @@
+import base64
+import json
+from datetime import date, datetime, time
+from itertools import islice
+
+from flask import Response, jsonify, stream_with_context
+from sqlalchemy import literal, tuple_
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_LIMIT = 500
+
+_DECODERS = {
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    datetime: datetime.fromisoformat,
+}
+
+
+def parse_pagination(args, order_columns):
+    """Read ?limit=, ?cursor= and ?stream= into list_response() keyword arguments"""
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit <= 0 or limit > MAX_LIMIT:
+            raise ValueError(f'limit must be between 1 and {MAX_LIMIT}')
+
+    stream = args.get('stream')
+    if stream and stream not in ('json', 'ndjson'):
+        raise ValueError('stream must be json or ndjson')
+
+    cursor = args.get('cursor')
+    after = decode_cursor(cursor, order_columns) if cursor else None
+
+    return {'limit': limit, 'after': after, 'stream': stream or None}
+
+
+def parse_date_range(args):
+    """(start_date, end_date) from ?date= or ?start_date= / ?end_date=, either end may be None"""
+    try:
+        if args.get('date'):
+            day = datetime.strptime(args['date'], '%Y-%m-%d').date()
+            return day, day
+        start_date = datetime.strptime(args['start_date'], '%Y-%m-%d').date() if args.get('start_date') else None
+        end_date = datetime.strptime(args['end_date'], '%Y-%m-%d').date() if args.get('end_date') else None
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+    if start_date and end_date and end_date < start_date:
+        raise ValueError('end_date must not be before start_date')
+    return start_date, end_date
+
+
+def encode_cursor(row, order_columns):
+    values = [getattr(row, column.key) for column in order_columns]
+    raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order_columns):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(order_columns):
+            raise ValueError
+        return [
+            _DECODERS.get(column.type.python_type, column.type.python_type)(value)
+            for column, value in zip(order_columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def apply_keyset(query, order_columns, after=None, descending=False):
+    """Order by the keyset columns and continue after the decoded cursor values"""
+    if after:
+        keys = tuple_(*order_columns)
+        cursor_keys = tuple_(*[literal(value, column.type) for column, value in zip(order_columns, after)])
+        query = query.filter(keys < cursor_keys if descending else keys > cursor_keys)
+
+    return query.order_by(*[column.desc() if descending else column.asc() for column in order_columns])
+
+
+def list_response(query, order_columns, serialize, limit=None, after=None, descending=False,
+                  envelope=None, transform=None, stream=None):
+    """JSON response for a list query with keyset pagination or streaming
+
+    serialize turns one row into a dict, transform (optional) filters a batch
+    of rows, envelope wraps the list as {envelope: [...]} instead of a bare array.
+    """
+    if stream:
+        query = apply_keyset(query, order_columns, after, descending)
+        if limit:
+            query = query.limit(limit)
+        return _stream_response(query, serialize, envelope, transform, stream)
+
+    if limit:
+        rows = _fill_page(query, order_columns, limit, after, descending, transform)
+    else:
+        rows = apply_keyset(query, order_columns, after, descending).all()
+        rows = transform(rows) if transform else rows
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1], order_columns)
+
+    items = [serialize(row) for row in rows]
+    response = jsonify({envelope: items, 'next_cursor': next_cursor} if envelope else items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+def _fill_page(query, order_columns, limit, after, descending, transform):
+    """Up to limit + 1 rows that pass transform, fetching again past the rows it drops"""
+    rows = []
+    while True:
+        batch = apply_keyset(query, order_columns, after, descending).limit(limit + 1).all()
+        rows.extend(transform(batch) if transform else batch)
+        if len(rows) > limit or len(batch) <= limit:
+            return rows
+        after = [getattr(batch[-1], column.key) for column in order_columns]
+
+
+def iter_chunks(query, size=DEFAULT_CHUNK_SIZE):
+    """Iterate a query in lists of rows fetched with yield_per"""
+    rows = iter(query.yield_per(size))
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _stream_response(query, serialize, envelope, transform, mode):
+    def generate_ndjson():
+        for chunk in iter_chunks(query):
+            for row in transform(chunk) if transform else chunk:
+                yield json.dumps(serialize(row)) + '\n'
+
+    def generate_json():
+        yield '{"%s": [' % envelope if envelope else '['
+        first = True
+        for chunk in iter_chunks(query):
+            for row in transform(chunk) if transform else chunk:
+                yield ('' if first else ',') + json.dumps(serialize(row))
+                first = False
+        yield ']}' if envelope else ']'
+
+    if mode == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_json()), mimetype='application/json')
@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+class InMemoryBucketStore:
+    """Process-local token buckets keyed by string
+
+    Every worker process counts on its own, so with N workers a client can
+    get up to N times the configured rate and burst. A shared backend (e.g.
+    a Redis script doing the same arithmetic) can replace it through
+    set_bucket_store() as long as take() is atomic per key.
+    """
+
+    # Drop idle buckets once this many exist; a full bucket carries no state
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._prune_at = self.PRUNE_THRESHOLD
+
+    def take(self, key, rate, burst, now=None):
+        """Consume one token; returns (allowed, seconds until a token is available)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (1 - tokens) / rate
+            # Each bucket keeps the moment it refills under its own limiter's rate and burst
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+            if len(self._buckets) > self._prune_at:
+                self._prune(now)
+            return allowed, retry_after
+
+    def reset(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._buckets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._prune_at = self.PRUNE_THRESHOLD
+
+    def _prune(self, now):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        # With many live buckets, wait until the store doubles before scanning it
+        # again, so the cost of each scan is spread over as many inserts
+        self._prune_at = max(self.PRUNE_THRESHOLD, 2 * len(self._buckets))
+
+
+class TokenBucketLimiter:
+    """Allows burst requests at once and rate requests per second after that"""
+
+    def __init__(self, rate, burst, prefix):
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+
+    def hit(self, key):
+        return get_bucket_store().take(f'{self.prefix}:{key}', self.rate, self.burst)
+
+    def reset(self, key):
+        get_bucket_store().reset(f'{self.prefix}:{key}')
+
+
+# Shared instance used by the limiters
+bucket_store = InMemoryBucketStore()
+
+
+def get_bucket_store():
+    return bucket_store
+
+
+def set_bucket_store(store):
+    global bucket_store
+    bucket_store = store
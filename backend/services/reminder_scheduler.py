@@ -0,0 +1,172 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import literal, tuple_, update
+
+from models import db, Appointment, Doctor, Patient
+from services.email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """Periodically sends reminders for appointments entering the reminder window
+
+    Each tick walks the window (now, now + lead_time] in keyset batches over
+    the partial index of appointments whose reminder_sent_at is NULL, so rows
+    that were already reminded are never scanned again. A batch is claimed by
+    a conditional UPDATE before sending, which keeps reminders unique across
+    threads and processes; rows whose send fails are released for the next tick.
+    """
+
+    def __init__(self, lead_time=timedelta(hours=24), interval_seconds=60, batch_size=500,
+                 workers=8, send=None):
+        self.lead_time = lead_time
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.workers = workers
+        self.send = send or email_service.send_appointment_reminder
+
+        self._app = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self, app):
+        if self._thread and self._thread.is_alive():
+            return
+        self._app = app
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                with self._app.app_context():
+                    self.run_once()
+            except Exception:
+                logger.exception('Reminder dispatch failed')
+            self._stopping.wait(self.interval_seconds)
+
+    def run_once(self, now=None):
+        """Dispatch every due reminder once; must run inside an app context"""
+        now = now or datetime.now()
+        window_end = now + self.lead_time
+        stats = {'claimed': 0, 'sent': 0, 'failed': 0, 'batches': 0}
+
+        cursor = (now.date(), now.time(), 0)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                due = self._next_batch(cursor, window_end)
+                if not due:
+                    break
+                cursor = due[-1]
+
+                claimed = self._claim([appointment_id for _, _, appointment_id in due], now)
+                stats['batches'] += 1
+                stats['claimed'] += len(claimed)
+                if not claimed:
+                    continue
+
+                failed = [
+                    appointment_id
+                    for appointment_id, ok in zip(claimed, pool.map(self._send_one, self._details(claimed)))
+                    if not ok
+                ]
+                if failed:
+                    self._release(failed)
+                stats['sent'] += len(claimed) - len(failed)
+                stats['failed'] += len(failed)
+
+        return stats
+
+    def _next_batch(self, cursor, window_end):
+        keys = tuple_(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+        after = tuple_(
+            literal(cursor[0], Appointment.appointment_date.type),
+            literal(cursor[1], Appointment.appointment_time.type),
+            literal(cursor[2])
+        )
+        end = tuple_(
+            literal(window_end.date(), Appointment.appointment_date.type),
+            literal(window_end.time(), Appointment.appointment_time.type)
+        )
+        return db.session.query(
+            Appointment.appointment_date, Appointment.appointment_time, Appointment.id
+        ).filter(
+            Appointment.reminder_sent_at.is_(None),
+            keys > after,
+            tuple_(Appointment.appointment_date, Appointment.appointment_time) <= end,
+            Appointment.status.in_(Appointment.ACTIVE_STATUSES)
+        ).order_by(
+            Appointment.appointment_date, Appointment.appointment_time, Appointment.id
+        ).limit(self.batch_size).all()
+
+    def _claim(self, appointment_ids, now):
+        # Only rows nobody else has claimed in the meantime are returned
+        result = db.session.execute(
+            update(Appointment)
+            .where(Appointment.id.in_(appointment_ids), Appointment.reminder_sent_at.is_(None))
+            .values(reminder_sent_at=now, updated_at=Appointment.updated_at)
+            .returning(Appointment.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = [row[0] for row in result]
+        db.session.commit()
+        return claimed
+
+    def _release(self, appointment_ids):
+        db.session.execute(
+            update(Appointment)
+            .where(Appointment.id.in_(appointment_ids))
+            .values(reminder_sent_at=None, updated_at=Appointment.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _details(self, appointment_ids):
+        rows = db.session.query(
+            Appointment.id, Patient.email, Patient.name, Doctor.name,
+            Appointment.appointment_date, Appointment.appointment_time
+        ).join(Patient, Appointment.patient_id == Patient.id).join(
+            Doctor, Appointment.doctor_id == Doctor.id
+        ).filter(Appointment.id.in_(appointment_ids)).all()
+
+        by_id = {row[0]: row[1:] for row in rows}
+        return [by_id.get(appointment_id) for appointment_id in appointment_ids]
+
+    def _send_one(self, details):
+        if details is None:
+            return False
+        email, patient_name, doctor_name, appointment_date, appointment_time = details
+        try:
+            return bool(self.send(
+                email, patient_name, doctor_name,
+                appointment_date.isoformat(), appointment_time.strftime('%H:%M')
+            ))
+        except Exception:
+            logger.exception('Reminder to %s failed', email)
+            return False
+
+
+def init_reminders(app):
+    """Start the reminder scheduler when REMINDERS_ENABLED is set"""
+    if not app.config.get('REMINDERS_ENABLED'):
+        return None
+
+    scheduler = ReminderScheduler(
+        lead_time=timedelta(hours=app.config.get('REMINDER_LEAD_HOURS', 24)),
+        interval_seconds=app.config.get('REMINDER_INTERVAL_SECONDS', 60),
+        batch_size=app.config.get('REMINDER_BATCH_SIZE', 500),
+        workers=app.config.get('REMINDER_WORKERS', 8)
+    )
+    scheduler.start(app)
+    app.extensions['reminder_scheduler'] = scheduler
+    return scheduler
@@ -0,0 +1,89 @@
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+from models.routing import REPLICA_BIND_PREFIX
+from services.cache import get_cache
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Unix time until which this client's reads stay on the primary
+PIN_COOKIE = 'primary_reads_until'
+
+
+def _pin_key(identity):
+    return f'replica:pin:{identity}'
+
+
+def _token_identity():
+    """role:user_id of a valid access token on the request, if any"""
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        # Expired or malformed tokens are the view's business, not routing's
+        return None
+    claims = get_jwt()
+    if not claims.get('sub'):
+        return None
+    return f"{claims.get('role')}:{claims['sub']}"
+
+
+def _pinned_to_primary(now):
+    try:
+        if float(request.cookies.get(PIN_COOKIE, 0)) > now:
+            return True
+    except ValueError:
+        pass
+
+    identity = _token_identity()
+    return identity is not None and (get_cache().get(_pin_key(identity)) or 0) > now
+
+
+def reading_from_replica():
+    return has_request_context() and g.get('db_replica') is not None
+
+
+def replica_cache_ttl(ttl):
+    """Cap the TTL of cache entries filled from a replica by the replica lag bound
+
+    Otherwise an entry rebuilt from a lagging replica right after a write
+    could hide that write for the full TTL.
+    """
+    if not reading_from_replica():
+        return ttl
+    max_lag = current_app.config.get('REPLICA_MAX_LAG_SECONDS', 5)
+    return min(ttl, max_lag) if ttl else max_lag
+
+
+def init_replica_routing(app):
+    """Route reads of GET requests to a replica bind, with read-your-writes pinning
+
+    Each read request picks one replica for all of its queries. A successful
+    write pins its client to the primary for REPLICA_MAX_LAG_SECONDS, by
+    cookie and, for token-authenticated clients, by identity in the shared
+    cache, so a user who just booked sees the booking on the next page load.
+    """
+    replicas = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_BIND_PREFIX))
+    if not replicas:
+        return
+
+    max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', 5)
+
+    @app.before_request
+    def route_reads():
+        if request.method in READ_METHODS and not _pinned_to_primary(time.time()):
+            g.db_replica = random.choice(replicas)
+
+    @app.after_request
+    def pin_writer(response):
+        if request.method in READ_METHODS or response.status_code >= 400:
+            return response
+
+        until = time.time() + max_lag
+        response.set_cookie(PIN_COOKIE, f'{until:.3f}', max_age=int(max_lag) + 1, httponly=True, samesite='Lax')
+        identity = _token_identity()
+        if identity is not None:
+            get_cache().set(_pin_key(identity), until, ttl=max_lag)
+        return response
@@ -0,0 +1,54 @@
+from sqlalchemy.orm import joinedload, load_only, raiseload
+
+from models import Appointment
+
+# Plain column fields of Appointment.to_dict() and the nested objects it can embed
+APPOINTMENT_COLUMNS = (
+    'id', 'patient_id', 'doctor_id', 'appointment_date', 'appointment_time',
+    'duration_minutes', 'status', 'notes', 'created_at', 'updated_at'
+)
+APPOINTMENT_RELATIONS = ('patient', 'doctor')
+
+# Keyset for appointment listings: newest first, id breaks ties
+APPOINTMENT_KEYSET = (Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+
+APPOINTMENT_VIEWS = {
+    'compact': ('id', 'patient_id', 'doctor_id', 'appointment_date', 'appointment_time', 'duration_minutes', 'status'),
+    'standard': APPOINTMENT_COLUMNS,
+    'full': APPOINTMENT_COLUMNS + APPOINTMENT_RELATIONS,
+}
+
+
+def parse_appointment_fields(args, default_view='full'):
+    """Resolve ?fields= or ?view= into the tuple of appointment fields to serialize"""
+    fields = args.get('fields')
+    if fields:
+        requested = tuple(field.strip() for field in fields.split(',') if field.strip())
+        unknown = [field for field in requested if field not in APPOINTMENT_COLUMNS + APPOINTMENT_RELATIONS]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+        return requested
+
+    view = args.get('view', default_view)
+    if view not in APPOINTMENT_VIEWS:
+        raise ValueError(f'Invalid view. Must be one of: {list(APPOINTMENT_VIEWS)}')
+    return APPOINTMENT_VIEWS[view]
+
+
+def appointment_load_options(fields, entity=Appointment):
+    """Loader options that fetch only the needed columns and eager-load requested relations
+
+    entity may be an alias of Appointment, e.g. over the live and archived union.
+    """
+    # Foreign keys attach eager-loaded relations and the keyset builds cursors
+    columns = {'id', 'patient_id', 'doctor_id', 'appointment_date', 'appointment_time'} | {field for field in fields if field in APPOINTMENT_COLUMNS}
+    options = [load_only(*[getattr(entity, column) for column in sorted(columns)])]
+
+    for relation in APPOINTMENT_RELATIONS:
+        if relation in fields:
+            options.append(joinedload(getattr(entity, relation)))
+        else:
+            # Fail loudly instead of silently issuing one SELECT per row
+            options.append(raiseload(getattr(entity, relation)))
+
+    return options
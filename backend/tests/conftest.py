@@ -0,0 +1,110 @@
+"""Fixtures: a fresh app and SQLite database per test, plus factories for users, slots and bookings"""
+import itertools
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Config reads the environment at import time; the class attributes are what create_app() copies
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.sqlite'}")
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    monkeypatch.setattr(Config, 'LOGIN_RATE_LIMIT_ENABLED', False)
+
+    from app import create_app
+    from models import db
+    from services.cache import get_cache
+    from services.rate_limiter import get_bucket_store
+
+    # Process-wide caches would otherwise carry ids over from earlier tests
+    get_cache().clear()
+    get_bucket_store().clear()
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def factory(app):
+    return Factory()
+
+
+class Factory:
+    """Creates rows through the same services the routes use"""
+
+    PASSWORD = 'test-password'
+
+    def __init__(self):
+        self._numbers = itertools.count(1)
+
+    def doctor(self, **fields):
+        from models import db, Doctor
+        from services.auth_service import auth_service
+
+        number = next(self._numbers)
+        doctor = Doctor(**{
+            'name': f'Dr Test {number}', 'email': f'doctor{number}@test.local',
+            'password': auth_service.hash_password(self.PASSWORD), 'specialization': 'Cardiology',
+            'phone': '555-0100', 'experience_years': 10, 'education': 'MD', 'consultation_fee': 100.0,
+            **fields
+        })
+        db.session.add(doctor)
+        db.session.commit()
+        return doctor
+
+    def patient(self, **fields):
+        from models import db, Patient
+        from services.auth_service import auth_service
+
+        number = next(self._numbers)
+        patient = Patient(**{
+            'name': f'Patient {number}', 'email': f'patient{number}@test.local',
+            'password': auth_service.hash_password(self.PASSWORD), 'phone': '555-0200',
+            'date_of_birth': date(1990, 1, 1), 'gender': 'other',
+            **fields
+        })
+        db.session.add(patient)
+        db.session.commit()
+        return patient
+
+    def headers(self, user):
+        """Authorization header of a freshly issued access token for a Doctor or Patient"""
+        from models import Doctor
+        from services.identity import create_tokens
+
+        role = 'doctor' if isinstance(user, Doctor) else 'patient'
+        return {'Authorization': f"Bearer {create_tokens(role, user)['access_token']}"}
+
+    def slots(self, doctor, day, *times):
+        """Publish availability slots ('HH:MM') for a doctor on a day"""
+        from services.availability_schedule import bulk_create_slots
+
+        return bulk_create_slots(doctor.id, [(day, _time(value)) for value in times])
+
+    def appointment(self, patient, doctor, day, at, duration_minutes=30):
+        """Book through reserve_slot, like POST /api/appointments/"""
+        from services.booking_service import reserve_slot
+
+        return reserve_slot(patient.id, doctor.id, day, _time(at), duration_minutes=duration_minutes)
+
+
+def _time(value):
+    return value if isinstance(value, time) else datetime.strptime(value, '%H:%M').time()
+
+
+@pytest.fixture
+def tomorrow():
+    return date.today() + timedelta(days=1)
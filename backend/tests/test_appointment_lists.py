@@ -0,0 +1,60 @@
+"""List endpoints run a fixed number of SQL statements however many rows they return"""
+from datetime import timedelta
+
+import pytest
+
+# Appointment start times within default working hours
+TIMES = [f'{hour:02d}:{minute:02d}' for hour in range(9, 17) for minute in (0, 30)]
+
+
+def sql_statements(app, client, url, headers=None):
+    """Run one GET and return the statements the metrics listener counted for it"""
+    histograms = app.extensions['metrics'].queries
+    before = {key: histogram.total for key, histogram in histograms.items()}
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+    counted = [histogram.total - before.get(key, 0) for key, histogram in histograms.items()]
+    assert sum(1 for value in counted if value) == 1
+    return int(sum(counted)), response.get_json()
+
+
+def book(factory, patients, doctor, first_day, count, offset=0):
+    for index in range(offset, offset + count):
+        day = first_day + timedelta(days=index // len(TIMES))
+        factory.appointment(patients[index % len(patients)], doctor, day, TIMES[index % len(TIMES)])
+
+
+@pytest.mark.parametrize('view', ['', '&view=compact', '&fields=id,status,patient'])
+def test_list_query_count_does_not_grow_with_rows(app, client, factory, tomorrow, view):
+    doctor = factory.doctor()
+    patients = [factory.patient() for _ in range(6)]
+    urls = {
+        'doctor': (f'/api/appointments/doctor?doctor_id={doctor.id}{view}', None),
+        'doctor, token': (f'/api/doctors/appointments?limit=200{view}', factory.headers(doctor)),
+        'patient': (f'/api/patients/appointments?limit=200{view}', {'X-Patient-ID': str(patients[0].id)}),
+    }
+
+    book(factory, patients, doctor, tomorrow, 3)
+    few = {name: sql_statements(app, client, url, headers) for name, (url, headers) in urls.items()}
+
+    book(factory, patients, doctor, tomorrow, 30, offset=3)
+    many = {name: sql_statements(app, client, url, headers) for name, (url, headers) in urls.items()}
+
+    for name in urls:
+        (few_count, few_body), (many_count, many_body) = few[name], many[name]
+        assert len(many_body['appointments']) > len(few_body['appointments'])
+        assert many_count == few_count, f'{name}: {few_count} statements for a short list, {many_count} for a long one'
+
+
+def test_full_view_embeds_patient_and_doctor(app, client, factory, tomorrow):
+    doctor = factory.doctor()
+    patient = factory.patient()
+    factory.appointment(patient, doctor, tomorrow, '10:00')
+
+    _, body = sql_statements(app, client, f'/api/appointments/doctor?doctor_id={doctor.id}')
+
+    appointment, = body['appointments']
+    assert appointment['patient']['id'] == patient.id
+    assert appointment['doctor']['id'] == doctor.id
@@ -0,0 +1,127 @@
+"""Status changes go through the state machine and keep slots in step, on every route"""
+from models import db, Appointment, Availability
+
+
+def slot_booked(doctor, day, at):
+    db.session.expire_all()
+    return Availability.query.filter_by(doctor_id=doctor.id, date=day).filter(
+        db.func.strftime('%H:%M', Availability.time) == at
+    ).one().is_booked
+
+
+def available_slots(client, doctor, day, duration=None):
+    url = f'/api/appointments/doctor/{doctor.id}/available-slots?date={day.isoformat()}'
+    response = client.get(url + (f'&duration={duration}' if duration else ''))
+    assert response.status_code == 200
+    return response.get_json()['available_slots']
+
+
+def test_put_rejects_unknown_status(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    appointment = factory.appointment(patient, doctor, tomorrow, '10:00')
+
+    response = client.put(f'/api/appointments/{appointment.id}', json={'status': 'bogus'}, headers=factory.headers(doctor))
+
+    assert response.status_code == 400
+    assert db.session.get(Appointment, appointment.id).status == 'scheduled'
+
+
+def test_put_patient_can_cancel_but_not_complete(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    factory.slots(doctor, tomorrow, '10:00')
+    appointment = factory.appointment(patient, doctor, tomorrow, '10:00')
+    url = f'/api/appointments/{appointment.id}'
+
+    assert client.put(url, json={'status': 'completed'}, headers=factory.headers(patient)).status_code == 403
+
+    response = client.put(url, json={'status': 'cancelled'}, headers=factory.headers(patient))
+    assert response.status_code == 200
+    assert response.get_json()['appointment']['status'] == 'cancelled'
+    assert not slot_booked(doctor, tomorrow, '10:00')
+    assert '10:00' in available_slots(client, doctor, tomorrow)
+
+
+def test_put_follows_state_machine(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    appointment = factory.appointment(patient, doctor, tomorrow, '10:00')
+    url = f'/api/appointments/{appointment.id}'
+    headers = factory.headers(doctor)
+
+    # scheduled -> completed skips confirmation
+    assert client.put(url, json={'status': 'completed'}, headers=headers).status_code == 409
+    assert client.put(url, json={'status': 'confirmed'}, headers=headers).status_code == 200
+    assert client.put(url, json={'status': 'completed'}, headers=headers).status_code == 200
+    assert client.put(url, json={'status': 'scheduled'}, headers=headers).status_code == 409
+
+
+def test_put_cannot_reactivate_over_another_booking(client, factory, tomorrow):
+    doctor, first, second = factory.doctor(), factory.patient(), factory.patient()
+    factory.slots(doctor, tomorrow, '10:00', '10:30')
+    cancelled = factory.appointment(first, doctor, tomorrow, '10:00', duration_minutes=60)
+    url = f'/api/appointments/{cancelled.id}'
+
+    assert client.put(url, json={'status': 'cancelled'}, headers=factory.headers(first)).status_code == 200
+    factory.appointment(second, doctor, tomorrow, '10:30')
+
+    response = client.put(url, json={'status': 'scheduled'}, headers=factory.headers(doctor))
+
+    assert response.status_code == 409
+    active = Appointment.query.filter(
+        Appointment.doctor_id == doctor.id, Appointment.status.in_(Appointment.ACTIVE_STATUSES)
+    ).count()
+    assert active == 1
+    assert slot_booked(doctor, tomorrow, '10:30')
+    assert not slot_booked(doctor, tomorrow, '10:00')
+
+
+def test_put_notes_only_keeps_status(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    appointment = factory.appointment(patient, doctor, tomorrow, '10:00')
+
+    response = client.put(f'/api/appointments/{appointment.id}', json={'notes': 'bring results'}, headers=factory.headers(patient))
+
+    assert response.status_code == 200
+    body = response.get_json()['appointment']
+    assert (body['status'], body['notes']) == ('scheduled', 'bring results')
+
+
+def test_status_route_frees_slot_on_rejection(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    factory.slots(doctor, tomorrow, '10:00')
+    appointment = factory.appointment(patient, doctor, tomorrow, '10:00')
+
+    response = client.put(f'/api/appointments/{appointment.id}/status', json={'status': 'rejected'}, headers=factory.headers(doctor))
+
+    assert response.status_code == 200
+    assert not slot_booked(doctor, tomorrow, '10:00')
+    assert '10:00' in available_slots(client, doctor, tomorrow)
+
+
+def test_status_route_requires_participant(client, factory, tomorrow):
+    doctor, other_doctor, patient = factory.doctor(), factory.doctor(), factory.patient()
+    appointment = factory.appointment(patient, doctor, tomorrow, '10:00')
+    url = f'/api/appointments/{appointment.id}/status'
+
+    assert client.put(url, json={'status': 'confirmed'}).status_code == 401
+    assert client.put(url, json={'status': 'confirmed'}, headers=factory.headers(other_doctor)).status_code == 403
+    assert client.put(url, json={'status': 'confirmed'}, headers=factory.headers(patient)).status_code == 403
+    assert client.put(url, json={'status': 'confirmed'}, headers=factory.headers(doctor)).status_code == 200
+
+
+def test_batch_requires_doctor_and_is_scoped_to_them(client, factory, tomorrow):
+    doctor, other_doctor, patient = factory.doctor(), factory.doctor(), factory.patient()
+    own = factory.appointment(patient, doctor, tomorrow, '10:00')
+    foreign = factory.appointment(patient, other_doctor, tomorrow, '11:00')
+    payload = {'ids': [own.id, foreign.id], 'status': 'cancelled'}
+
+    assert client.put('/api/appointments/status', json=payload).status_code == 401
+    assert client.put('/api/appointments/status', json=payload, headers=factory.headers(patient)).status_code == 403
+
+    response = client.put('/api/appointments/status', json=payload, headers=factory.headers(doctor))
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [item['id'] for item in body['updated']] == [own.id]
+    assert body['errors'] == [{'id': foreign.id, 'error': 'Appointment not found'}]
+    db.session.expire_all()
+    assert db.session.get(Appointment, foreign.id).status == 'scheduled'
@@ -0,0 +1,66 @@
+"""Slots published from a recurrence rule are the same SLOT_MINUTES rows the booking path reads"""
+from datetime import time
+
+from models import db, Availability
+
+
+def publish(client, doctor, recurrence):
+    return client.post('/api/doctor/availability/bulk', json={'recurrence': recurrence}, headers={'X-Doctor-ID': str(doctor.id)})
+
+
+def test_long_recurrence_slots_are_split_and_bookable(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    day = tomorrow.isoformat()
+
+    response = publish(client, doctor, {
+        'start_date': day, 'end_date': day, 'hours': [{'start': '09:00', 'end': '12:00'}], 'slot_minutes': 60
+    })
+
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 6
+    times = [row.time.strftime('%H:%M') for row in Availability.query.filter_by(doctor_id=doctor.id).order_by(Availability.time)]
+    assert times == ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30']
+
+    url = f'/api/appointments/doctor/{doctor.id}/available-slots?date={day}&duration=60'
+    assert client.get(url).get_json()['available_slots'] == ['09:00', '09:30', '10:00', '10:30', '11:00']
+
+    response = client.post('/api/appointments/', json={
+        'patient_id': patient.id, 'doctor_id': doctor.id, 'appointment_date': day,
+        'appointment_time': '09:00', 'duration_minutes': 60
+    })
+
+    assert response.status_code == 201
+    db.session.expire_all()
+    booked = [row.time.strftime('%H:%M') for row in Availability.query.filter_by(doctor_id=doctor.id, is_booked=True)]
+    assert sorted(booked) == ['09:00', '09:30']
+    assert client.get(url).get_json()['available_slots'] == ['10:00', '10:30', '11:00']
+
+
+def test_recurrence_rejects_slot_minutes_off_the_grid(client, factory, tomorrow):
+    doctor = factory.doctor()
+    day = tomorrow.isoformat()
+
+    response = publish(client, doctor, {'start_date': day, 'end_date': day, 'slot_minutes': 45})
+
+    assert response.status_code == 400
+    assert 'multiple of 30' in response.get_json()['error']
+    assert Availability.query.filter_by(doctor_id=doctor.id).count() == 0
+
+
+def test_availability_pages_stay_full_when_slots_are_booked(client, factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    factory.slots(doctor, tomorrow, '09:00', '09:30', '10:00', '10:30', '11:00', '11:30')
+    factory.appointment(patient, doctor, tomorrow, '09:00', duration_minutes=60)
+    # A flag an interrupted write left stale; only the occupancy check knows the slot is taken
+    factory.appointment(patient, doctor, tomorrow, '10:30')
+    Availability.query.filter_by(doctor_id=doctor.id, time=time(10, 30)).update({'is_booked': False})
+    db.session.commit()
+
+    headers = {'X-Doctor-ID': str(doctor.id)}
+    first = client.get(f'/api/doctor/availability?date={tomorrow.isoformat()}&limit=2', headers=headers)
+    cursor = first.headers['X-Next-Cursor']
+    second = client.get(f'/api/doctor/availability?date={tomorrow.isoformat()}&limit=2&cursor={cursor}', headers=headers)
+
+    assert [slot['time'] for slot in first.get_json()] == ['10:00:00', '11:00:00']
+    assert [slot['time'] for slot in second.get_json()] == ['11:30:00']
+    assert 'X-Next-Cursor' not in second.headers
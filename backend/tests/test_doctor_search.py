@@ -0,0 +1,51 @@
+"""Doctor search uses the full-text index in every process, and matches the same columns without it"""
+from sqlalchemy import inspect, text
+
+from models import db, search
+
+
+def searched_names(client, query):
+    response = client.get(f'/api/doctors/search?q={query}')
+    assert response.status_code == 200
+    return [doctor['name'] for doctor in response.get_json()['doctors']]
+
+
+def test_worker_without_setup_finds_the_index(client, factory):
+    factory.doctor(name='Dr Ada Byron', specialization='Cardiology')
+    factory.doctor(name='Dr Alan Turing', specialization='Neurology')
+    # A gunicorn worker: setup_database() ran in the master, never in this process
+    search._fts_engines.clear()
+
+    assert searched_names(client, 'byron') == ['Dr Ada Byron']
+    assert search.full_text_available()
+
+
+def test_full_text_and_like_fallback_match_the_same_columns(app, client, factory):
+    factory.doctor(name='Dr Ada Byron', specialization='Cardiology')
+    factory.doctor(name='Dr Alan Turing', specialization='Neurology')
+    url = str(db.engine.url)
+
+    for full_text in (True, False):
+        search._fts_engines[url] = full_text
+        assert searched_names(client, 'ada') == ['Dr Ada Byron']
+        # Specialization is a filter, not free text, on either path
+        assert searched_names(client, 'cardio') == []
+
+
+def test_index_over_old_columns_is_rebuilt(app, client, factory):
+    factory.doctor(name='Dr Ada Byron', specialization='Cardiology')
+    # An index created by an earlier release that also covered specialization
+    with db.engine.begin() as connection:
+        for statement in search._DROP_FTS_DDL:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE doctors_fts USING fts5("
+            "name, education, specialization, content='doctors', content_rowid='id')"
+        ))
+
+    search.ensure_doctor_search_index()
+
+    columns = [column['name'] for column in inspect(db.engine).get_columns('doctors_fts')]
+    assert columns == list(search.FTS_COLUMNS)
+    assert searched_names(client, 'byron') == ['Dr Ada Byron']
+    assert searched_names(client, 'cardio') == []
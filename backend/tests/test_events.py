@@ -0,0 +1,150 @@
+"""Event streams deliver changes made by other worker processes through the shared change feed"""
+import json
+from datetime import datetime
+
+from sqlalchemy import update
+
+from models import db, Appointment
+from services.events import event_broker
+
+
+def read_events(response, wanted, limit=200):
+    """Pull chunks from an open stream until `wanted` events arrived"""
+    events = []
+    for _, chunk in zip(range(limit), response.response):
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('id: ') and '\nevent: cursor\n' not in chunk:
+            events.append(json.loads(chunk.split('data: ', 1)[1]))
+        if len(events) == wanted:
+            break
+    response.close()
+    return events
+
+
+def stream_url(client, factory, user):
+    token = client.post('/api/events/token', headers=factory.headers(user)).get_json()['token']
+    return f'/api/events/stream?jwt={token}'
+
+
+def open_stream(client, factory, user, **kwargs):
+    response = client.get(stream_url(client, factory, user), **kwargs)
+    assert response.status_code == 200
+    return response
+
+
+def test_stream_polls_changes_from_other_workers(app, client, factory, tomorrow):
+    app.config['EVENT_POLL_SECONDS'] = 0.01
+    doctor, patient = factory.doctor(), factory.patient()
+    appointment_id = factory.appointment(patient, doctor, tomorrow, '10:00').id
+
+    response = open_stream(client, factory, patient)
+
+    # A write in another process: committed, but never published to this process's broker
+    db.session.execute(
+        update(Appointment).where(Appointment.id == appointment_id).values(status='confirmed', updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+
+    event, = read_events(response, 1)
+    assert event['type'] == 'appointment.updated'
+    assert (event['data']['id'], event['data']['status']) == (appointment_id, 'confirmed')
+
+
+def test_stream_does_not_repeat_local_events(app, client, factory, tomorrow):
+    app.config['EVENT_POLL_SECONDS'] = 0.01
+    doctor, patient = factory.doctor(), factory.patient()
+
+    response = open_stream(client, factory, patient)
+    # Published here, then re-read by the poll inside the overlap window
+    first = factory.appointment(patient, doctor, tomorrow, '10:00')
+    event_broker.publish_appointment(first, 'appointment.created')
+    first_id = first.id
+    other_id = factory.appointment(factory.patient(), doctor, tomorrow, '11:00').id
+    own_id = factory.appointment(patient, doctor, tomorrow, '12:00').id
+
+    events = read_events(response, 2)
+    assert [(event['type'], event['data']['id']) for event in events] == [
+        ('appointment.created', first_id), ('appointment.updated', own_id)
+    ]
+    assert other_id not in [event['data']['id'] for event in events]
+
+
+def test_stream_needs_a_stream_token(client, factory):
+    patient = factory.patient()
+    access = factory.headers(patient)['Authorization'].split()[1]
+    stream_token = client.post('/api/events/token', headers=factory.headers(patient)).get_json()['token']
+
+    assert client.post('/api/events/token').status_code == 401
+    assert client.get(f'/api/events/stream?patient_id={patient.id}').status_code == 401
+    # Access tokens stay out of URLs, and stream tokens open nothing but the stream
+    assert client.get(f'/api/events/stream?jwt={access}').status_code == 401
+    url = '/api/appointments/changes?since=2000-01-01T00:00:00'
+    assert client.get(url, headers={'Authorization': f'Bearer {stream_token}'}).status_code == 400
+
+
+def test_changes_are_limited_to_the_caller(client, factory, tomorrow):
+    doctor, patient, other = factory.doctor(), factory.patient(), factory.patient()
+    own_id = factory.appointment(patient, doctor, tomorrow, '10:00').id
+    other_id = factory.appointment(other, doctor, tomorrow, '11:00').id
+    url = f'/api/appointments/changes?patient_id={other.id}&since=2000-01-01T00:00:00'
+
+    assert client.get(url).status_code == 401
+
+    response = client.get(url, headers=factory.headers(patient))
+    assert [item['id'] for item in response.get_json()['appointments']] == [own_id]
+
+    response = client.get(url, headers=factory.headers(doctor))
+    assert [item['id'] for item in response.get_json()['appointments']] == [own_id, other_id]
+
+
+def test_streams_per_process_are_capped(app, client, factory):
+    app.config['EVENT_MAX_STREAMS'] = 1
+    patient = factory.patient()
+    url = stream_url(client, factory, patient)
+
+    first = client.get(url)
+    assert first.status_code == 200
+
+    busy = client.get(url)
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '30'
+
+    # Closed before its first chunk was read, the stream still frees its place
+    first.close()
+    assert event_broker.subscriber_count() == 0
+    second = client.get(url)
+    assert second.status_code == 200
+    second.close()
+
+
+def test_stream_closes_after_its_lifetime(app, client, factory):
+    app.config['EVENT_STREAM_MAX_SECONDS'] = 0
+    response = open_stream(client, factory, factory.patient())
+
+    assert b''.join(response.response) == b'retry: 5000\n\n'
+    assert event_broker.subscriber_count() == 0
+
+
+def test_stream_resumes_from_last_event_id(app, client, factory, tomorrow):
+    app.config['EVENT_POLL_SECONDS'] = 0.01
+    doctor, patient = factory.doctor(), factory.patient()
+    url = stream_url(client, factory, patient)
+
+    response = client.get(url)
+    chunks = iter(response.response)
+    cursor = None
+    while cursor is None:
+        chunk = next(chunks).decode()
+        if chunk.startswith('id: '):
+            cursor = chunk.split('\n', 1)[0][len('id: '):]
+    response.close()
+
+    # Booked while the client was disconnected; never published to this process
+    appointment_id = factory.appointment(
+        db.session.merge(patient), db.session.merge(doctor), tomorrow, '10:00'
+    ).id
+
+    app.config['EVENT_POLL_SECONDS'] = 0
+    response = client.get(url, headers={'Last-Event-ID': cursor})
+    event, = read_events(response, 1)
+    assert event['data']['id'] == appointment_id
@@ -0,0 +1,52 @@
+"""Idempotency keys are scoped per caller and replay the stored response, headers included"""
+from flask import jsonify
+
+from models import Appointment
+from services.idempotency import idempotent
+
+
+def book(client, patient, doctor, day, at, key, **kwargs):
+    return client.post('/api/appointments/', json={
+        'patient_id': patient.id, 'doctor_id': doctor.id, 'appointment_date': day.isoformat(), 'appointment_time': at
+    }, headers={'Idempotency-Key': key}, **kwargs)
+
+
+def test_anonymous_callers_do_not_share_keys(client, factory, tomorrow):
+    doctor, first, second = factory.doctor(), factory.patient(), factory.patient()
+
+    assert book(client, first, doctor, tomorrow, '10:00', 'booking-1').status_code == 201
+    # Same key from another patient, and from the same patient at another address
+    assert book(client, second, doctor, tomorrow, '11:00', 'booking-1').status_code == 201
+    response = book(client, first, doctor, tomorrow, '12:00', 'booking-1', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 201
+
+    retry = book(client, first, doctor, tomorrow, '10:00', 'booking-1')
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert Appointment.query.filter_by(doctor_id=doctor.id).count() == 3
+
+
+def test_replay_keeps_headers_set_by_the_view(app, client):
+    calls = []
+
+    @idempotent
+    def write():
+        calls.append(1)
+        response = jsonify({'written': len(calls)})
+        response.headers['Location'] = '/api/things/1'
+        response.set_cookie('seen', 'yes')
+        return response, 201
+
+    app.add_url_rule('/test/idempotent-write', 'idempotent_write', write, methods=['POST'])
+    headers = {'Idempotency-Key': 'write-1'}
+
+    first = client.post('/test/idempotent-write', json={}, headers=headers)
+    retry = client.post('/test/idempotent-write', json={}, headers=headers)
+
+    assert calls == [1]
+    assert retry.status_code == 201
+    assert retry.get_json() == first.get_json() == {'written': 1}
+    assert retry.headers['Location'] == '/api/things/1'
+    assert retry.headers.getlist('Set-Cookie') == first.headers.getlist('Set-Cookie')
+    assert retry.headers['Content-Type'] == 'application/json'
+    assert 'Idempotent-Replayed' not in first.headers
@@ -0,0 +1,127 @@
+"""Background jobs run in one process at a time, whichever workers start them"""
+from datetime import date, datetime, time, timedelta
+
+from models import db, Appointment, ArchivedAppointment, Availability
+from services.archive import ARCHIVE_LEASE, AppointmentArchiver
+from services.availability_cleanup import CLEANUP_LEASE, AvailabilityCleaner
+from services.job_lease import Lease
+
+
+def test_lease_is_held_by_one_process_at_a_time(app):
+    first, second = Lease('job', ttl_seconds=60), Lease('job', ttl_seconds=60)
+
+    assert first.acquire()
+    assert not second.acquire()
+    assert first.renew()
+
+    first.release()
+    # Completed a moment ago: not due yet, unless the caller has no minimum interval
+    assert not second.acquire(min_interval=3600)
+    assert second.acquire()
+
+
+def test_lapsed_lease_is_taken_over(app):
+    first, second = Lease('job', ttl_seconds=60), Lease('job', ttl_seconds=60)
+    assert first.acquire()
+
+    # The first holder died without releasing; its claim runs out
+    assert second.acquire(now=datetime.utcnow() + timedelta(seconds=61))
+    assert not first.renew()
+
+
+def past_appointments(factory, count):
+    doctor, patient = factory.doctor(), factory.patient()
+    day = date.today() - timedelta(days=800)
+    db.session.add_all(
+        Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=day,
+                    appointment_time=time(9 + index), status='completed')
+        for index in range(count)
+    )
+    db.session.commit()
+
+
+def test_archiver_stops_when_its_lease_is_taken_over(app, factory):
+    past_appointments(factory, 4)
+    lease = Lease(ARCHIVE_LEASE, ttl_seconds=60)
+    assert lease.acquire()
+    # Another process takes the job over after the claim lapsed
+    assert Lease(ARCHIVE_LEASE, ttl_seconds=60).acquire(now=datetime.utcnow() + timedelta(seconds=61))
+
+    stats = AppointmentArchiver(batch_size=1, pause_seconds=0).run_once(lease=lease)
+
+    assert (stats['batches'], stats['archived']) == (1, 1)
+    assert ArchivedAppointment.query.count() == 1
+
+
+def test_archive_command_refuses_while_the_job_runs_elsewhere(app, factory):
+    past_appointments(factory, 3)
+    runner = app.test_cli_runner()
+    server = Lease(ARCHIVE_LEASE)
+    assert server.acquire()
+
+    result = runner.invoke(args=['archive-appointments'])
+    assert result.exit_code != 0
+    assert 'Another process is archiving' in result.output
+    assert ArchivedAppointment.query.count() == 0
+
+    server.release()
+    result = runner.invoke(args=['archive-appointments'])
+    assert result.exit_code == 0, result.output
+    assert 'archived=2' in result.output
+
+
+def past_slots(factory, count):
+    doctor = factory.doctor()
+    day = date.today() - timedelta(days=90)
+    db.session.add_all(
+        Availability(doctor_id=doctor.id, date=day, time=time(9 + index), is_booked=False)
+        for index in range(count)
+    )
+    db.session.commit()
+
+
+def test_cleaner_stops_when_its_lease_is_taken_over(app, factory):
+    past_slots(factory, 3)
+    lease = Lease(CLEANUP_LEASE, ttl_seconds=60)
+    assert lease.acquire()
+    assert Lease(CLEANUP_LEASE, ttl_seconds=60).acquire(now=datetime.utcnow() + timedelta(seconds=61))
+
+    stats = AvailabilityCleaner(batch_size=1, pause_seconds=0).run_once(lease=lease)
+
+    assert (stats['batches'], stats['deleted']) == (1, 1)
+    assert Availability.query.count() == 2
+
+
+def test_purge_command_refuses_while_the_job_runs_elsewhere(app, factory):
+    past_slots(factory, 3)
+    runner = app.test_cli_runner()
+    server = Lease(CLEANUP_LEASE)
+    assert server.acquire()
+
+    result = runner.invoke(args=['purge-availability'])
+    assert result.exit_code != 0
+    assert 'Another process is purging availability' in result.output
+    assert Availability.query.count() == 3
+
+    server.release()
+    result = runner.invoke(args=['purge-availability'])
+    assert result.exit_code == 0, result.output
+    assert 'deleted=3' in result.output
+
+
+def test_archiver_deletes_rows_whose_copy_is_already_archived(app, factory):
+    past_appointments(factory, 4)
+    leftover = Appointment.query.order_by(Appointment.id).first()
+    # An archived copy left behind by an earlier run that never deleted the live row
+    db.session.add(ArchivedAppointment(
+        id=leftover.id, patient_id=leftover.patient_id, doctor_id=leftover.doctor_id,
+        appointment_date=leftover.appointment_date, appointment_time=leftover.appointment_time, status='completed'
+    ))
+    db.session.commit()
+
+    stats = AppointmentArchiver(batch_size=2, pause_seconds=0).run_once(max_batches=10)
+
+    assert (stats['archived'], stats['already_archived'], stats['conflicts']) == (2, 1, 0)
+    assert stats['batches'] == 2
+    assert Appointment.query.count() == 1
+    assert ArchivedAppointment.query.count() == 3
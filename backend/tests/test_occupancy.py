@@ -0,0 +1,53 @@
+"""Occupancy check finds and repairs drift left by writes that bypassed the booking service"""
+from datetime import time
+
+from models import db, Appointment, Availability
+from services.occupancy import check_occupancy
+
+
+def flags(doctor):
+    db.session.expire_all()
+    return {
+        slot.time.strftime('%H:%M'): slot.is_booked
+        for slot in Availability.query.filter_by(doctor_id=doctor.id).order_by(Availability.time)
+    }
+
+
+def test_check_repairs_slot_flags(factory, tomorrow):
+    doctor, patient = factory.doctor(), factory.patient()
+    factory.slots(doctor, tomorrow, '10:00', '10:30', '11:00')
+    kept = factory.appointment(patient, doctor, tomorrow, '10:00')
+    dropped = factory.appointment(patient, doctor, tomorrow, '11:00')
+
+    # What the old PUT path did: change the status without releasing or reserving slots
+    dropped.status = 'cancelled'
+    Availability.query.filter_by(doctor_id=doctor.id).filter(Availability.time > kept.appointment_time).update(
+        {'is_booked': True}, synchronize_session=False
+    )
+    db.session.commit()
+
+    stats = check_occupancy()
+    assert stats['stale_flags'] == 2
+    assert stats['stale'] == 1
+
+    stats = check_occupancy(repair=True)
+    assert stats['repaired_flags'] == 2
+    assert flags(doctor) == {'10:00': True, '10:30': False, '11:00': False}
+
+    stats = check_occupancy()
+    assert (stats['stale_flags'], stats['stale'], stats['missing'], stats['orphaned']) == (0, 0, 0, 0)
+
+
+def test_check_reports_overlapping_bookings(factory, tomorrow):
+    doctor, first, second = factory.doctor(), factory.patient(), factory.patient()
+    factory.appointment(first, doctor, tomorrow, '10:30')
+    db.session.add(Appointment(
+        patient_id=second.id, doctor_id=doctor.id, appointment_date=tomorrow,
+        appointment_time=time(10, 0), duration_minutes=60
+    ))
+    db.session.commit()
+
+    stats = check_occupancy(repair=True)
+
+    assert stats['overlapping'] == 1
+    assert {'doctor_id': doctor.id, 'date': tomorrow.isoformat(), 'problem': 'overlap'} in stats['sample']
@@ -0,0 +1,47 @@
+"""Token buckets of limiters with different rates share one store without disturbing each other"""
+from services.rate_limiter import InMemoryBucketStore
+
+
+def test_prune_keeps_buckets_by_their_own_refill_time(monkeypatch):
+    monkeypatch.setattr(InMemoryBucketStore, 'PRUNE_THRESHOLD', 2)
+    store = InMemoryBucketStore()
+
+    # A slow limiter (1 token a minute, burst 5) drains its bucket
+    for _ in range(5):
+        assert store.take('login:account:a', 1 / 60, 5, now=0)[0]
+    assert not store.take('login:account:a', 1 / 60, 5, now=0)[0]
+
+    # A fast limiter's traffic triggers a prune ten seconds later; with the
+    # fast limiter's rate the slow bucket would look full and be dropped
+    store.take('login:ip:1', 10, 10, now=10)
+    store.take('login:ip:2', 10, 10, now=10)
+
+    allowed, retry_after = store.take('login:account:a', 1 / 60, 5, now=11)
+    assert not allowed
+    assert retry_after > 0
+
+
+def test_prune_drops_refilled_buckets(monkeypatch):
+    monkeypatch.setattr(InMemoryBucketStore, 'PRUNE_THRESHOLD', 2)
+    store = InMemoryBucketStore()
+
+    store.take('a', 1, 2, now=0)
+    store.take('b', 1, 2, now=0)
+    store.take('c', 1, 2, now=5)
+
+    assert set(store._buckets) == {'c'}
+
+
+def test_prune_is_amortized_while_buckets_stay_live(monkeypatch):
+    monkeypatch.setattr(InMemoryBucketStore, 'PRUNE_THRESHOLD', 2)
+    store = InMemoryBucketStore()
+    prunes = []
+    prune = store._prune
+    monkeypatch.setattr(store, '_prune', lambda now: prunes.append(now) or prune(now))
+
+    # Every client is still draining its bucket, so no prune can shrink the store
+    for index in range(1000):
+        store.take(f'client:{index}', 1 / 60, 5, now=0)
+
+    assert len(store._buckets) == 1000
+    assert len(prunes) <= 10